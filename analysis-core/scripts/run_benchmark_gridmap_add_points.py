@@ -0,0 +1,68 @@
+from geometry.gridmap import DenseGridLayer, GridmapCoordinates
+
+import argparse
+import timeit
+import numpy as np
+
+
+def histogram2d_add_points(layer : DenseGridLayer, points : np.ndarray) -> None:
+    """
+    Previous DenseGridLayer.add_points: full-size np.histogram2d, two flips and a full-grid add.
+    Its linspace edges match the xy_to_uv cells of add_points only when the bounds are a multiple of the resolution.
+    """
+    bounds = layer.gridmap_coordinates.gridmap_bounds
+    x_edges = np.linspace(bounds[0], bounds[2], layer.shape[0] + 1)
+    y_edges = np.linspace(bounds[1], bounds[3], layer.shape[1] + 1)
+    histogram, _, _ = np.histogram2d(points[:, 0], points[:, 1], bins=(x_edges, y_edges))
+    layer.occupancy_data += np.fliplr(np.flipud(histogram))
+
+
+def benchmark_add_points(map_size : float = 200.0, resolution : float = 0.05, num_points : int = 50000, number : int = 20, repeat : int = 3) -> None:
+    """
+    Print the time per add_points call of the bincount scatter vs the previous histogram2d path.
+
+    Parameters
+    ----------
+    map_size : float
+        Side length of the square map in meters
+    resolution : float
+        Cell size in meters
+    num_points : int
+        Points per call, spread over a 10 m x 10 m patch like one depth scan
+    number : int
+        Calls per timing run
+    repeat : int
+        Timing runs per case, the best one is reported
+    """
+
+    coordinates = GridmapCoordinates(np.array([-map_size / 2, -map_size / 2, map_size / 2, map_size / 2]), resolution)
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-5.0, 5.0, size=(num_points, 3)) + np.array([20.0, -10.0, 0.0])
+
+    reference = DenseGridLayer("reference", coordinates)
+    fast = DenseGridLayer("fast", coordinates)
+    histogram2d_add_points(reference, points)
+    fast.add_points(points)
+    # Counts are only expected to match when map_size is a multiple of resolution (see histogram2d_add_points)
+    print(f"map {coordinates.gridmap_shape[0]} x {coordinates.gridmap_shape[1]} cells, {num_points} points per call, identical counts: {np.array_equal(reference.occupancy_data, fast.occupancy_data)}")
+
+    histogram = min(timeit.repeat(lambda: histogram2d_add_points(reference, points), number=number, repeat=repeat)) / number * 1e3
+    scatter = min(timeit.repeat(lambda: fast.add_points(points), number=number, repeat=repeat)) / number * 1e3
+    print(f"{'histogram2d [ms]':>18}{'bincount [ms]':>16}{'speedup':>10}")
+    print(f"{histogram:>18.2f}{scatter:>16.2f}{histogram / scatter:>9.1f}x")
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map_size", type=float, required=False, default=200.0)
+    parser.add_argument("--resolution", type=float, required=False, default=0.05)
+    parser.add_argument("--num_points", type=int, required=False, default=50000)
+    parser.add_argument("--number", type=int, required=False, default=20)
+    parser.add_argument("--repeat", type=int, required=False, default=3)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    benchmark_add_points(args.map_size, args.resolution, args.num_points, args.number, args.repeat)
+
+if __name__ == "__main__":
+    main()
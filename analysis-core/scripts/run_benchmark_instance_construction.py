@@ -0,0 +1,67 @@
+from data_models.core.base_metadata import BaseMetadata
+from data_models.core.construct import construct_unchecked
+from data_models.impl.image_instance import ImageInstance
+from data_models.impl.pose_instance import PoseInstance
+from data_models.impl.transforms import Transform3D
+
+import argparse
+import timeit
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+
+def benchmark_instance_construction(number : int = 100000, repeat : int = 5) -> None:
+    """
+    Print per-instance construction overhead of validated vs unchecked data models.
+
+    Parameters
+    ----------
+    number : int
+        Constructions per timing run
+    repeat : int
+        Timing runs per case, the best one is reported
+    """
+
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    translation = np.zeros(3)
+    rotation = Rotation.identity()
+    metadata = BaseMetadata(timestamp=0.0, index=0)
+    transform = Transform3D(translation=translation, rotation=rotation)
+
+    cases = {
+        "BaseMetadata": (
+            lambda: BaseMetadata(timestamp=0.0, index=0),
+            lambda: construct_unchecked(BaseMetadata, timestamp=0.0, index=0),
+        ),
+        "Transform3D": (
+            lambda: Transform3D(translation=translation, rotation=rotation),
+            lambda: construct_unchecked(Transform3D, translation=translation, rotation=rotation),
+        ),
+        "ImageInstance": (
+            lambda: ImageInstance(data=image, metadata=BaseMetadata(timestamp=0.0, index=0)),
+            lambda: construct_unchecked(ImageInstance, data=image, metadata=construct_unchecked(BaseMetadata, timestamp=0.0, index=0)),
+        ),
+        "PoseInstance": (
+            lambda: PoseInstance(pose=transform, metadata=metadata),
+            lambda: construct_unchecked(PoseInstance, pose=transform, metadata=metadata),
+        ),
+    }
+
+    print(f"{'model':<16}{'validated [us]':>16}{'unchecked [us]':>16}{'speedup':>10}")
+    for name, (validated_fn, unchecked_fn) in cases.items():
+        validated = min(timeit.repeat(validated_fn, number=number, repeat=repeat)) / number * 1e6
+        unchecked = min(timeit.repeat(unchecked_fn, number=number, repeat=repeat)) / number * 1e6
+        print(f"{name:<16}{validated:>16.3f}{unchecked:>16.3f}{validated / unchecked:>9.1f}x")
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, required=False, default=100000)
+    parser.add_argument("--repeat", type=int, required=False, default=5)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    benchmark_instance_construction(args.number, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from analysis_core.build_tsrb_map import build_tsrb_map
+from data_models.impl.transforms import Transform3D
+from data_streams.ros2_common.camera_streams import make_camera_info_stream, make_depth_image_stream
+from data_streams.ros2_common.pose_streams import make_odometry_stream
+from geometry.depth_projection import DepthProjector
+
+import os
+import argparse
+import cv2
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+# Camera optical frame (x right, y down, z forward) in a FLU base frame
+OPTICAL_IN_BASE = Rotation.from_matrix(np.array([[0.0, 0.0, 1.0], [-1.0, 0.0, 0.0], [0.0, -1.0, 0.0]]))
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bag_path", type=str, required=True)
+    parser.add_argument("--depth_topic", type=str, required=False, default="/camera/depth/image_rect_raw")
+    parser.add_argument("--camera_info_topic", type=str, required=False, default="/camera/depth/camera_info")
+    parser.add_argument("--pose_topic", type=str, required=False, default="/odom")
+    parser.add_argument("--camera_xyz", type=float, nargs=3, required=False, default=[0.0, 0.0, 0.0], help="Camera position in the base frame; the optical axis is assumed to look forward")
+    parser.add_argument("--resolution", type=float, required=False, default=0.1)
+    parser.add_argument("--stride", type=int, required=False, default=4)
+    parser.add_argument("--max_depth", type=float, required=False, default=8.0)
+    parser.add_argument("--z_min", type=float, required=False, default=0.1)
+    parser.add_argument("--z_max", type=float, required=False, default=2.0)
+    parser.add_argument("--skip_every", type=int, required=False, default=1)
+    parser.add_argument("--output_path", type=str, required=False)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.output_path is None:
+        args.output_path = os.path.join("analysis_outputs", os.path.basename(args.bag_path), "tsrb_map.png")
+    os.makedirs(os.path.dirname(args.output_path), exist_ok=True)
+
+    depth_stream = make_depth_image_stream(args.bag_path, args.depth_topic)
+    pose_stream = make_odometry_stream(args.bag_path, args.pose_topic)
+    camera_info = make_camera_info_stream(args.bag_path, args.camera_info_topic).get_instance(0)
+    projector = DepthProjector(camera_info=camera_info, stride=args.stride, max_depth=args.max_depth)
+    sensor_pose = Transform3D(translation=np.array(args.camera_xyz), rotation=OPTICAL_IN_BASE)
+
+    print(f"Mapping {args.depth_topic} with poses from {args.pose_topic} in bag {args.bag_path}")
+
+    tsrb_map, stats = build_tsrb_map(
+        depth_stream,
+        pose_stream,
+        projector.project,
+        sensor_pose=sensor_pose,
+        resolution=args.resolution,
+        z_range=(args.z_min, args.z_max),
+        skip_every=args.skip_every,
+    )
+
+    print(f"{stats.frames} frames ({stats.skipped_frames} without pose), {stats.points} points in {stats.seconds:.1f} s: "
+          f"{stats.frames_per_second:.1f} frames/s, {stats.points_per_second:.3g} points/s")
+
+    cv2.imwrite(args.output_path, tsrb_map.visualize(binary=True, exponential_scaling=False))
+    print(f"Wrote {args.output_path}")
+
+if __name__ == "__main__":
+    main()
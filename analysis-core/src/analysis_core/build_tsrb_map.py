@@ -0,0 +1,201 @@
+"""Build a ``TSRBMap`` from a depth (or point) stream and a pose stream in one call."""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+from tqdm import tqdm
+
+from data_models.core.base_model import BaseInstance
+from data_models.impl.transforms import Transform3D
+from data_streams.core.data_stream import DataStream
+from mapping.impl.tsrb_map import TSRBMap
+
+# Map margin around the trajectory when no bounds are given and points_fn has no max_depth
+DEFAULT_RANGE = 10.0
+
+
+class MapBuildStats(BaseModel):
+    """Throughput of one ``build_tsrb_map`` run.
+
+    Attributes
+    ----------
+    frames : int
+        Sensor frames accumulated into the map.
+    skipped_frames : int
+        Frames dropped for lack of a pose within ``max_time_offset``.
+    points : int
+        Points accumulated (after the height filter).
+    seconds : float
+        Wall time of the accumulation loop.
+    """
+
+    frames : int = 0
+    skipped_frames : int = 0
+    points : int = 0
+    seconds : float = 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def points_per_second(self) -> float:
+        return self.points / self.seconds if self.seconds > 0 else 0.0
+
+
+def _world_from_sensor(pose: Transform3D, sensor_pose: Optional[Transform3D]) -> Tuple[np.ndarray, np.ndarray]:
+    """Rotation matrix and translation taking sensor-frame points into the map frame."""
+    rotation = pose.rotation
+    translation = np.asarray(pose.translation, dtype=np.float64)
+    if sensor_pose is not None:
+        translation = translation + rotation.apply(sensor_pose.translation)
+        rotation = rotation * sensor_pose.rotation
+    return rotation.as_matrix().astype(np.float32), translation.astype(np.float32)
+
+
+def _prefetch_chunks(stream: DataStream, indices: np.ndarray, chunk_size: int, prefetch: int) -> Iterator[List[BaseInstance]]:
+    """Decode chunks of ``indices`` on a background thread, at most ``prefetch`` chunks ahead."""
+    chunks: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+    done = object()
+
+    def produce() -> None:
+        try:
+            for start in range(0, len(indices), chunk_size):
+                if stop.is_set():
+                    return
+                chunks.put(stream.get_instances(indices[start:start + chunk_size]))
+            chunks.put(done)
+        except BaseException as error:  # re-raised in the consumer
+            chunks.put(error)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is done:
+                return
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue
+        while producer.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def build_tsrb_map(
+    sensor_stream: DataStream,
+    pose_stream: DataStream,
+    points_fn: Callable[[BaseInstance], np.ndarray],
+    sensor_pose: Optional[Transform3D] = None,
+    tsrb_map: Optional[TSRBMap] = None,
+    resolution: float = 0.1,
+    z_range: Optional[Tuple[float, float]] = None,
+    max_time_offset: float = 0.05,
+    skip_every: int = 1,
+    chunk_size: int = 16,
+    prefetch: int = 2,
+    progress: bool = True,
+) -> Tuple[TSRBMap, MapBuildStats]:
+    """Accumulate every sensor frame of a bag into a ``TSRBMap``.
+
+    Parameters
+    ----------
+    sensor_stream : DataStream
+        Depth image stream (e.g. ``make_depth_image_stream``) or any stream
+        ``points_fn`` turns into points.
+    pose_stream : DataStream
+        ``PoseInstance`` stream of the robot base in the map frame (e.g.
+        ``make_odometry_stream``); matched to sensor frames by nearest timestamp.
+    points_fn : Callable[[BaseInstance], np.ndarray]
+        Sensor instance -> ``(N, 3)`` points in the sensor frame, e.g.
+        ``DepthProjector(...).project``.
+    sensor_pose : Transform3D, optional
+        Pose of the sensor frame (for depth: the camera optical frame) in the
+        base frame; the sensor frame is the base frame when None.
+    tsrb_map : TSRBMap, optional
+        Map to add to. When None, a map with ``resolution`` is created whose
+        bounds cover the matched trajectory plus the sensor range
+        (``points_fn``'s ``max_depth`` if it has one, else ``DEFAULT_RANGE``).
+    resolution : float
+        Cell size in meters of a newly created map.
+    z_range : Tuple[float, float], optional
+        Keep only points with ``z_min <= z <= z_max`` in the map frame.
+    max_time_offset : float
+        Frames whose nearest pose is further away in time (seconds) are skipped.
+    skip_every : int
+        Use every ``skip_every``-th sensor frame.
+    chunk_size : int
+        Frames decoded per batch (``get_instances``) and accumulated per
+        ``add_points`` call.
+    prefetch : int
+        Chunks decoded ahead on a background thread while the previous chunk
+        is projected and accumulated.
+    progress : bool
+        Show a tqdm bar with frame and point throughput.
+
+    Returns
+    -------
+    Tuple[TSRBMap, MapBuildStats]
+        The map, with one ``[x, y, yaw_degrees]`` odometry entry per used frame
+        appended, and run statistics.
+    """
+    stats = MapBuildStats()
+    sensor_metadata = sensor_stream.get_instance_metadata_range(step=skip_every)
+    pose_metadata = pose_stream.get_nearest_instance_metadata_batch(sensor_metadata.timestamps)
+    matched = np.abs(pose_metadata.timestamps - sensor_metadata.timestamps) <= max_time_offset
+    stats.skipped_frames = int(np.count_nonzero(~matched))
+    sensor_indices = sensor_metadata.indices[matched]
+    pose_indices = pose_metadata.indices[matched]
+    poses = [instance.pose for instance in pose_stream.get_instances(pose_indices)]
+
+    if tsrb_map is None:
+        margin = getattr(getattr(points_fn, "__self__", None), "max_depth", None) or DEFAULT_RANGE
+        if len(poses) > 0:
+            xy = np.array([pose.translation[:2] for pose in poses], dtype=np.float64)
+            bounds = np.concatenate([xy.min(axis=0) - margin, xy.max(axis=0) + margin])
+        else:
+            bounds = np.array([-margin, -margin, margin, margin])
+        tsrb_map = TSRBMap(bounds, resolution=resolution)
+
+    bar = tqdm(total=len(sensor_indices), unit="frame", disable=not progress)
+    start_time = time.perf_counter()
+    frame = 0
+    for chunk in _prefetch_chunks(sensor_stream, sensor_indices, chunk_size, prefetch):
+        chunk_points = []
+        trajectory = []
+        for instance in chunk:
+            pose = poses[frame]
+            frame += 1
+            rotation, translation = _world_from_sensor(pose, sensor_pose)
+            points = np.asarray(points_fn(instance), dtype=np.float32).reshape(-1, 3)
+            points = points @ rotation.T
+            points += translation
+            if z_range is not None:
+                points = points[(points[:, 2] >= z_range[0]) & (points[:, 2] <= z_range[1])]
+            chunk_points.append(points)
+            yaw = pose.rotation.as_euler("xyz", degrees=True)[2]
+            trajectory.append(np.array([pose.translation[0], pose.translation[1], yaw]))
+
+        points = np.concatenate(chunk_points) if chunk_points else np.empty((0, 3), dtype=np.float32)
+        tsrb_map.dense_layer.add_points(points)
+        tsrb_map.add_odometry_data(trajectory)
+
+        stats.frames += len(chunk)
+        stats.points += len(points)
+        stats.seconds = time.perf_counter() - start_time
+        bar.update(len(chunk))
+        bar.set_postfix(fps=f"{stats.frames_per_second:.1f}", pts_per_s=f"{stats.points_per_second:.3g}")
+    bar.close()
+    stats.seconds = time.perf_counter() - start_time
+    return tsrb_map, stats
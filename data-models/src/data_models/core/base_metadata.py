@@ -1,13 +1,15 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel
 
 
 class BaseMetadata(BaseModel):
     timestamp : float
     index: int
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    class Config:
+        arbitrary_types_allowed = True
 
     def __len__(self) -> int:
         return 1
 
     def __getitem__(self, index: int) -> 'BaseMetadata':
-        return self
\ No newline at end of file
+        return self
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel
 from .base_metadata import BaseMetadata
 from typing import Any
 
@@ -7,7 +7,8 @@ class BaseInstance(BaseModel):
     metadata : BaseMetadata
     data : Any
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    class Config:
+        arbitrary_types_allowed = True
 
     def __len__(self) -> int:
         return 1
@@ -0,0 +1,43 @@
+"""Validation-free construction of data models for hot decode paths."""
+
+from typing import Any, Type, TypeVar
+
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def construct_unchecked(model_cls: Type[ModelT], **values: Any) -> ModelT:
+    """Build ``model_cls`` from already-typed field values without validation.
+
+    Parameters
+    ----------
+    model_cls : type
+        Pydantic model class (e.g. ``BaseMetadata``, ``ImageInstance``,
+        ``Transform3D``).
+    **values : Any
+        Field values. Must already have the declared types: no coercion,
+        copying or ``arbitrary_types_allowed`` checks are applied.
+
+    Returns
+    -------
+    BaseModel
+        Instance with the same attribute API as ``model_cls(**values)``.
+
+    Notes
+    -----
+    Cheaper than both ``model_cls(**values)`` and pydantic's ``construct``:
+    nested models are stored as given rather than copied, and only missing
+    optional fields fall back to their defaults. Callers are responsible for
+    casting (e.g. ``float(ts)``, ``int(idx)``); use the normal constructor for
+    untrusted input. ``analysis-core/scripts/run_benchmark_instance_construction.py``
+    measures the per-instance difference.
+    """
+    obj = model_cls.__new__(model_cls)
+    if len(values) != len(model_cls.__fields__):
+        for name, field in model_cls.__fields__.items():
+            if name not in values and not field.required:
+                values[name] = field.get_default()
+    object.__setattr__(obj, "__dict__", values)
+    object.__setattr__(obj, "__fields_set__", set(values))
+    return obj
@@ -0,0 +1,86 @@
+from pydantic import BaseModel
+import numpy as np
+
+from typing import Iterator, Union
+
+from .base_metadata import BaseMetadata
+from .construct import construct_unchecked
+
+
+class MetadataBatch(BaseModel):
+    """Array-backed metadata for many instances of one stream.
+
+    Attributes
+    ----------
+    indices : np.ndarray
+        int64 instance indices, shape ``(N,)``.
+    timestamps : np.ndarray
+        float64 timestamps in seconds, shape ``(N,)``, parallel to ``indices``.
+
+    Notes
+    -----
+    Bulk planning (range queries, decimation, alignment) works on the two arrays
+    directly. A ``BaseMetadata`` is only created when a single row is accessed,
+    so a batch over a million messages costs two arrays rather than a million
+    models.
+    """
+
+    indices : np.ndarray
+    timestamps : np.ndarray
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_arrays(cls, indices: np.ndarray, timestamps: np.ndarray) -> 'MetadataBatch':
+        """Build a batch from parallel index/timestamp arrays without validation.
+
+        Parameters
+        ----------
+        indices : np.ndarray
+            Instance indices.
+        timestamps : np.ndarray
+            Timestamps in seconds, same length as ``indices``.
+
+        Returns
+        -------
+        MetadataBatch
+            Batch viewing (not copying) the arrays when they already have the
+            target dtypes.
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        timestamps = np.asarray(timestamps, dtype=np.float64).reshape(-1)
+        if len(indices) != len(timestamps):
+            raise ValueError("indices and timestamps must have the same length")
+        return construct_unchecked(cls, indices=indices, timestamps=timestamps)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, key: Union[int, slice, np.ndarray]) -> Union[BaseMetadata, 'MetadataBatch']:
+        """Row view for an integer key, sub-batch for a slice, index array or mask."""
+        if isinstance(key, (int, np.integer)):
+            return construct_unchecked(
+                BaseMetadata,
+                timestamp=float(self.timestamps[key]),
+                index=int(self.indices[key]),
+            )
+        return MetadataBatch.from_arrays(self.indices[key], self.timestamps[key])
+
+    def __iter__(self) -> Iterator[BaseMetadata]:
+        for index, timestamp in zip(self.indices.tolist(), self.timestamps.tolist()):
+            yield construct_unchecked(BaseMetadata, timestamp=timestamp, index=index)
+
+    def decimate(self, step: int) -> 'MetadataBatch':
+        """Keep every ``step``-th row."""
+        return self[::step]
+
+    def between(self, start_time: float, end_time: float) -> 'MetadataBatch':
+        """Rows with ``start_time <= timestamp <= end_time``.
+
+        Assumes chronological order (as produced by ``DataStream``), so the
+        result is a slice view found by binary search.
+        """
+        start = np.searchsorted(self.timestamps, start_time, side="left")
+        stop = np.searchsorted(self.timestamps, end_time, side="right")
+        return self[start:stop]
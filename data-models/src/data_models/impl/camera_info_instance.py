@@ -0,0 +1,73 @@
+from data_models.core.base_model import BaseInstance
+from data_models.core.base_metadata import BaseMetadata
+
+import numpy as np
+
+class CameraInfoInstance(BaseInstance):
+    """Pinhole calibration of one camera (``sensor_msgs/CameraInfo``).
+
+    Attributes
+    ----------
+    width : int
+        Calibrated image width in pixels.
+    height : int
+        Calibrated image height in pixels.
+    distortion_model : str
+        ``plumb_bob``, ``rational_polynomial`` or ``equidistant`` (fisheye).
+    K : np.ndarray
+        ``(3, 3)`` intrinsic matrix of the raw image.
+    D : np.ndarray
+        Distortion coefficients.
+    R : np.ndarray
+        ``(3, 3)`` rectification rotation.
+    P : np.ndarray
+        ``(3, 4)`` projection matrix of the rectified image.
+    metadata : BaseMetadata
+        Metadata containing timestamp and index
+    """
+
+    width : int
+    height : int
+    distortion_model : str
+    K : np.ndarray
+    D : np.ndarray
+    R : np.ndarray
+    P : np.ndarray
+    metadata : BaseMetadata
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def timestamp(self) -> float:
+        return self.metadata.timestamp
+
+    @property
+    def index(self) -> int:
+        return self.metadata.index
+
+    @property
+    def is_calibrated(self) -> bool:
+        """Whether ``K`` holds a calibration (all zeros for an uncalibrated camera)."""
+        return bool(self.K[0, 0] != 0.0)
+
+    def scaled(self, width : int, height : int) -> "CameraInfoInstance":
+        """Calibration for the same camera imaged at another resolution.
+
+        Parameters
+        ----------
+        width : int
+            Target image width, e.g. of a reduced-size decode.
+        height : int
+            Target image height.
+
+        Returns
+        -------
+        CameraInfoInstance
+            ``self`` if the size matches, otherwise a copy with the first two rows
+            of ``K`` and ``P`` scaled by the per-axis size ratio.
+        """
+        if width == self.width and height == self.height:
+            return self
+        scale = np.array([[width / self.width], [height / self.height], [1.0]])
+        return self.copy(update={"width": width, "height": height, "K": self.K * scale, "P": self.P * scale})
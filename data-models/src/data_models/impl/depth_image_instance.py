@@ -0,0 +1,34 @@
+from data_models.impl.image_instance import ImageInstance
+
+import numpy as np
+
+class DepthImageInstance(ImageInstance):
+    """Depth image whose ``data`` may be stored in scaled units.
+
+    Attributes
+    ----------
+    data : np.ndarray
+        ``(H, W)`` depth in ``float32``, ``float16`` or integer units.
+    depth_scale : float
+        Meters per unit of ``data``; 1.0 for float depth in meters, 0.001 for
+        ``uint16`` millimeters.
+    metadata : BaseMetadata
+        Metadata containing timestamp and index
+    """
+
+    depth_scale : float = 1.0
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def depth_meters(self) -> np.ndarray:
+        """Get depth in meters as float32.
+
+        Returns
+        -------
+        np.ndarray
+            ``data`` itself when it already is float32 meters, otherwise a scaled copy.
+        """
+        if self.depth_scale == 1.0 and self.data.dtype == np.float32:
+            return self.data
+        return np.multiply(self.data, self.depth_scale, dtype=np.float32)
@@ -0,0 +1,297 @@
+"""Shared-memory ring of image slots for passing ``ImageInstance`` between processes by handle."""
+
+import pickle
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from data_models.core.base_metadata import BaseMetadata
+from data_models.core.construct import construct_unchecked
+from data_models.impl.image_instance import ImageInstance
+
+_ALIGNMENT = 64
+_STATE_DTYPE = np.int64
+
+# Shared memory blocks opened in this process, by name (owned pools and attachments).
+_open_blocks: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _aligned(nbytes: int) -> int:
+    return (nbytes + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block once per process without taking ownership of it.
+
+    Parameters
+    ----------
+    name : str
+        Shared memory block name.
+
+    Returns
+    -------
+    SharedMemory
+        Cached attachment.
+
+    Notes
+    -----
+    Before Python 3.13 attachments cannot opt out of the resource tracker.
+    ``multiprocessing`` workers share the creating process' tracker, where the
+    repeated registration is a no-op, so only the creating pool unlinks the block.
+    """
+    shm = _open_blocks.get(name)
+    if shm is not None:
+        return shm
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+    _open_blocks[name] = shm
+    return shm
+
+
+def _slot_states(shm: shared_memory.SharedMemory, num_slots: int) -> np.ndarray:
+    return np.ndarray((num_slots,), dtype=_STATE_DTYPE, buffer=shm.buf, offset=0)
+
+
+class SharedImageHandle(BaseModel):
+    """Picklable reference to one image held in a ``SharedImagePool`` slot.
+
+    Attributes
+    ----------
+    pool_name : str
+        Shared memory block name of the pool.
+    num_slots : int
+        Number of slots in the pool (locates the slot state table).
+    slot : int
+        Slot holding the image.
+    generation : int
+        Occupancy counter of the slot when the image was written; guards against
+        releasing a slot that has since been reused.
+    offset : int
+        Byte offset of the image in the block.
+    shape : Tuple[int, ...]
+        Image shape.
+    dtype : str
+        Image dtype string.
+    metadata : BaseMetadata
+        Metadata of the original instance.
+    """
+
+    pool_name : str
+    num_slots : int
+    slot : int
+    generation : int
+    offset : int
+    shape : Tuple[int, ...]
+    dtype : str
+    metadata : BaseMetadata
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def open(self) -> ImageInstance:
+        """Return an ``ImageInstance`` whose ``data`` views the shared slot (no copy).
+
+        The view is only valid until ``release`` is called; copy it if it must
+        outlive the handle.
+        """
+        shm = _attach(self.pool_name)
+        data = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf, offset=self.offset)
+        return construct_unchecked(ImageInstance, data=data, metadata=self.metadata)
+
+    def release(self) -> None:
+        """Return the slot to the pool. Releasing twice, or after reuse, is a no-op."""
+        states = _slot_states(_attach(self.pool_name), self.num_slots)
+        if states[self.slot] == self.generation:
+            states[self.slot] = 0
+
+
+class SharedImagePool(BaseModel):
+    """Ring of fixed-capacity image slots in one ``multiprocessing.shared_memory`` block.
+
+    The producer copies each decoded image into a free slot once (``put``) and
+    sends the small ``SharedImageHandle`` to workers, which view the pixels in
+    place (``SharedImageHandle.open``) and hand the slot back with
+    ``SharedImageHandle.release``.
+
+    Attributes
+    ----------
+    slot_shape : Tuple[int, ...]
+        Largest image shape a slot can hold, e.g. ``(1080, 1920, 3)``.
+    dtype : str
+        Element dtype the slot capacity is computed for.
+    num_slots : int
+        Number of slots, i.e. how many images can be in flight at once.
+    """
+
+    slot_shape : Tuple[int, ...]
+    dtype : str
+    num_slots : int
+    slot_nbytes : int = 0
+    header_nbytes : int = 0
+    shm : Optional[shared_memory.SharedMemory] = None
+
+    # Ring state, only touched by the producing process
+    cursor : int = 0
+    generation : int = 0
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def __init__(self, slot_shape: Tuple[int, ...], num_slots: int, dtype: Any = np.uint8, name: Optional[str] = None):
+        dtype = np.dtype(dtype)
+        slot_nbytes = _aligned(int(np.prod(slot_shape)) * dtype.itemsize)
+        header_nbytes = _aligned(num_slots * np.dtype(_STATE_DTYPE).itemsize)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=header_nbytes + num_slots * slot_nbytes)
+        _slot_states(shm, num_slots)[:] = 0
+        _open_blocks[shm.name] = shm
+
+        super().__init__(
+            slot_shape=tuple(slot_shape),
+            dtype=dtype.str,
+            num_slots=num_slots,
+            slot_nbytes=slot_nbytes,
+            header_nbytes=header_nbytes,
+            shm=shm,
+        )
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def free_slots(self) -> int:
+        return int(np.count_nonzero(_slot_states(self.shm, self.num_slots) == 0))
+
+    def put(self, instance: ImageInstance, timeout: Optional[float] = None) -> SharedImageHandle:
+        """Copy ``instance.data`` into a free slot and return its handle.
+
+        Parameters
+        ----------
+        instance : ImageInstance
+            Image to share; ``data.nbytes`` must fit in one slot.
+        timeout : Optional[float]
+            Seconds to wait for a worker to release a slot, forever if None.
+
+        Returns
+        -------
+        SharedImageHandle
+            Handle to send to a worker process.
+
+        Raises
+        ------
+        ValueError
+            If the image is larger than a slot.
+        TimeoutError
+            If no slot became free within ``timeout``.
+        """
+        image = np.asarray(instance.data)
+        if image.nbytes > self.slot_nbytes:
+            raise ValueError(f"Image of {image.nbytes} bytes does not fit in a {self.slot_nbytes} byte slot")
+
+        slot = self._acquire_slot(timeout)
+        offset = self.header_nbytes + slot * self.slot_nbytes
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=self.shm.buf, offset=offset)
+        np.copyto(view, image)
+
+        return construct_unchecked(
+            SharedImageHandle,
+            pool_name=self.name,
+            num_slots=self.num_slots,
+            slot=slot,
+            generation=self.generation,
+            offset=offset,
+            shape=tuple(image.shape),
+            dtype=image.dtype.str,
+            metadata=instance.metadata,
+        )
+
+    def _acquire_slot(self, timeout: Optional[float]) -> int:
+        """Claim the next free slot in ring order, polling until one is released."""
+        states = _slot_states(self.shm, self.num_slots)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            for i in range(self.num_slots):
+                slot = (self.cursor + i) % self.num_slots
+                if states[slot] == 0:
+                    self.generation += 1
+                    self.cursor = (slot + 1) % self.num_slots
+                    states[slot] = self.generation
+                    return slot
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"No free slot in shared image pool {self.name} after {timeout} s")
+            time.sleep(0.0005)
+
+    def close(self) -> None:
+        """Detach from the block in this process; outstanding views become invalid."""
+        _open_blocks.pop(self.shm.name, None)
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """Destroy the block. Call once, from the creating process, after workers are done."""
+        self.shm.unlink()
+
+    def __enter__(self) -> 'SharedImagePool':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+        self.unlink()
+
+
+########################################################
+# PICKLE PROTOCOL 5 FALLBACK
+########################################################
+
+# For consumers without access to the pool (e.g. remote workers), image
+# buffers travel out-of-band next to a small pickle instead of inside it.
+
+def dumps_image_instance(instance: ImageInstance) -> Tuple[bytes, List[pickle.PickleBuffer]]:
+    """Pickle an instance with its ndarray buffers out-of-band (protocol 5).
+
+    Returns
+    -------
+    Tuple[bytes, List[pickle.PickleBuffer]]
+        Small pickle payload and the raw, uncopied array buffers.
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    payload = pickle.dumps(instance, protocol=5, buffer_callback=buffers.append)
+    return payload, buffers
+
+
+def loads_image_instance(payload: bytes, buffers: List[Any]) -> ImageInstance:
+    """Inverse of ``dumps_image_instance``; arrays view ``buffers`` without copying."""
+    return pickle.loads(payload, buffers=buffers)
+
+
+def send_image_instance(conn: Connection, instance: ImageInstance) -> None:
+    """Send an instance over a ``multiprocessing`` connection without pickling pixel data.
+
+    Parameters
+    ----------
+    conn : Connection
+        Sending end of a ``multiprocessing.Pipe``.
+    instance : ImageInstance
+        Instance to send.
+    """
+    payload, buffers = dumps_image_instance(instance)
+    raws = [buffer.raw() for buffer in buffers]
+    conn.send((payload, [raw.nbytes for raw in raws]))
+    for raw in raws:
+        conn.send_bytes(raw)
+
+
+def recv_image_instance(conn: Connection) -> ImageInstance:
+    """Receive an instance sent by ``send_image_instance`` into writable buffers."""
+    payload, sizes = conn.recv()
+    buffers = []
+    for size in sizes:
+        buffer = bytearray(size)
+        conn.recv_bytes_into(buffer)
+        buffers.append(buffer)
+    return loads_image_instance(payload, buffers)
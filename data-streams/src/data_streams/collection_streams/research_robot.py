@@ -2,6 +2,7 @@ from data_streams.ros2_common.camera_streams import make_rgb_image_stream
 from data_streams.impl.ros2 import Ros2DataStream
 from data_models.impl.pose_instance import PoseInstance
 from data_models.core.base_metadata import BaseMetadata
+from data_models.core.construct import construct_unchecked
 from data_models.impl.transforms import Transform3D
 from ros_python_conversions.ros2.tf import tf_message_to_tf_instance
 from data_models.impl.tf_instance import TFInstance
@@ -35,12 +36,13 @@ class tf_static_to_pose_stream(Ros2DataStream):
         combined_rotation = map_to_odom.rotation * odom_to_base_footprint.rotation
         
         # Create the combined transform
-        global_pose = Transform3D(
+        global_pose = construct_unchecked(
+            Transform3D,
             translation=combined_translation,
             rotation=combined_rotation
         )
 
-        return PoseInstance(pose=global_pose, metadata=instance_metadata)
+        return construct_unchecked(PoseInstance, pose=global_pose, metadata=instance_metadata)
 
     def find_nearest_odom_to_base_footprint(self, timestamp : float) -> TFInstance:
 
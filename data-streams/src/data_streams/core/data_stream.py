@@ -1,10 +1,12 @@
 from data_models.core.base_metadata import BaseMetadata
 from data_models.core.base_model import BaseInstance
+from data_models.core.construct import construct_unchecked
+from data_models.core.metadata_batch import MetadataBatch
 
 from pydantic import BaseModel, ConfigDict
 import numpy as np
 
-from typing import Generator, List
+from typing import Generator, List, Optional, Union
 
 class DataStream(BaseModel):
 
@@ -56,7 +58,46 @@ class DataStream(BaseModel):
             self.get_instance,
             range(0, len(self), skip_every)
         )
-    
+
+    def iterate_chunks(self, chunk_size: int = 32, skip_every: int = 1) -> Generator[List[BaseInstance], None, None]:
+        """Iterate through instances in chronological chunks.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Maximum number of instances per chunk.
+        skip_every : int
+            Index increment, as in ``iterate``.
+
+        Yields
+        -------
+        List[BaseInstance]
+            Consecutive instances; the last chunk may be shorter.
+
+        Notes
+        -----
+        Decodes one instance at a time here; subclasses that can decode
+        several instances concurrently override this (see ``Ros2DataStream``).
+        """
+        indices = range(0, len(self), skip_every)
+        for start in range(0, len(indices), chunk_size):
+            yield self.get_instances(indices[start:start + chunk_size])
+
+    def get_instances(self, indices : Union[List[int], np.ndarray]) -> List[BaseInstance]:
+        """Get the instances at several indices.
+
+        Parameters
+        ----------
+        indices : Union[List[int], np.ndarray]
+            Indices to retrieve. Negative indices are supported and count from the end.
+
+        Returns
+        -------
+        List[BaseInstance]
+            Instances in the order of ``indices``.
+        """
+        return [self.get_instance(int(index)) for index in np.asarray(indices, dtype=np.int64).reshape(-1)]
+
     def get_instance(self, index : int) -> BaseInstance:
         """Get a BaseInstance from the data stream at the specified index.
 
@@ -102,11 +143,105 @@ class DataStream(BaseModel):
         if index < 0:
             index = len(self) + index
 
-        return BaseMetadata(
-            index=index,
-            timestamp=self.timestamps[index]
+        return construct_unchecked(
+            BaseMetadata,
+            timestamp=float(self.timestamps[index]),
+            index=int(index),
         )
 
+    def get_instance_metadata_range(self, start : int = 0, stop : Optional[int] = None, step : int = 1) -> MetadataBatch:
+        """Get metadata for a range of indices as a single array-backed batch.
+
+        Parameters
+        ----------
+        start : int
+            First index (inclusive). Negative indices count from the end.
+        stop : Optional[int]
+            Last index (exclusive), defaults to the length of the stream.
+        step : int
+            Index increment, e.g. for decimation.
+
+        Returns
+        -------
+        MetadataBatch
+            Parallel index and timestamp arrays for the selected instances.
+
+        Notes
+        -----
+        Follows Python ``range``/slice semantics. No per-row ``BaseMetadata`` is created.
+        """
+
+        indices = np.arange(len(self))[start:stop:step]
+        return MetadataBatch.from_arrays(indices, self._timestamps_array()[indices])
+
+    def get_instance_metadata_batch(self, indices : Union[List[int], np.ndarray]) -> MetadataBatch:
+        """Get metadata for arbitrary indices as a single array-backed batch.
+
+        Parameters
+        ----------
+        indices : Union[List[int], np.ndarray]
+            Indices to retrieve metadata for. Negative indices are supported and count from the end.
+
+        Returns
+        -------
+        MetadataBatch
+            Parallel index and timestamp arrays, in the order of ``indices``.
+        """
+
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        indices = np.where(indices < 0, indices + len(self), indices)
+        return MetadataBatch.from_arrays(indices, self._timestamps_array()[indices])
+
+    def get_metadata_between(self, start_time : float, end_time : float) -> MetadataBatch:
+        """Get metadata for all instances with ``start_time <= timestamp <= end_time``.
+
+        Parameters
+        ----------
+        start_time : float
+            Start of the time window in seconds.
+        end_time : float
+            End of the time window in seconds.
+
+        Returns
+        -------
+        MetadataBatch
+            Batch of the instances inside the window, in chronological order.
+        """
+
+        return self.get_instance_metadata_range().between(start_time, end_time)
+
+    def get_nearest_instance_metadata_batch(self, timestamps : Union[List[float], np.ndarray]) -> MetadataBatch:
+        """Vectorized ``get_nearest_instance_metadata`` for many query timestamps.
+
+        Parameters
+        ----------
+        timestamps : Union[List[float], np.ndarray]
+            Query timestamps, e.g. the timestamps of another stream to align to.
+
+        Returns
+        -------
+        MetadataBatch
+            One row per query timestamp, holding the nearest instance of this stream.
+
+        Notes
+        -----
+        Uses the same tie-breaking as ``_find_nearest_timestamp_index``: on equal
+        distance the next instance is chosen.
+        """
+
+        stream_timestamps = self._timestamps_array()
+        queries = np.asarray(timestamps, dtype=np.float64).reshape(-1)
+
+        next_indices = np.searchsorted(stream_timestamps, queries)
+        previous_indices = np.maximum(next_indices - 1, 0)
+        next_indices = np.minimum(next_indices, len(stream_timestamps) - 1)
+
+        previous_diff = queries - stream_timestamps[previous_indices]
+        next_diff = stream_timestamps[next_indices] - queries
+        indices = np.where(previous_diff < next_diff, previous_indices, next_indices)
+
+        return MetadataBatch.from_arrays(indices, stream_timestamps[indices])
+
 
     def get_previous_instance_metadata(self, timestamp : float) -> BaseMetadata:
         """Get metadata for the instance immediately before the specified timestamp.
@@ -350,6 +485,9 @@ class DataStream(BaseModel):
         """
         return len(self.timestamps) == 0
 
+    def _timestamps_array(self) -> np.ndarray:
+        """Timestamps as a float64 array, used by the batch metadata APIs."""
+        return np.asarray(self.timestamps, dtype=np.float64)
 
 
 
@@ -0,0 +1,238 @@
+"""On-disk cache of decoded image frames as one memory-mapped uint8 array."""
+
+import hashlib
+import json
+import os
+from typing import Any, List, Optional, Union
+
+import numpy as np
+
+from data_models.core.base_metadata import BaseMetadata
+from data_models.core.construct import construct_unchecked
+from data_models.impl.image_instance import ImageInstance
+
+from data_streams.core.data_stream import DataStream
+
+# Frames decoded per source.get_instances call when filling the cache
+_FILL_BATCH_SIZE = 64
+
+
+def bag_fingerprint(path: str) -> List[Any]:
+    """Identify the current contents of a bag by file names, sizes and modification times.
+
+    Parameters
+    ----------
+    path : str
+        rosbag2 directory or single ``.mcap`` file.
+
+    Returns
+    -------
+    List[Any]
+        JSON-serializable description; changes whenever the bag is rewritten.
+    """
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path))
+    else:
+        files = [path]
+    fingerprint: List[Any] = [path]
+    for file in files:
+        stat = os.stat(file)
+        fingerprint.append([os.path.basename(file), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def frame_cache_key(*parts: Any) -> str:
+    """Stable cache key from JSON-serializable parts (bag fingerprint, topic, decode options, ...)."""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:24]
+
+
+class FrameCacheStream(DataStream):
+    """Serve an image stream from a memory-mapped file, decoding each frame at most once.
+
+    Frames are written on first access into ``<key>.frames.npy`` (shape
+    ``(N, *frame_shape)``, created sparse) and flagged in ``<key>.filled.npy``;
+    timestamps are kept in ``<key>.timestamps.npy``. Later reads, in this or
+    any later run, return ``ImageInstance`` whose ``data`` is a zero-copy
+    ``np.memmap`` slice and never touch the source stream.
+
+    Attributes
+    ----------
+    source : DataStream
+        Stream producing ``ImageInstance`` with uint8 frames of a fixed shape.
+    cache_dir : str
+        Directory holding the cache files.
+    key : str
+        Cache file prefix, e.g. from ``frame_cache_key`` over bag, topic and
+        decode options.
+    """
+
+    source : DataStream
+    cache_dir : str
+    key : str
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def __init__(self, **data: Any) -> None:
+        super().__init__(**data)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Pydantic v1 blocks unknown attrs; bypass for the lazily opened arrays.
+        object.__setattr__(self, "_timestamps", None)
+        object.__setattr__(self, "_frames", None)
+        object.__setattr__(self, "_filled", None)
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{self.key}.{suffix}.npy")
+
+    @property
+    def timestamps(self) -> List[float]:
+        timestamps = object.__getattribute__(self, "_timestamps")
+        if timestamps is None:
+            path = self._path("timestamps")
+            if os.path.exists(path):
+                timestamps = np.load(path).tolist()
+            else:
+                timestamps = list(self.source.timestamps)
+                np.save(path, np.asarray(timestamps, dtype=np.float64))
+            object.__setattr__(self, "_timestamps", timestamps)
+        return timestamps
+
+    @property
+    def num_cached(self) -> int:
+        """Number of frames already on disk."""
+        self._open(None)
+        filled = object.__getattribute__(self, "_filled")
+        return 0 if filled is None else int(np.count_nonzero(filled))
+
+    def _remove_files(self) -> None:
+        for suffix in ("frames", "filled"):
+            path = self._path(suffix)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _check_frame(self, frame: np.ndarray, idx: int) -> None:
+        frames = object.__getattribute__(self, "_frames")
+        shape = frame.shape if frames is None else frames.shape[1:]
+        if frame.dtype != np.uint8 or frame.shape != shape:
+            raise ValueError(
+                f"Frame cache {self.key} stores uint8 frames of shape {shape}, "
+                f"got {frame.dtype} {frame.shape} at index {idx}"
+            )
+
+    def _open(self, frame: Optional[np.ndarray], idx: int = 0) -> None:
+        """Map existing cache files, or create them sized for frames like ``frame``."""
+        if object.__getattribute__(self, "_frames") is not None:
+            return
+        frames_path, filled_path = self._path("frames"), self._path("filled")
+        if os.path.exists(frames_path) and os.path.exists(filled_path):
+            frames = np.load(frames_path, mmap_mode="r+")
+            filled = np.load(filled_path, mmap_mode="r+")
+            if frames.dtype == np.uint8 and frames.ndim >= 2 and len(frames) == len(self) and filled.shape == (len(self),):
+                object.__setattr__(self, "_frames", frames)
+                object.__setattr__(self, "_filled", filled)
+                return
+            # Left behind by an interrupted or incompatible run: start over
+            del frames, filled
+            self._remove_files()
+        if frame is None:
+            return
+        # Validate before creating anything, so a bad first frame leaves no cache file behind
+        self._check_frame(frame, idx)
+        num_frames = len(self)
+        try:
+            frames = np.lib.format.open_memmap(
+                frames_path, mode="w+", dtype=np.uint8, shape=(num_frames,) + frame.shape
+            )
+            filled = np.lib.format.open_memmap(filled_path, mode="w+", dtype=np.uint8, shape=(num_frames,))
+        except BaseException:
+            self._remove_files()
+            raise
+        object.__setattr__(self, "_frames", frames)
+        object.__setattr__(self, "_filled", filled)
+
+    def _store(self, idx: int, frame: np.ndarray) -> None:
+        """Write a decoded frame into the cache, creating the cache files on the first one."""
+        frame = np.asarray(frame)
+        self._open(frame, idx)
+        self._check_frame(frame, idx)
+        object.__getattribute__(self, "_frames")[idx] = frame
+        object.__getattribute__(self, "_filled")[idx] = 1
+
+    def _is_cached(self, idx: int) -> bool:
+        filled = object.__getattribute__(self, "_filled")
+        return filled is not None and bool(filled[idx])
+
+    def _cached_instance(self, idx: int, timestamp: float) -> ImageInstance:
+        return construct_unchecked(
+            ImageInstance,
+            data=object.__getattribute__(self, "_frames")[idx],
+            metadata=construct_unchecked(BaseMetadata, timestamp=timestamp, index=idx),
+        )
+
+    def make_instance(self, instance_metadata: BaseMetadata) -> ImageInstance:
+        """Return the cached frame, decoding it from ``source`` on first access.
+
+        Parameters
+        ----------
+        instance_metadata : BaseMetadata
+            Index and timestamp of the frame.
+
+        Returns
+        -------
+        ImageInstance
+            ``data`` is a read-write view into the memory-mapped cache; copy it
+            before modifying.
+
+        Raises
+        ------
+        ValueError
+            If the source yields a frame that is not uint8 or whose shape differs
+            from the first cached frame. No cache file is created for a bad
+            first frame.
+        """
+        idx = instance_metadata.index
+        self._open(None)
+        if not self._is_cached(idx):
+            self._store(idx, self.source.make_instance(instance_metadata).data)
+        return self._cached_instance(idx, instance_metadata.timestamp)
+
+    def get_instances(self, indices: Union[List[int], np.ndarray], **kwargs: Any) -> List[ImageInstance]:
+        """Get several frames, batch-decoding the uncached ones with ``source.get_instances``.
+
+        Parameters
+        ----------
+        indices : Union[List[int], np.ndarray]
+            Indices to retrieve. Negative indices are supported and count from the end.
+        **kwargs : Any
+            Passed to ``source.get_instances`` (e.g. ``max_workers``).
+
+        Returns
+        -------
+        List[ImageInstance]
+            Memory-mapped frames in the order of ``indices``.
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        indices = np.where(indices < 0, indices + len(self), indices)
+        self._open(None)
+        missing = [idx for idx in np.unique(indices).tolist() if not self._is_cached(idx)]
+        # Decode in bounded batches so only one batch of source frames is held at a time
+        for start in range(0, len(missing), _FILL_BATCH_SIZE):
+            batch = missing[start:start + _FILL_BATCH_SIZE]
+            for idx, instance in zip(batch, self.source.get_instances(batch, **kwargs)):
+                self._store(idx, instance.data)
+        timestamps = self.timestamps
+        return [self._cached_instance(idx, timestamps[idx]) for idx in indices.tolist()]
+
+    def fill(self, **kwargs: Any) -> None:
+        """Decode every frame not cached yet, in batches (``get_instances``), and flush the cache to disk."""
+        self._open(None)
+        self.get_instances([idx for idx in range(len(self)) if not self._is_cached(idx)], **kwargs)
+        self.flush()
+
+    def flush(self) -> None:
+        """Write dirty cache pages to disk."""
+        for name in ("_frames", "_filled"):
+            array = object.__getattribute__(self, name)
+            if array is not None:
+                array.flush()
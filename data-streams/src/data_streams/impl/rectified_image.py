@@ -0,0 +1,47 @@
+"""Rectify the frames of an image stream whose decoding does not go through ``decode_fn``."""
+
+from typing import Any, List, Union
+
+import numpy as np
+
+from data_models.core.base_metadata import BaseMetadata
+from data_models.impl.image_instance import ImageInstance
+
+from data_streams.core.data_stream import DataStream
+
+from ros_python_conversions.ros2.camera_info import ImageRectifier
+
+
+class RectifiedImageStream(DataStream):
+    """Image stream wrapper applying an ``ImageRectifier`` to every instance.
+
+    Used for streams with their own ``make_instance`` (e.g.
+    ``Ros2FfmpegPacketStream``); ``Ros2DataStream`` image topics rectify inside
+    ``decode_fn`` instead (``RectifyingImageDecoder``) so batch decode workers
+    remap concurrently.
+
+    Attributes
+    ----------
+    source : DataStream
+        Stream of BGR or gray ``ImageInstance``.
+    rectifier : ImageRectifier
+        Calibration and cached remap tables.
+    """
+
+    source : DataStream
+    rectifier : ImageRectifier
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def timestamps(self) -> List[float]:
+        return self.source.timestamps
+
+    def make_instance(self, instance_metadata: BaseMetadata) -> ImageInstance:
+        return self.rectifier(self.source.make_instance(instance_metadata))
+
+    def get_instances(self, indices: Union[List[int], np.ndarray], **kwargs: Any) -> List[ImageInstance]:
+        # Instances of a batch are alive together: never rectify them into a shared buffer
+        rectifier = self.rectifier.without_buffer_reuse() if self.rectifier.reuse_buffer else self.rectifier
+        return [rectifier(instance) for instance in self.source.get_instances(indices, **kwargs)]
@@ -9,7 +9,16 @@ from rosbags.typesys import Stores, get_typestore, get_types_from_msg
 from rosbags.typesys.store import Typestore
 from rclpy.time import Time
 
-from typing import Callable, Optional, Any, List, Tuple
+import bisect
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Generator, Iterator, Optional, Any, List, Tuple, Union
+
+import numpy as np
+
+# Batch reads restart the bag reader instead of skipping over more messages than this
+_MAX_SKIPPED_MESSAGES = 64
 
 class Ros2DataStream(DataStream):
 
@@ -34,9 +43,10 @@ class Ros2DataStream(DataStream):
         super().__init__(**data)
         self = __pydantic_self__
 
+        # A reader passed in (e.g. shared with another stream) is already open
         if self.loaded_ros2_mcap_reader is None:
             self.loaded_ros2_mcap_reader = Reader(self.ros2_mcap_path)
-        self.loaded_ros2_mcap_reader.open()
+            self.loaded_ros2_mcap_reader.open()
 
         self.connections = [
             x for x in self.loaded_ros2_mcap_reader.connections if x.topic == self.topic
@@ -109,17 +119,165 @@ class Ros2DataStream(DataStream):
         # Convert to nanoseconds
         timestamp_ns = int(start_time * 1e9)
 
-        # Query message from MCAP reader
-        conn, ts, data = next(self.loaded_ros2_mcap_reader.messages(
+        # Query message from MCAP reader, skipping earlier messages with the same bag time
+        messages = self.loaded_ros2_mcap_reader.messages(
             connections=[self.connection],
             start=timestamp_ns
-        ))
+        )
+        raw_timestamp = self.raw_timestamps_[instance_metadata.index]
+        for _ in range(instance_metadata.index - bisect.bisect_left(self.raw_timestamps_, raw_timestamp)):
+            next(messages)
+        conn, ts, data = next(messages)
 
         # Deserialize message
         message = self.typestore.deserialize_cdr(data, conn.msgtype)
 
         return conn, message, ts
 
+    def iterate_raw_messages(self, indices : Union[List[int], np.ndarray]) -> Iterator[Tuple[int, Any, int, bytes]]:
+        """Read the serialized messages at several indices in one sequential pass.
+
+        Parameters
+        ----------
+        indices : Union[List[int], np.ndarray]
+            Message indices; read in ascending order, duplicates once.
+
+        Yields
+        ------
+        Tuple[int, Any, int, bytes]
+            Index, connection, bag time in nanoseconds and CDR payload.
+
+        Notes
+        -----
+        Nearby indices share one reader pass; the reader is only restarted
+        (``start=`` the next raw timestamp) across gaps of more than
+        ``_MAX_SKIPPED_MESSAGES`` messages.
+        """
+        indices = np.unique(np.asarray(indices, dtype=np.int64))
+        if self.connection is None or len(indices) == 0:
+            return
+        self.timestamps  # scans the bag once to fill raw_timestamps_
+        raw_timestamps = self.raw_timestamps_
+        pos = 0
+        while pos < len(indices):
+            first = int(indices[pos])
+            # The reader also returns messages sharing the first one's bag time
+            index = bisect.bisect_left(raw_timestamps, raw_timestamps[first])
+            start_ns = int((raw_timestamps[first] - 1e-6) * 1e9)
+            restart = False
+            for conn, ts, data in self.loaded_ros2_mcap_reader.messages(connections=[self.connection], start=start_ns):
+                if index == indices[pos]:
+                    yield index, conn, ts, data
+                    pos += 1
+                    if pos == len(indices):
+                        return
+                    restart = indices[pos] - index > _MAX_SKIPPED_MESSAGES
+                    if restart:
+                        break
+                index += 1
+            if not restart:
+                return
+
+    def _batch_decode_fn(self) -> Callable[[Any, int, float], BaseInstance]:
+        """``decode_fn`` for batch reads, whose instances are all alive at once.
+
+        A decode_fn writing every frame into one reused output array
+        (``reuse_buffer``) is replaced by its ``without_buffer_reuse()`` copy, so
+        instances of a batch never alias each other or race across workers.
+        """
+        decode_fn = self.decode_fn
+        if getattr(decode_fn, "reuse_buffer", False):
+            without_buffer_reuse = getattr(decode_fn, "without_buffer_reuse", None)
+            if without_buffer_reuse is None:
+                raise ValueError(f"{type(decode_fn).__name__} reuses its output buffer and cannot be used for batch reads")
+            decode_fn = without_buffer_reuse()
+        return decode_fn
+
+    def _decode_indices(self, indices : np.ndarray, max_workers : Optional[int], max_in_flight : Optional[int]) -> Iterator[BaseInstance]:
+        """Decode sorted unique indices in order with ``decode_fn`` on a thread pool.
+
+        decode_fns declaring ``stateful = True`` (not safe to call from several
+        threads) decode sequentially on the calling thread instead.
+        """
+        if type(self).make_instance is not Ros2DataStream.make_instance:
+            # Subclasses with their own make_instance (e.g. stateful video decode) stay sequential
+            for index in indices:
+                yield self.get_instance(int(index))
+            return
+        decode_fn = self._batch_decode_fn()
+        timestamps = self.timestamps
+        if getattr(decode_fn, "stateful", False):
+            for index, conn, _, data in self.iterate_raw_messages(indices):
+                yield decode_fn(self.typestore.deserialize_cdr(data, conn.msgtype), index, timestamps[index])
+            return
+        max_workers = max_workers or os.cpu_count() or 1
+        max_in_flight = max_in_flight or 2 * max_workers
+        pending : Deque[Any] = deque()
+        # Payloads are read and deserialized here; decode_fn (cv2.imdecode, colour
+        # conversion) releases the GIL and runs concurrently
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, conn, _, data in self.iterate_raw_messages(indices):
+                message = self.typestore.deserialize_cdr(data, conn.msgtype)
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(decode_fn, message, index, timestamps[index]))
+            while pending:
+                yield pending.popleft().result()
+
+    def get_instances(self, indices : Union[List[int], np.ndarray], max_workers : Optional[int] = None, max_in_flight : Optional[int] = None) -> List[BaseInstance]:
+        """Get the instances at several indices, decoding them concurrently.
+
+        Parameters
+        ----------
+        indices : Union[List[int], np.ndarray]
+            Indices to retrieve. Negative indices are supported and count from the end.
+        max_workers : Optional[int]
+            Decode threads; one per core when None.
+        max_in_flight : Optional[int]
+            Messages read ahead of the oldest undecoded one; ``2 * max_workers``
+            when None. Bounds the memory held by payloads and decoded frames.
+
+        Returns
+        -------
+        List[BaseInstance]
+            Instances in the order of ``indices``; repeated indices share one instance.
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        indices = np.where(indices < 0, indices + len(self), indices)
+        unique = np.unique(indices)
+        decoded = dict(zip(unique.tolist(), self._decode_indices(unique, max_workers, max_in_flight)))
+        return [decoded[index] for index in indices.tolist()]
+
+    def iterate_chunks(self, chunk_size : int = 32, skip_every : int = 1, max_workers : Optional[int] = None, max_in_flight : Optional[int] = None) -> Generator[List[BaseInstance], None, None]:
+        """Iterate in chronological chunks, reading the bag once and decoding on a thread pool.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Maximum number of instances per chunk.
+        skip_every : int
+            Index increment, as in ``iterate``.
+        max_workers : Optional[int]
+            Decode threads; one per core when None.
+        max_in_flight : Optional[int]
+            Read-ahead window, see ``get_instances``. Decoding continues across
+            chunk boundaries.
+
+        Yields
+        -------
+        List[BaseInstance]
+            Consecutive instances; the last chunk may be shorter.
+        """
+        indices = np.arange(0, len(self), skip_every, dtype=np.int64)
+        chunk : List[BaseInstance] = []
+        for instance in self._decode_indices(indices, max_workers, max_in_flight):
+            chunk.append(instance)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
 def make_ros2_data_stream(ros2_mcap_path : str,
                                topic : str,
                                decode_fn : Callable[[Any, int, float], BaseInstance],
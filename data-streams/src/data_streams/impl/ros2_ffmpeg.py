@@ -1,25 +1,84 @@
 """Ros2 bag stream for ``ffmpeg_image_transport`` ``FFMPEGPacket`` topics."""
 
-from typing import Any
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
 
 from data_models.core.base_metadata import BaseMetadata
+from data_models.core.construct import construct_unchecked
 from data_models.impl.image_instance import ImageInstance
 
 from data_streams.impl.ros2 import Ros2DataStream
 
-from ros_python_conversions.ros2.ffmpeg_transport import ffmpeg_packets_to_bgr_frames
+from ros_python_conversions.ros2.ffmpeg_transport import (
+    FfmpegPacketDecoder,
+    KeyframeIndex,
+    decode_segments_parallel,
+    ffmpeg_packets_to_bgr_frames,
+    index_keyframes,
+)
+from ros_python_conversions.ros2.image_buffer import ImageDecodeOptions
+from ros_python_conversions.ros2.time import time_to_timestamp
+
+# Packets fed to the incremental decoder from a keyframe before skipping to the next one if no frame came out.
+_PROBE_PACKETS = 32
+
+
+class _DecodeState:
+    """Mutable decoder position and frame cache of a ``Ros2FfmpegPacketStream``."""
+
+    def __init__(self) -> None:
+        self.decoder: Optional[FfmpegPacketDecoder] = None
+        self.packets: Optional[Iterator[Any]] = None
+        # Message index of the next packet fed, where the current run started and frames it emitted
+        self.next_packet = 0
+        self.run_start = 0
+        self.run_frames = 0
+        self.exhausted = False
+        # Keyframe index (filled by the timestamp scan)
+        self.index = KeyframeIndex("h264", np.zeros(1, dtype=np.int64), {})
+        # GOP start -> {frame index -> frame}, least recently used first
+        self.gops: "OrderedDict[int, Dict[int, np.ndarray]]" = OrderedDict()
+        # Keyframes from which nothing decoded (stream starting mid-GOP, corrupt packets)
+        self.undecodable: Set[int] = set()
+        self.last_frame: Optional[np.ndarray] = None
+        self.bgr_frames: Optional[List[np.ndarray]] = None
 
 
 class Ros2FfmpegPacketStream(Ros2DataStream):
-    """Decode OAK / low-bandwidth ``FFMPEGPacket`` topics to ``ImageInstance``."""
+    """Decode OAK / low-bandwidth ``FFMPEGPacket`` topics to ``ImageInstance``.
+
+    Attributes
+    ----------
+    max_cached_frames : int
+        Upper bound on decoded frames kept in memory.
+    gop_cache_size : int
+        Number of most recently decoded GOPs (keyframe to keyframe) kept.
+    decoder_threads : int
+        libavcodec frame/slice threads for lazy decoding; 0 picks one per core.
+    decode_options : Optional[ImageDecodeOptions]
+        Output scale and pixel format (e.g. half-size gray); full-size BGR if None.
+    """
+
+    max_cached_frames : int = 64
+    gop_cache_size : int = 2
+    decoder_threads : int = 0
+    decode_options : Optional[ImageDecodeOptions] = None
 
     def __init__(self, **data: Any) -> None:
         super().__init__(**data)
-        # Pydantic v1 blocks unknown attrs; bypass for decode cache.
-        object.__setattr__(self, "_bgr_frames", None)
+        # Pydantic v1 blocks unknown attrs; bypass for decoder state.
+        object.__setattr__(self, "_state", _DecodeState())
+
+    @property
+    def keyframe_indices(self) -> np.ndarray:
+        """Message indices of random-access points (IDR / BLA pictures), always including 0."""
+        self.timestamps
+        return object.__getattribute__(self, "_state").index.keyframes
 
     def make_instance(self, instance_metadata: BaseMetadata) -> ImageInstance:
-        """Return the BGR frame for the given message index.
+        """Return the decoded frame for the given message index.
 
         Parameters
         ----------
@@ -29,27 +88,271 @@ class Ros2FfmpegPacketStream(Ros2DataStream):
         Returns
         -------
         ImageInstance
-            Decoded BGR image.
+            Decoded image, BGR unless ``decode_options`` select otherwise.
 
         Notes
         -----
-        On first call, all packets on the topic are loaded and decoded; later
-        calls are O(1). Random access by index is supported.
+        Packets are decoded lazily. Sequential access (``iterate``) decodes
+        each packet once; random access seeks to the nearest keyframe at or
+        before the index and decodes at most one GOP. Recently decoded GOPs
+        are cached. Each frame is traced to the message it was coded in, so
+        a message whose packet yields no frame returns the previous
+        message's frame (by reference) without shifting later frames. If no
+        frame comes out within the first packets after a keyframe (the topic
+        starts mid-GOP, corrupt packets at a seek point), decoding skips to the
+        next indexed keyframe and the skipped messages reference the nearest
+        decoded frame. Only if the keyframe index found no IDR / BLA picture
+        after the first message, and the incremental decoder yields nothing, are
+        all packets decoded up front with ``ffmpeg_packets_to_bgr_frames``
+        (and kept for the life of the stream).
         """
-        bgr = object.__getattribute__(self, "_bgr_frames")
-        if bgr is None:
-            msgs = []
-            for conn, _ts, raw in self.loaded_ros2_mcap_reader.messages(
+        idx = instance_metadata.index
+        state = object.__getattribute__(self, "_state")
+        if state.bgr_frames is not None:
+            frame = state.bgr_frames[min(idx, len(state.bgr_frames) - 1)]
+        else:
+            frame = self._get_frame(state, idx)
+
+        return construct_unchecked(
+            ImageInstance,
+            data=frame,
+            metadata=construct_unchecked(
+                BaseMetadata, timestamp=instance_metadata.timestamp, index=idx
+            ),
+        )
+
+    def get_timestamps(self) -> Tuple[List[float], List[float]]:
+        """Scan the topic for timestamps and build the keyframe index.
+
+        Returns
+        -------
+        Tuple[List[float], List[float]]
+            Timestamps and raw (bag) timestamps in seconds, as ``Ros2DataStream.get_timestamps``.
+
+        Notes
+        -----
+        Every packet is deserialized once to find IDR / BLA NAL units and the
+        parameter sets in force at each keyframe, so a seek can prepend
+        SPS/PPS that were only sent earlier in the stream.
+        """
+        timestamps: List[float] = []
+        raw_timestamps: List[float] = []
+        state = object.__getattribute__(self, "_state")
+        if self.connection is None or self.connections is None or len(self.connections) == 0:
+            return timestamps, raw_timestamps
+
+        def messages() -> Iterator[Any]:
+            for conn, raw_timestamp, data in self.loaded_ros2_mcap_reader.messages(
                 connections=[self.connection]
             ):
-                msgs.append(self.typestore.deserialize_cdr(raw, conn.msgtype))
-            bgr = ffmpeg_packets_to_bgr_frames(msgs)
-            object.__setattr__(self, "_bgr_frames", bgr)
+                msg = self.typestore.deserialize_cdr(data, conn.msgtype)
+                raw_timestamp = raw_timestamp * 1e-9
+                if self.use_header_timestamps:
+                    timestamp = time_to_timestamp(msg.header.stamp)
+                else:
+                    timestamp = raw_timestamp
+                timestamps.append(timestamp)
+                raw_timestamps.append(raw_timestamp)
+                yield msg
 
-        idx = instance_metadata.index
-        return ImageInstance(
-            data=bgr[idx],
-            metadata=BaseMetadata(
-                timestamp=instance_metadata.timestamp, index=idx
-            ),
+        state.index = index_keyframes(messages())
+        return timestamps, raw_timestamps
+
+    def decode_all(self, max_workers: Optional[int] = None) -> None:
+        """Decode every frame of the topic now, GOPs in parallel, and keep them all.
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            Worker threads, one per CPU by default.
+
+        Notes
+        -----
+        Later ``make_instance`` calls are plain lookups. Memory grows with the
+        topic length (``max_cached_frames`` no longer applies); prefer lazy
+        decoding for long recordings.
+        """
+        self.timestamps
+        state = object.__getattribute__(self, "_state")
+        msgs = [
+            self.typestore.deserialize_cdr(raw, conn.msgtype)
+            for conn, _ts, raw in self.loaded_ros2_mcap_reader.messages(connections=[self.connection])
+        ]
+        frames = decode_segments_parallel(
+            msgs, state.index, max_workers=max_workers, options=self.decode_options
+        )
+        if frames is None:
+            self._decode_all(state)
+            return
+        state.bgr_frames = frames
+        state.decoder = None
+        state.packets = None
+        state.gops.clear()
+
+    def _get_frame(self, state: _DecodeState, idx: int) -> np.ndarray:
+        """Return the frame coded in message ``idx``, from the GOP cache or by decoding up to it."""
+        keyframes = self.keyframe_indices
+        gop_start = int(keyframes[np.searchsorted(keyframes, idx, side="right") - 1])
+
+        frame = self._cached_frame(state, gop_start, idx)
+        if frame is not None:
+            return frame
+
+        # Keep decoding forward if idx's GOP has started and its frame can still come out.
+        seeked = False
+        if gop_start not in state.undecodable and not (
+            state.decoder is not None
+            and state.run_start <= gop_start <= state.next_packet <= idx + state.decoder.max_delay
+        ):
+            self._seek(state, gop_start)
+            seeked = True
+
+        while gop_start not in state.undecodable:
+            while (
+                state.next_packet <= idx + state.decoder.max_delay
+                and not state.exhausted
+                and gop_start not in state.undecodable
+            ):
+                self._decode_next(state)
+                if state.bgr_frames is not None:
+                    return state.bgr_frames[min(idx, len(state.bgr_frames) - 1)]
+                frame = self._cached_frame(state, gop_start, idx)
+                if frame is not None:
+                    return frame
+            # The frame may have been evicted before it was asked for; decode its GOP again.
+            gop = state.gops.get(gop_start)
+            if seeked or (gop is not None and gop_start in gop):
+                break
+            self._seek(state, gop_start)
+            seeked = True
+
+        return self._reference_frame(state, gop_start, idx)
+
+    def _reference_frame(self, state: _DecodeState, gop_start: int, idx: int) -> np.ndarray:
+        """Return the nearest decoded frame for message ``idx``, in which no frame was coded."""
+        # Dropped or corrupt packet: reference the previous frame of the GOP.
+        gop = state.gops.get(gop_start, {})
+        earlier = [i for i in gop if i < idx]
+        if earlier:
+            return gop[max(earlier)]
+        if state.last_frame is None:
+            # Nothing decoded yet (e.g. the topic starts mid-GOP): decode from the nearest usable keyframe,
+            # following ones first.
+            keyframes = state.index.keyframes
+            candidates = [int(k) for k in keyframes[keyframes > gop_start]]
+            candidates += [int(k) for k in keyframes[keyframes < gop_start][::-1]]
+            for keyframe in candidates:
+                if state.last_frame is not None or state.bgr_frames is not None:
+                    break
+                if keyframe in state.undecodable:
+                    continue
+                self._seek(state, keyframe)
+                while state.last_frame is None and state.bgr_frames is None and not state.exhausted:
+                    self._decode_next(state)
+            if state.bgr_frames is not None:
+                return state.bgr_frames[min(idx, len(state.bgr_frames) - 1)]
+        if state.last_frame is None:
+            raise ValueError(f"Could not decode any frame on topic {self.topic}")
+        return state.last_frame
+
+    def _cached_frame(self, state: _DecodeState, gop_start: int, idx: int) -> Optional[np.ndarray]:
+        gop = state.gops.get(gop_start)
+        if gop is None:
+            return None
+        state.gops.move_to_end(gop_start)
+        return gop.get(idx)
+
+    def _seek(self, state: _DecodeState, keyframe: int) -> None:
+        """Restart decoding with a fresh codec context at message ``keyframe``."""
+        self.timestamps
+        raw_timestamps = self.raw_timestamps_
+        # Messages sharing the keyframe's bag time but preceding it must be skipped
+        first_same_time = int(np.searchsorted(raw_timestamps, raw_timestamps[keyframe], side="left"))
+        start_ns = int((raw_timestamps[keyframe] - 1e-6) * 1e9)
+        messages = self.loaded_ros2_mcap_reader.messages(connections=[self.connection], start=start_ns)
+        for _ in range(keyframe - first_same_time):
+            next(messages, None)
+
+        state.packets = (
+            self.typestore.deserialize_cdr(raw, conn.msgtype) for conn, _ts, raw in messages
+        )
+        state.decoder = FfmpegPacketDecoder(
+            state.index.codec_name, thread_count=self.decoder_threads, options=self.decode_options
+        )
+        state.next_packet = keyframe
+        state.run_start = keyframe
+        state.run_frames = 0
+        state.exhausted = False
+
+    def _decode_next(self, state: _DecodeState) -> None:
+        """Feed the next packet (or the end-of-stream flush) to the decoder."""
+        msg = next(state.packets, None)
+        if msg is None:
+            frames = state.decoder.flush()
+            state.exhausted = True
+        else:
+            header = b""
+            if state.next_packet == state.run_start:
+                header = state.index.headers.get(state.run_start, b"")
+            frames = state.decoder.decode(msg, index=state.next_packet, header=header)
+            state.next_packet += 1
+
+        for index, frame in frames:
+            if index is not None:
+                self._push_frame(state, index, frame)
+
+        if state.run_frames == 0 and (state.next_packet - state.run_start >= _PROBE_PACKETS or msg is None):
+            self._skip_undecodable_run(state)
+
+    def _skip_undecodable_run(self, state: _DecodeState) -> None:
+        """Move past the keyframes of a run that decoded nothing, to the next indexed keyframe."""
+        keyframes = state.index.keyframes
+        if len(keyframes) == 1:
+            # No IDR / BLA to restart from: the incremental decoder cannot handle this bitstream.
+            self._decode_all(state)
+            return
+        fed = (keyframes >= state.run_start) & (keyframes < state.next_packet)
+        state.undecodable.update(int(k) for k in keyframes[fed])
+        later = keyframes[keyframes >= state.next_packet]
+        if len(later) > 0 and not state.exhausted:
+            self._seek(state, int(later[0]))
+        else:
+            state.exhausted = True
+
+    def _push_frame(self, state: _DecodeState, idx: int, frame: np.ndarray) -> None:
+        """Cache the frame of message ``idx`` in its GOP, evicting least recently used GOPs."""
+        keyframes = state.index.keyframes
+        gop_start = int(keyframes[np.searchsorted(keyframes, idx, side="right") - 1])
+
+        gop = state.gops.get(gop_start)
+        if gop is None:
+            gop = state.gops[gop_start] = {}
+        state.gops.move_to_end(gop_start)
+        gop[idx] = frame
+
+        num_cached = sum(len(g) for g in state.gops.values())
+        while len(state.gops) > 1 and (len(state.gops) > self.gop_cache_size or num_cached > self.max_cached_frames):
+            num_cached -= len(state.gops.popitem(last=False)[1])
+        # A single GOP longer than the frame budget keeps only its newest frames
+        while num_cached > self.max_cached_frames:
+            del gop[next(iter(gop))]
+            num_cached -= 1
+
+        state.run_frames += 1
+        state.last_frame = frame
+
+    def _decode_all(self, state: _DecodeState) -> None:
+        """Fallback for streams without an indexed IDR: decode the whole topic at once, trying all bitstream layouts."""
+        msgs: List[Any] = []
+        for conn, _ts, raw in self.loaded_ros2_mcap_reader.messages(
+            connections=[self.connection]
+        ):
+            msgs.append(self.typestore.deserialize_cdr(raw, conn.msgtype))
+        state.bgr_frames = ffmpeg_packets_to_bgr_frames(
+            msgs,
+            cache_key=(self.ros2_mcap_path, self.topic, self.connection.id),
+            options=self.decode_options,
         )
+        state.decoder = None
+        state.packets = None
+        state.gops.clear()
@@ -1,15 +1,35 @@
+from typing import Optional
+
+from data_streams.core.data_stream import DataStream
+from data_streams.impl.frame_cache import FrameCacheStream, bag_fingerprint, frame_cache_key
+from data_streams.impl.rectified_image import RectifiedImageStream
 from data_streams.impl.ros2 import Ros2DataStream, make_ros2_data_stream
 from data_streams.impl.ros2_ffmpeg import Ros2FfmpegPacketStream
+from ros_python_conversions.ros2.camera_info import (
+    ImageRectifier,
+    RectifyingImageDecoder,
+    camera_info_msg_to_camera_info_instance,
+)
 from ros_python_conversions.ros2.ffmpeg_transport import is_ffmpeg_packet_msgtype
-from ros_python_conversions.ros2.depth_image import any_depth_image_msg_to_image_instance
-from ros_python_conversions.ros2.raw_rgb_image import any_image_msg_to_image_instance
+from ros_python_conversions.ros2.depth_image import (
+    DepthConversionOptions,
+    DepthImageDecoder,
+    any_depth_image_msg_to_image_instance,
+)
+from ros_python_conversions.ros2.image_buffer import ImageDecodeOptions
+from ros_python_conversions.ros2.raw_rgb_image import ImageDecoder, any_image_msg_to_image_instance
 
 
 def make_rgb_image_stream(
     ros2_mcap_path: str,
     topic_name: str,
     use_header_timestamps: bool = True,
-):
+    decode_options: Optional[ImageDecodeOptions] = None,
+    frame_cache_dir: Optional[str] = None,
+    camera_info_topic: Optional[str] = None,
+    reuse_buffer: bool = False,
+    writable: bool = False,
+) -> DataStream:
     """Open an RGB image stream (raw, compressed, or FFMPEGPacket transport).
 
     Parameters
@@ -20,45 +40,171 @@ def make_rgb_image_stream(
         Image topic.
     use_header_timestamps : bool, optional
         Use message header time when True.
+    decode_options : ImageDecodeOptions, optional
+        Reduced output size and gray / yuv420p output, applied inside the
+        decoder (``IMREAD_REDUCED_*`` for compressed images, the ``sws_scale``
+        pass for video); full-size BGR when None.
+    frame_cache_dir : str, optional
+        Keep decoded frames in a memory-mapped file under this directory,
+        keyed by bag contents, topic, timestamps source and decode options;
+        frames are decoded once and later reads (also in later runs) are
+        zero-copy ``np.memmap`` slices.
+    camera_info_topic : str, optional
+        ``sensor_msgs/CameraInfo`` topic; frames are then undistorted and
+        rectified with one ``cv2.remap`` using remap tables cached per
+        calibration and size (the first calibration message is used). For raw
+        and compressed topics this runs inside ``decode_fn``, i.e. in the
+        batch decode workers.
+    reuse_buffer : bool, optional
+        With ``camera_info_topic``, rectify every frame into one output
+        array; instances are then only valid until the next frame is read.
+        Only single-frame reads (``get_instance``, ``iterate``) reuse the
+        array; batch reads (``get_instances``, ``iterate_chunks``) return
+        independent frames.
+    writable : bool, optional
+        Return frames that can be modified in place. Raw ``bgr8`` / ``mono8``
+        frames are otherwise zero-copy, read-only views of the message buffer;
+        with this set they are copied. Other encodings and transports already
+        decode into fresh arrays.
 
     Returns
     -------
-    Ros2DataStream
+    DataStream
         ``Ros2FfmpegPacketStream`` for ``ffmpeg_image_transport`` / OAK
-        low-bandwidth topics; otherwise standard ``Ros2DataStream``.
+        low-bandwidth topics (in a ``RectifiedImageStream`` when rectifying);
+        otherwise standard ``Ros2DataStream``. Wrapped in a
+        ``FrameCacheStream`` when ``frame_cache_dir`` is set.
+
+    Raises
+    ------
+    ValueError
+        If rectification is requested for planar ``yuv420p`` output, the
+        camera info topic is empty, or ``writable`` is combined with
+        ``frame_cache_dir`` (cached frames are slices of the shared cache file).
     """
+    if writable and frame_cache_dir is not None:
+        raise ValueError("writable frames would write through to the frame cache; copy cached frames instead")
+    decode_fn = any_image_msg_to_image_instance
+    if decode_options is not None or writable:
+        decode_fn = ImageDecoder(options=decode_options or ImageDecodeOptions(), writable=writable)
+    rectifier = None
+    if camera_info_topic is not None:
+        if decode_options is not None and decode_options.pixel_format == "yuv420p":
+            raise ValueError("Rectification needs bgr or gray output, not planar yuv420p")
+        camera_info_stream = make_camera_info_stream(ros2_mcap_path, camera_info_topic, use_header_timestamps)
+        if len(camera_info_stream) == 0:
+            raise ValueError(f"No CameraInfo messages on {camera_info_topic}")
+        rectifier = ImageRectifier(camera_info=camera_info_stream.get_instance(0), reuse_buffer=reuse_buffer)
+        decode_fn = RectifyingImageDecoder(decode_fn=decode_fn, rectifier=rectifier)
     base = make_ros2_data_stream(
         ros2_mcap_path=ros2_mcap_path,
         topic=topic_name,
-        decode_fn=any_image_msg_to_image_instance,
+        decode_fn=decode_fn,
         interpolable=False,
         use_header_timestamps=use_header_timestamps,
     )
+    stream = base
     if base.connection is not None and is_ffmpeg_packet_msgtype(base.connection.msgtype):
-        return Ros2FfmpegPacketStream(
+        stream = Ros2FfmpegPacketStream(
             ros2_mcap_path=ros2_mcap_path,
             loaded_ros2_mcap_reader=base.loaded_ros2_mcap_reader,
             decode_fn=base.decode_fn,
             topic=topic_name,
             interpolable=False,
             use_header_timestamps=use_header_timestamps,
+            decode_options=decode_options,
         )
-    return base
+        if rectifier is not None:
+            # Frames come from the video decoder, not decode_fn
+            stream = RectifiedImageStream(source=stream, rectifier=rectifier)
+    if frame_cache_dir is None:
+        return stream
+    key = frame_cache_key(
+        bag_fingerprint(ros2_mcap_path),
+        topic_name,
+        use_header_timestamps,
+        decode_options.dict() if decode_options is not None else None,
+        camera_info_topic,
+    )
+    return FrameCacheStream(source=stream, cache_dir=frame_cache_dir, key=key)
 
 
-# TODO: camera info streams
+def make_camera_info_stream(
+    ros2_mcap_path: str,
+    topic_name: str,
+    use_header_timestamps: bool = True,
+) -> Ros2DataStream:
+    """Open a ``sensor_msgs/CameraInfo`` stream.
+
+    Parameters
+    ----------
+    ros2_mcap_path : str
+        Path to rosbag2 (directory or ``.mcap``).
+    topic_name : str
+        Camera info topic.
+    use_header_timestamps : bool, optional
+        Use message header time when True.
+
+    Returns
+    -------
+    Ros2DataStream
+        Stream of ``CameraInfoInstance``.
+    """
+    return make_ros2_data_stream(
+        ros2_mcap_path=ros2_mcap_path,
+        topic=topic_name,
+        decode_fn=camera_info_msg_to_camera_info_instance,
+        interpolable=False,
+        use_header_timestamps=use_header_timestamps,
+    )
 
 
 def make_depth_image_stream(
     ros2_mcap_path: str,
     topic_name: str,
     use_header_timestamps: bool = True,
+    depth_options: Optional[DepthConversionOptions] = None,
+    reuse_buffer: bool = False,
+    writable: bool = False,
 ) -> Ros2DataStream:
-    """Open a depth image stream (``sensor_msgs/Image``)."""
+    """Open a depth image stream (``sensor_msgs/Image``).
+
+    Parameters
+    ----------
+    ros2_mcap_path : str
+        Path to rosbag2 (directory or ``.mcap``).
+    topic_name : str
+        Depth image topic.
+    use_header_timestamps : bool, optional
+        Use message header time when True.
+    depth_options : DepthConversionOptions, optional
+        Output dtype (float32 / float16 / uint16 mm) and validity masking;
+        float32 meters without masking when None.
+    reuse_buffer : bool, optional
+        Decode every frame into one output array; instances are then only
+        valid until the next frame is read. Only single-frame reads
+        (``get_instance``, ``iterate``) reuse the array; batch reads
+        (``get_instances``, ``iterate_chunks``) return independent frames.
+    writable : bool, optional
+        Copy depth frames that would otherwise be read-only views of the
+        message buffer (``32FC1`` / ``16UC1`` needing no conversion).
+
+    Returns
+    -------
+    Ros2DataStream
+        Stream of ``DepthImageInstance``.
+    """
+    decode_fn = any_depth_image_msg_to_image_instance
+    if depth_options is not None or reuse_buffer or writable:
+        decode_fn = DepthImageDecoder(
+            options=depth_options or DepthConversionOptions(),
+            reuse_buffer=reuse_buffer,
+            writable=writable,
+        )
     return make_ros2_data_stream(
         ros2_mcap_path=ros2_mcap_path,
         topic=topic_name,
-        decode_fn=any_depth_image_msg_to_image_instance,
+        decode_fn=decode_fn,
         interpolable=False,
         use_header_timestamps=use_header_timestamps,
     )
@@ -0,0 +1,166 @@
+"""Vectorized depth image to point cloud projection with cached per-pixel ray grids."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, validator
+
+from data_models.impl.camera_info_instance import CameraInfoInstance
+from data_models.impl.depth_image_instance import DepthImageInstance
+from data_models.impl.image_instance import ImageInstance
+from data_models.impl.transforms import Transform3D
+
+# Ray grids per (intrinsics, image size, stride, roi, ray kind)
+_MAX_CACHED_GRIDS = 16
+_ray_grids: "OrderedDict[Tuple[Any, ...], np.ndarray]" = OrderedDict()
+_ray_grids_lock = threading.Lock()
+
+
+def get_ray_grid(
+    K: np.ndarray,
+    width: int,
+    height: int,
+    stride: int = 1,
+    roi: Optional[Tuple[int, int, int, int]] = None,
+    unit_norm: bool = False,
+) -> np.ndarray:
+    """Per-pixel viewing rays of a pinhole camera, cached per intrinsics and sampling.
+
+    Parameters
+    ----------
+    K : np.ndarray
+        ``(3, 3)`` intrinsic matrix for images of ``width x height``.
+    width : int
+        Image width in pixels.
+    height : int
+        Image height in pixels.
+    stride : int
+        Take every ``stride``-th pixel in both directions.
+    roi : Tuple[int, int, int, int], optional
+        ``(x, y, w, h)`` pixel window; the whole image when None.
+    unit_norm : bool
+        Unit-length rays (for range images) instead of rays with ``z = 1``
+        (for z-depth images, the ROS ``sensor_msgs/Image`` depth convention).
+
+    Returns
+    -------
+    np.ndarray
+        Read-only float32 ``(h', w', 3)`` rays in the camera optical frame
+        (x right, y down, z forward), aligned with
+        ``depth[y:y + h:stride, x:x + w:stride]``.
+    """
+    x0, y0, roi_width, roi_height = roi if roi is not None else (0, 0, width, height)
+    key = (np.asarray(K, dtype=np.float64).tobytes(), width, height, stride, (x0, y0, roi_width, roi_height), unit_norm)
+    with _ray_grids_lock:
+        rays = _ray_grids.get(key)
+        if rays is not None:
+            _ray_grids.move_to_end(key)
+            return rays
+
+    u = np.arange(x0, min(x0 + roi_width, width), stride, dtype=np.float64)
+    v = np.arange(y0, min(y0 + roi_height, height), stride, dtype=np.float64)
+    rays = np.empty((len(v), len(u), 3), dtype=np.float64)
+    rays[..., 0] = ((u - K[0, 2]) / K[0, 0])[None, :]
+    rays[..., 1] = ((v - K[1, 2]) / K[1, 1])[:, None]
+    rays[..., 2] = 1.0
+    if unit_norm:
+        rays /= np.linalg.norm(rays, axis=-1, keepdims=True)
+    rays = rays.astype(np.float32)
+    rays.flags.writeable = False
+
+    with _ray_grids_lock:
+        _ray_grids[key] = rays
+        while len(_ray_grids) > _MAX_CACHED_GRIDS:
+            _ray_grids.popitem(last=False)
+    return rays
+
+
+class DepthProjector(BaseModel):
+    """Project depth images to ``N x 3`` point clouds in one vectorized step.
+
+    Attributes
+    ----------
+    camera_info : CameraInfoInstance
+        Calibration of the (registered, undistorted) depth camera; rescaled
+        for depth images of another size.
+    stride : int
+        Pixel subsampling step in both directions.
+    roi : Tuple[int, int, int, int], optional
+        ``(x, y, w, h)`` pixel window to project; the whole image when None.
+    min_depth : float
+        Depths at or below this (meters) are dropped; this also drops the 0
+        used by integer depth for missing measurements.
+    max_depth : float, optional
+        Depths above this (meters) are dropped.
+    unit_norm : bool
+        Treat pixel values as range along the ray instead of z-depth.
+    """
+
+    camera_info : CameraInfoInstance
+    stride : int = 1
+    roi : Optional[Tuple[int, int, int, int]] = None
+    min_depth : float = 0.0
+    max_depth : Optional[float] = None
+    unit_norm : bool = False
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @validator("stride")
+    def _check_stride(cls, value: int) -> int:
+        if value < 1:
+            raise ValueError("stride must be >= 1")
+        return value
+
+    def sample_depth(self, depth: ImageInstance) -> np.ndarray:
+        """Subsampled float32 depth in meters, aligned with ``rays_for``."""
+        data = depth.data
+        x0, y0, roi_width, roi_height = self.roi if self.roi is not None else (0, 0, data.shape[1], data.shape[0])
+        # Subsample before scaling so integer depth is only converted where projected
+        sampled = data[y0:y0 + roi_height:self.stride, x0:x0 + roi_width:self.stride]
+        depth_scale = depth.depth_scale if isinstance(depth, DepthImageInstance) else 1.0
+        if depth_scale == 1.0:
+            return sampled.astype(np.float32, copy=False)
+        return np.multiply(sampled, depth_scale, dtype=np.float32)
+
+    def rays_for(self, width: int, height: int) -> np.ndarray:
+        """Cached ray grid for depth images of ``width x height`` (see ``get_ray_grid``)."""
+        camera_info = self.camera_info.scaled(width, height)
+        return get_ray_grid(camera_info.K, width, height, self.stride, self.roi, self.unit_norm)
+
+    def project(self, depth: ImageInstance, pose: Optional[Transform3D] = None) -> np.ndarray:
+        """Project a depth image to 3D points.
+
+        Parameters
+        ----------
+        depth : ImageInstance
+            ``(H, W)`` depth; a ``DepthImageInstance`` in integer units is scaled
+            by its ``depth_scale``, other data is taken as meters.
+        pose : Transform3D, optional
+            Pose of the camera optical frame in the target (e.g. map) frame;
+            points stay in the camera optical frame when None.
+
+        Returns
+        -------
+        np.ndarray
+            float32 ``(N, 3)`` points of the valid (finite, within
+            ``min_depth`` / ``max_depth``) sampled pixels, in row-major pixel order.
+        """
+        height, width = depth.data.shape[:2]
+        rays = self.rays_for(width, height)
+        sampled = self.sample_depth(depth)
+
+        # NaN compares False, so this also drops invalid float depth
+        valid = sampled > self.min_depth
+        if self.max_depth is not None:
+            valid &= sampled <= self.max_depth
+        valid &= np.isfinite(sampled)
+
+        points = rays[valid] * sampled[valid][:, None]
+        if pose is not None:
+            rotation = pose.rotation.as_matrix().astype(np.float32)
+            points = points @ rotation.T
+            points += np.asarray(pose.translation, dtype=np.float32)
+        return points
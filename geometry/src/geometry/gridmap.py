@@ -1,7 +1,9 @@
+import os
+
 from pydantic import BaseModel
 from typing import Optional
 import numpy as np
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 
 class GridmapCoordinates(BaseModel):
     """
@@ -56,6 +58,17 @@ class GridmapCoordinates(BaseModel):
         else:
             raise ValueError("x and y must have the same length")
         
+    def xy_to_flat_indices(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row-major cell indices (u * gridmap_shape[1] + v) of the points inside the gridmap, and the boolean mask of those points.
+        Same cell convention as xy_to_uv, computed without building edge arrays or 2D index pairs.
+        """
+        shape = self.gridmap_shape
+        u = shape[0] - 1 - np.floor((np.asarray(x) - self.gridmap_bounds[0]) / self.grid_resolution).astype(np.int64)
+        v = shape[1] - 1 - np.floor((np.asarray(y) - self.gridmap_bounds[1]) / self.grid_resolution).astype(np.int64)
+        inside = (u >= 0) & (u < shape[0]) & (v >= 0) & (v < shape[1])
+        return u[inside] * shape[1] + v[inside], inside
+
     def uv_to_xy(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
         if len(u) == 1 and len(v) == 1:
             return np.array([self.x_coords[u[0]], self.y_coords[v[0]]]).reshape(1, -1)
@@ -64,8 +77,62 @@ class GridmapCoordinates(BaseModel):
         else:
             raise ValueError("u and v must have the same length")
 
+def cell_aligned_coordinates(i0: int, j0: int, num_x: int, num_y: int, resolution: float) -> GridmapCoordinates:
+    """
+    GridmapCoordinates of the num_x x num_y cells starting at global cell (i0, j0), where cell (i, j) covers
+    x in [i * resolution, (i + 1) * resolution) and y likewise (the indexing of tiled and rolling layers).
+    """
+    # Nudge the upper bound so GridmapCoordinates' floor() yields exactly num_x x num_y cells
+    bounds = np.array([i0, j0, i0 + num_x + 1e-6, j0 + num_y + 1e-6], dtype=np.float64) * resolution
+    return GridmapCoordinates(bounds, resolution)
+
+def bounds_to_cell_range(low: np.ndarray, high: np.ndarray, resolution: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Global cells [first, end) enclosing [low, high) per axis, at least one cell each (cell indexing as in
+    cell_aligned_coordinates). Bounds within 1e-9 cells of an edge snap to it, so i * resolution round-trips to i.
+    """
+    first = np.floor(np.asarray(low, dtype=np.float64) / resolution + 1e-9).astype(np.int64)
+    end = np.ceil(np.asarray(high, dtype=np.float64) / resolution - 1e-9).astype(np.int64)
+    return first, np.maximum(end, first + 1)
+
+def add_to_cells(grid: np.ndarray, flat_indices: np.ndarray, weights: Optional[np.ndarray] = None) -> None:
+    """
+    Scatter-add counts (or weights) at row-major flat_indices into grid, in place.
+    Points are binned with np.bincount over the span of touched indices when that span is compact
+    (e.g. one scan's neighbourhood), otherwise the touched cells are found with np.unique.
+    """
+    if len(flat_indices) == 0:
+        return
+    cells = grid.reshape(-1)
+    if not np.shares_memory(cells, grid):
+        raise ValueError("grid must be C-contiguous to be updated in place")
+    first = int(flat_indices.min())
+    span = int(flat_indices.max()) - first + 1
+    if span <= 4 * len(flat_indices):
+        sums = np.bincount(flat_indices - first, weights=weights, minlength=span)
+        touched = np.flatnonzero(sums)
+        sums = sums[touched]
+        touched += first
+    elif weights is None:
+        touched, sums = np.unique(flat_indices, return_counts=True)
+    else:
+        touched, inverse = np.unique(flat_indices, return_inverse=True)
+        sums = np.bincount(inverse, weights=weights)
+
+    if np.issubdtype(grid.dtype, np.integer):
+        # Saturate instead of wrapping around (uint8 / uint16 counts, int16 log-odds)
+        limits = np.iinfo(grid.dtype)
+        updated = cells[touched].astype(np.float64) + np.rint(sums)
+        cells[touched] = np.clip(updated, limits.min, limits.max).astype(grid.dtype)
+    else:
+        cells[touched] += sums.astype(grid.dtype, copy=False)
+
 class DenseGridLayer(BaseModel):
-    """ Dense grid layer for a gridmap.  Stores occupancy data at each grid cell. """
+    """ Dense grid layer for a gridmap.  Stores occupancy data at each grid cell.
+    The cell dtype is chosen per layer (e.g. uint8 / uint16 counts, float32, int16 log-odds; integer layers saturate).
+    With a storage_path the cells live in a file-backed .npy memmap, so maps larger than RAM page in on demand and
+    reopening the same path with the same gridmap shape and dtype continues the persisted map.
+    """
     
     class Config:
         arbitrary_types_allowed = True
@@ -73,18 +140,39 @@ class DenseGridLayer(BaseModel):
     name: str = "dense_grid_layer"
     gridmap_coordinates: GridmapCoordinates
     occupancy_data: np.ndarray = None
+    storage_path: Optional[str] = None
 
 
-    def __init__(self, name: str, gridmap_coordinates: GridmapCoordinates):
-        shape = gridmap_coordinates.gridmap_shape
-        occupancy_data = np.zeros(shape)
+    def __init__(self, name: str, gridmap_coordinates: GridmapCoordinates, dtype: np.dtype = np.float64, storage_path: Optional[str] = None):
+        shape = tuple(int(size) for size in gridmap_coordinates.gridmap_shape)
+        if storage_path is None:
+            occupancy_data = np.zeros(shape, dtype=dtype)
+        elif os.path.exists(storage_path):
+            occupancy_data = np.load(storage_path, mmap_mode="r+")
+            if occupancy_data.shape != shape or occupancy_data.dtype != np.dtype(dtype):
+                raise ValueError(
+                    f"Layer file {storage_path} holds {occupancy_data.dtype} {occupancy_data.shape}, expected {np.dtype(dtype)} {shape}"
+                )
+        else:
+            # Sparse file of zeros; pages are only allocated once written
+            occupancy_data = np.lib.format.open_memmap(storage_path, mode="w+", dtype=dtype, shape=shape)
         
         super().__init__(
             name=name,
             gridmap_coordinates=gridmap_coordinates,
-            occupancy_data=occupancy_data
+            occupancy_data=occupancy_data,
+            storage_path=storage_path
         )
 
+    @property
+    def dtype(self) -> np.dtype:
+        return self.occupancy_data.dtype
+
+    def flush(self):
+        """ Write modified cells of a file-backed layer to disk (no-op in memory). """
+        if isinstance(self.occupancy_data, np.memmap):
+            self.occupancy_data.flush()
+
     @property
     def shape(self) -> np.ndarray:
         return self.gridmap_coordinates.gridmap_shape
@@ -103,18 +191,211 @@ class DenseGridLayer(BaseModel):
     def xy_to_uv(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
         return self.gridmap_coordinates.xy_to_uv(x, y)
     
-    def add_points(self, points: np.ndarray):
-        x_edges = np.linspace(self.gridmap_coordinates.gridmap_bounds[0], self.gridmap_coordinates.gridmap_bounds[2], self.shape[0] + 1)
-        y_edges = np.linspace(self.gridmap_coordinates.gridmap_bounds[1], self.gridmap_coordinates.gridmap_bounds[3], self.shape[1] + 1)
-        histogram, _, _ = np.histogram2d(points[:, 0], points[:, 1], bins=(x_edges, y_edges))
+    def add_points(self, points: np.ndarray, weights: Optional[np.ndarray] = None):
+        """
+        Add one count (or weight) per point to the cell it falls in; points outside the gridmap are ignored.
+        Only the touched cells are written, so the cost scales with the number of points, not the map size.
+        Cells follow xy_to_uv: exactly grid_resolution wide from the min corner. When the bounds are not a multiple of
+        the resolution, this differs from the former np.histogram2d binning over linspace edges (cells stretched to
+        span the bounds): points in the leftover strip beyond xmin + shape * resolution (or y likewise) are dropped,
+        and points near cell edges may fall in the neighbouring cell.
+        """
+        flat_indices, inside = self.gridmap_coordinates.xy_to_flat_indices(points[:, 0], points[:, 1])
+        add_to_cells(self.occupancy_data, flat_indices, None if weights is None else np.asarray(weights)[inside])
+
+
+_POOLING_REDUCTIONS = ("max", "sum")
+
+
+def _pool_blocks(fine: np.ndarray, reduction: str, fill) -> np.ndarray:
+    """ 2 x 2 max / sum pooling; odd sizes are padded at the end with fill. """
+    pad_x, pad_y = fine.shape[0] % 2, fine.shape[1] % 2
+    if pad_x or pad_y:
+        fine = np.pad(fine, ((0, pad_x), (0, pad_y)), constant_values=fill)
+    blocks = fine.reshape(fine.shape[0] // 2, 2, fine.shape[1] // 2, 2)
+    return blocks.max(axis=(1, 3)) if reduction == "max" else blocks.sum(axis=(1, 3))
+
+
+class GridPyramid(BaseModel):
+    """ Multi-resolution pyramid over a DenseGridLayer for coarse queries and renders.
+    Level k has cells 2**k times larger than the base layer (level 0, which is the layer's own occupancy_data), each
+    the max or sum of its 2 x 2 children one level down. Levels share the base layer's min corner and keep the
+    DenseGridLayer u/v orientation, so every level has its own GridmapCoordinates. Sum levels of integer layers are
+    int64 so they cannot saturate. add_points keeps all levels in sync; after writing base cells directly, pass the
+    changed cells to update_cells (or call rebuild).
+    """
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    base_layer: DenseGridLayer
+    reduction: str = "max"
+    levels: List[np.ndarray] = []
+
+    def __init__(self, base_layer: DenseGridLayer, num_levels: int = 5, reduction: str = "max"):
+        """ num_levels counts the base layer; levels stop early once a level is a single cell. """
+        if reduction not in _POOLING_REDUCTIONS:
+            raise ValueError(f"reduction must be one of {_POOLING_REDUCTIONS}, got {reduction}")
+        if num_levels < 1:
+            raise ValueError(f"num_levels must be >= 1, got {num_levels}")
+        super().__init__(base_layer=base_layer, reduction=reduction, levels=[base_layer.occupancy_data])
+
+        dtype = base_layer.dtype
+        if reduction == "sum":
+            dtype = np.dtype(np.int64) if np.issubdtype(dtype, np.integer) else np.dtype(np.float64)
+        while len(self.levels) < num_levels and max(self.levels[-1].shape) > 1:
+            self.levels.append(self._pool(self.levels[-1]).astype(dtype))
+
+    @property
+    def num_levels(self) -> int:
+        return len(self.levels)
+
+    def _fill(self, dtype: np.dtype):
+        # Value of cells past the map edge: neutral for the reduction
+        if self.reduction == "sum":
+            return 0
+        return np.iinfo(dtype).min if np.issubdtype(dtype, np.integer) else -np.inf
+
+    def _pool(self, fine: np.ndarray) -> np.ndarray:
+        # Pool in x/y order (u/v flipped back) so 2 x 2 blocks line up with the coarser cells from the min corner
+        return np.ascontiguousarray(_pool_blocks(fine[::-1, ::-1], self.reduction, self._fill(fine.dtype))[::-1, ::-1])
+
+    def rebuild(self):
+        """ Recompute every coarse level from the base layer. """
+        for level in range(1, self.num_levels):
+            self.levels[level][...] = self._pool(self.levels[level - 1])
+
+    def level_resolution(self, level: int) -> float:
+        return self.base_layer.resolution * 2 ** level
+
+    def level_coordinates(self, level: int) -> GridmapCoordinates:
+        """ GridmapCoordinates of a level: the base layer's min corner, 2**level coarser, covering every base cell. """
+        shape = self.levels[level].shape
+        low = self.base_layer.bounds[:2].astype(np.float64)
+        resolution = self.level_resolution(level)
+        # Nudge the upper bound so GridmapCoordinates' floor() gives exactly the level's shape
+        high = low + (np.array(shape, dtype=np.float64) + 1e-6) * resolution
+        return GridmapCoordinates(np.concatenate([low, high]), resolution)
+
+    def level_for_resolution(self, resolution: float) -> int:
+        """ Coarsest level whose cells are no larger than resolution (meters). """
+        ratio = max(resolution / self.base_layer.resolution, 1.0)
+        return min(int(np.floor(np.log2(ratio) + 1e-9)), self.num_levels - 1)
+
+    def xy_to_uv(self, x: np.ndarray, y: np.ndarray, level: int = 0) -> np.ndarray:
+        return self.level_coordinates(level).xy_to_uv(x, y)
+
+    def uv_to_xy(self, u: np.ndarray, v: np.ndarray, level: int = 0) -> np.ndarray:
+        return self.level_coordinates(level).uv_to_xy(u, v)
+
+    def values_at(self, points: np.ndarray, level: int) -> np.ndarray:
+        """ Level cell values at the x, y of points; 0 outside the map. """
+        data = self.levels[level]
+        flat_indices, inside = self.level_coordinates(level).xy_to_flat_indices(points[:, 0], points[:, 1])
+        values = np.zeros(len(points), dtype=data.dtype)
+        values[inside] = data.reshape(-1)[flat_indices]
+        return values
+
+    def to_dense_layer(self, level: int, name: Optional[str] = None) -> DenseGridLayer:
+        """ DenseGridLayer sharing a level's cells, e.g. for visualize_dense_grid_layer at coarse scale. """
+        layer = DenseGridLayer(name or f"{self.base_layer.name}_level_{level}", self.level_coordinates(level), dtype=self.levels[level].dtype)
+        layer.occupancy_data = self.levels[level]
+        return layer
+
+    def add_points(self, points: np.ndarray, weights: Optional[np.ndarray] = None):
+        """ Add points to the base layer (as DenseGridLayer.add_points), then re-pool only the touched cells' parents. """
+        flat_indices, inside = self.base_layer.gridmap_coordinates.xy_to_flat_indices(points[:, 0], points[:, 1])
+        add_to_cells(self.levels[0], flat_indices, None if weights is None else np.asarray(weights)[inside])
+        self.update_cells(flat_indices)
+
+    def update_cells(self, flat_indices: np.ndarray):
+        """
+        Propagate changes of the given base cells (row-major u * shape[1] + v, duplicates allowed) up the pyramid.
+        Each level only recomputes the parents of cells changed one level down, from their 2 x 2 children.
+        """
+        changed = np.unique(np.asarray(flat_indices, dtype=np.int64))
+        for level in range(1, self.num_levels):
+            if len(changed) == 0:
+                return
+            fine, coarse = self.levels[level - 1], self.levels[level]
+            # u/v -> cell index from the min corner, then the parent cell one level up
+            i = fine.shape[0] - 1 - changed // fine.shape[1]
+            j = fine.shape[1] - 1 - changed % fine.shape[1]
+            parents = np.unique((i >> 1) * coarse.shape[1] + (j >> 1))
+            parent_i, parent_j = parents // coarse.shape[1], parents % coarse.shape[1]
+
+            child_i = parent_i[:, None] * 2 + np.array([0, 0, 1, 1])
+            child_j = parent_j[:, None] * 2 + np.array([0, 1, 0, 1])
+            valid = (child_i < fine.shape[0]) & (child_j < fine.shape[1])
+            child_u = np.maximum(fine.shape[0] - 1 - child_i, 0)
+            child_v = np.maximum(fine.shape[1] - 1 - child_j, 0)
+            values = np.where(valid, fine[child_u, child_v], self._fill(fine.dtype))
+            pooled = values.max(axis=1) if self.reduction == "max" else values.sum(axis=1)
+
+            u, v = coarse.shape[0] - 1 - parent_i, coarse.shape[1] - 1 - parent_j
+            coarse[u, v] = pooled
+            changed = u * coarse.shape[1] + v
+
+
+# SparseGridLayer object kinds and parameter rows (params[:, :5])
+CIRCLE, BOX, LINE = 0, 1, 2 # circle: cx, cy, radius / box: xmin, ymin, xmax, ymax / line: x0, y0, x1, y1, half width
+# Objects whose bounding box covers more index buckets than this are kept in a list checked by every query
+_MAX_BUCKETS_PER_OBJECT = 64
+# Candidate cells evaluated per rasterization batch, bounding temporary memory
+_MAX_RASTER_CELLS_PER_BATCH = 1 << 22
+_BUCKET_KEY_SHIFT = 32
+_BUCKET_KEY_OFFSET = 1 << 31
+
+
+def _point_box_distance(x: np.ndarray, y: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """ Distance from points to axis-aligned boxes [xmin, ymin, xmax, ymax] (0 inside), pairwise. """
+    dx = np.maximum(np.maximum(boxes[:, 0] - x, x - boxes[:, 2]), 0.0)
+    dy = np.maximum(np.maximum(boxes[:, 1] - y, y - boxes[:, 3]), 0.0)
+    return np.hypot(dx, dy)
+
+
+def _point_segment_distance(x: np.ndarray, y: np.ndarray, segments: np.ndarray) -> np.ndarray:
+    """ Distance from points to segments [x0, y0, x1, y1], pairwise. """
+    dx, dy = segments[:, 2] - segments[:, 0], segments[:, 3] - segments[:, 1]
+    length2 = dx * dx + dy * dy
+    t = ((x - segments[:, 0]) * dx + (y - segments[:, 1]) * dy) / np.where(length2 > 0, length2, 1.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(segments[:, 0] + t * dx - x, segments[:, 1] + t * dy - y)
+
+
+def _segment_box_distance(segments: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """ Distance from segments [x0, y0, x1, y1] to one box [xmin, ymin, xmax, ymax] (0 when they intersect). """
+    boxes = np.broadcast_to(box, (len(segments), 4))
+    distance = np.minimum(
+        _point_box_distance(segments[:, 0], segments[:, 1], boxes),
+        _point_box_distance(segments[:, 2], segments[:, 3], boxes),
+    )
+    for corner_x, corner_y in ((box[0], box[1]), (box[0], box[3]), (box[2], box[1]), (box[2], box[3])):
+        distance = np.minimum(distance, _point_segment_distance(corner_x, corner_y, segments))
+
+    # Liang-Barsky clipping: the segment crosses the box when the clipped parameter range is non-empty
+    start = segments[:, :2]
+    delta = segments[:, 2:] - start
+    t_low, t_high = np.zeros(len(segments)), np.ones(len(segments))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for axis in range(2):
+            t0 = (box[axis] - start[:, axis]) / delta[:, axis]
+            t1 = (box[axis + 2] - start[:, axis]) / delta[:, axis]
+            parallel = delta[:, axis] == 0
+            t_low = np.where(parallel, t_low, np.maximum(t_low, np.minimum(t0, t1)))
+            t_high = np.where(parallel, t_high, np.minimum(t_high, np.maximum(t0, t1)))
+            outside = parallel & ((start[:, axis] < box[axis]) | (start[:, axis] > box[axis + 2]))
+            t_high = np.where(outside, -1.0, t_high)
+    return np.where(t_low <= t_high, 0.0, distance)
 
-        histogram = np.fliplr(np.flipud(histogram))
-        self.occupancy_data += histogram
 
 class SparseGridLayer(BaseModel):
 
     """ Sparse grid layer for a gridmap.  Only stores geometric objects like circles, boxes, lines, etc. at coordinate locations.
     Doesn't maintain occupancy data, but can visualize the objects on the gridmap.
+    Objects are stored in bulk arrays (kinds, params, aabbs; ids are insertion order) and indexed by a uniform grid hash
+    of index_cell_size buckets, rebuilt lazily after additions, so region and radius queries only test objects in the
+    buckets they overlap. rasterize draws all (or selected) objects into a DenseGridLayer-oriented mask at once.
     """
 
     class Config:
@@ -122,18 +403,273 @@ class SparseGridLayer(BaseModel):
 
     name: str = "sparse_grid_layer"
     gridmap_coordinates: GridmapCoordinates
-    
+    index_cell_size: float = 1.0
 
-    def __init__(self, name: str, gridmap_coordinates: GridmapCoordinates):
-        shape = gridmap_coordinates.gridmap_shape
-        occupancy_data = np.zeros(shape)
-        
+    # Object storage; rows [0, num_objects) are used and capacity grows by doubling
+    num_objects: int = 0
+    kinds: np.ndarray = None
+    params: np.ndarray = None
+    aabbs: np.ndarray = None
+
+    # Grid hash (sorted bucket keys, object ranges per key), objects spanning too many buckets; None when stale
+    index_keys: Optional[np.ndarray] = None
+    index_starts: Optional[np.ndarray] = None
+    index_objects: Optional[np.ndarray] = None
+    large_objects: Optional[np.ndarray] = None
+
+    def __init__(self, name: str, gridmap_coordinates: GridmapCoordinates, index_cell_size: Optional[float] = None, capacity: int = 1024):
+        """ index_cell_size (meters) defaults to 8 grid cells. """
         super().__init__(
             name=name,
             gridmap_coordinates=gridmap_coordinates,
-            occupancy_data=occupancy_data
+            index_cell_size=index_cell_size or 8 * gridmap_coordinates.grid_resolution,
+            kinds=np.zeros(capacity, dtype=np.int8),
+            params=np.zeros((capacity, 5), dtype=np.float64),
+            aabbs=np.zeros((capacity, 4), dtype=np.float64),
         )
 
+    def _append(self, kind: int, params: np.ndarray, aabbs: np.ndarray) -> np.ndarray:
+        count = len(params)
+        start, end = self.num_objects, self.num_objects + count
+        if end > len(self.kinds):
+            capacity = max(end, 2 * len(self.kinds))
+            self.kinds = np.resize(self.kinds, capacity)
+            self.params = np.resize(self.params, (capacity, 5))
+            self.aabbs = np.resize(self.aabbs, (capacity, 4))
+        self.kinds[start:end] = kind
+        self.params[start:end] = 0.0
+        self.params[start:end, :params.shape[1]] = params
+        self.aabbs[start:end] = aabbs
+        self.num_objects = end
+        self.index_keys = None
+        return np.arange(start, end)
+
+    def add_circles(self, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """ Add N circles (N x 2 centers, N or scalar radii); returns their ids. """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(centers),))
+        aabbs = np.concatenate([centers - radii[:, None], centers + radii[:, None]], axis=1)
+        return self._append(CIRCLE, np.column_stack([centers, radii]), aabbs)
+
+    def add_boxes(self, boxes: np.ndarray) -> np.ndarray:
+        """ Add N axis-aligned boxes [xmin, ymin, xmax, ymax]; returns their ids. """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        boxes = np.concatenate([np.minimum(boxes[:, :2], boxes[:, 2:]), np.maximum(boxes[:, :2], boxes[:, 2:])], axis=1)
+        return self._append(BOX, boxes, boxes)
+
+    def add_lines(self, starts: np.ndarray, ends: np.ndarray, widths: np.ndarray = 0.0) -> np.ndarray:
+        """ Add N line segments (N x 2 starts and ends, N or scalar widths in meters); returns their ids. """
+        segments = np.concatenate([np.asarray(starts, dtype=np.float64).reshape(-1, 2), np.asarray(ends, dtype=np.float64).reshape(-1, 2)], axis=1)
+        half_widths = np.broadcast_to(np.asarray(widths, dtype=np.float64), (len(segments),)) / 2.0
+        aabbs = np.concatenate([
+            np.minimum(segments[:, :2], segments[:, 2:]) - half_widths[:, None],
+            np.maximum(segments[:, :2], segments[:, 2:]) + half_widths[:, None],
+        ], axis=1)
+        return self._append(LINE, np.column_stack([segments, half_widths]), aabbs)
+
+    def clear(self):
+        self.num_objects = 0
+        self.index_keys = None
+
+    def _bucket_range(self, aabbs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        low = np.floor(aabbs[:, :2] / self.index_cell_size).astype(np.int64)
+        high = np.floor(aabbs[:, 2:] / self.index_cell_size).astype(np.int64)
+        return low, high
+
+    def build_index(self):
+        """ Rebuild the grid hash: every object is listed under each bucket its bounding box overlaps. """
+        ids = np.arange(self.num_objects)
+        low, high = self._bucket_range(self.aabbs[:self.num_objects])
+        extent = high - low + 1
+        counts = extent[:, 0] * extent[:, 1]
+        large = counts > _MAX_BUCKETS_PER_OBJECT
+        self.large_objects = ids[large]
+
+        ids, low, extent, counts = ids[~large], low[~large], extent[~large], counts[~large]
+        objects = np.repeat(ids, counts)
+        local = np.arange(len(objects)) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = np.repeat(np.arange(len(ids)), counts)
+        bucket_x = low[rows, 0] + local // extent[rows, 1]
+        bucket_y = low[rows, 1] + local % extent[rows, 1]
+        keys = (bucket_x << _BUCKET_KEY_SHIFT) + (bucket_y + _BUCKET_KEY_OFFSET)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) > 0 else np.empty(0, dtype=np.int64)
+        self.index_keys = keys[starts]
+        self.index_starts = np.r_[starts, len(keys)]
+        self.index_objects = objects[order]
+
+    def _candidates(self, bounds: np.ndarray) -> np.ndarray:
+        """ Ids of objects whose bounding box overlaps bounds [xmin, ymin, xmax, ymax], from the grid hash. """
+        if self.index_keys is None:
+            self.build_index()
+        bounds = np.asarray(bounds, dtype=np.float64)
+        low, high = self._bucket_range(bounds.reshape(1, 4))
+        low, high = low[0], high[0]
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > len(self.index_keys):
+            # Query covers more buckets than are occupied: scanning all bounding boxes is cheaper
+            candidates = np.arange(self.num_objects)
+        else:
+            bucket_x, bucket_y = np.meshgrid(np.arange(low[0], high[0] + 1), np.arange(low[1], high[1] + 1), indexing="ij")
+            keys = (bucket_x.ravel() << _BUCKET_KEY_SHIFT) + (bucket_y.ravel() + _BUCKET_KEY_OFFSET)
+            positions = np.searchsorted(self.index_keys, keys)
+            found = positions < len(self.index_keys)
+            found[found] = self.index_keys[positions[found]] == keys[found]
+            positions = positions[found]
+            starts = self.index_starts[positions]
+            lengths = self.index_starts[positions + 1] - starts
+            entries = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+            candidates = np.unique(np.concatenate([self.index_objects[entries], self.large_objects]))
+        aabbs = self.aabbs[candidates]
+        overlap = (aabbs[:, 0] <= bounds[2]) & (aabbs[:, 2] >= bounds[0]) & (aabbs[:, 1] <= bounds[3]) & (aabbs[:, 3] >= bounds[1])
+        return candidates[overlap]
+
+    def _distances(self, ids: np.ndarray, x: np.ndarray, y: np.ndarray, min_size: float = 0.0) -> np.ndarray:
+        """ Pairwise distance from points to objects (0 inside); circle radii and line half widths are at least min_size. """
+        kinds, params = self.kinds[ids], self.params[ids]
+        x, y = np.broadcast_to(x, ids.shape), np.broadcast_to(y, ids.shape)
+        distances = np.empty(len(ids), dtype=np.float64)
+        for kind in (CIRCLE, BOX, LINE):
+            selected = kinds == kind
+            if not selected.any():
+                continue
+            p, px, py = params[selected], x[selected], y[selected]
+            if kind == CIRCLE:
+                distances[selected] = np.hypot(px - p[:, 0], py - p[:, 1]) - np.maximum(p[:, 2], min_size)
+            elif kind == BOX:
+                distances[selected] = _point_box_distance(px, py, p[:, :4])
+            else:
+                distances[selected] = _point_segment_distance(px, py, p[:, :4]) - np.maximum(p[:, 4], min_size)
+        return np.maximum(distances, 0.0)
+
+    def distances(self, ids: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """ Distance from (x, y) (one point, or one per id) to each object in ids; 0 inside. """
+        ids = np.asarray(ids, dtype=np.int64)
+        return self._distances(ids, np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+
+    def query_region(self, bounds: np.ndarray) -> np.ndarray:
+        """ Sorted ids of the objects intersecting the rectangle bounds [xmin, ymin, xmax, ymax]. """
+        bounds = np.asarray(bounds, dtype=np.float64)
+        ids = self._candidates(bounds)
+        kinds, params = self.kinds[ids], self.params[ids]
+        # Bounding box overlap is exact for boxes; circles and lines are tested against the rectangle
+        keep = np.ones(len(ids), dtype=bool)
+        circles = kinds == CIRCLE
+        boxes = np.broadcast_to(bounds, (int(circles.sum()), 4))
+        keep[circles] = _point_box_distance(params[circles, 0], params[circles, 1], boxes) <= params[circles, 2]
+        lines = kinds == LINE
+        keep[lines] = _segment_box_distance(params[lines, :4], bounds) <= params[lines, 4]
+        return ids[keep]
+
+    def query_radius(self, center: np.ndarray, radius: float) -> np.ndarray:
+        """ Sorted ids of the objects within radius (meters) of center (x, y). """
+        x, y = float(center[0]), float(center[1])
+        ids = self._candidates(np.array([x - radius, y - radius, x + radius, y + radius]))
+        return ids[self._distances(ids, x, y) <= radius]
+
+    def _raster_spans(self, ids: np.ndarray, coordinates: GridmapCoordinates) -> Tuple[np.ndarray, ...]:
+        """
+        Runs of candidate cells per object, in x/y-order cell indices from the gridmap's min corner: span s covers
+        fixed[s] on one axis (x, or y when transposed) and start[s] .. start[s] + count[s] - 1 on the other. Boxes and
+        circles get exact runs (cell centers inside); lines get conservative runs along their dominant axis that still
+        need the distance test (tested).
+        """
+        shape = np.array([int(size) for size in coordinates.gridmap_shape])
+        resolution = coordinates.grid_resolution
+        low = coordinates.gridmap_bounds[:2].astype(np.float64)
+
+        def cell_range(lower: np.ndarray, upper: np.ndarray, axis: int):
+            # Cells whose centers lie in [lower, upper] along axis, clipped to the gridmap
+            first = np.ceil((lower - low[axis]) / resolution - 0.5).astype(np.int64)
+            last = np.floor((upper - low[axis]) / resolution - 0.5).astype(np.int64)
+            return np.maximum(first, 0), np.minimum(last, shape[axis] - 1)
+
+        def rows_of(objects: np.ndarray, first: np.ndarray, last: np.ndarray):
+            counts = np.maximum(last - first + 1, 0)
+            rows = np.repeat(objects, counts)
+            return rows, np.repeat(first, counts) + np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        kinds, params = self.kinds[ids], self.params[ids]
+        spans = []
+
+        objects = np.flatnonzero(kinds == BOX)
+        boxes = params[objects, :4]
+        rows, fixed = rows_of(objects, *cell_range(boxes[:, 0], boxes[:, 2], 0))
+        first, last = cell_range(self.params[ids[rows], 1], self.params[ids[rows], 3], 1)
+        spans.append((rows, fixed, first, last, False, False))
+
+        # Circles: half chord at each cell-center row; at least the cell containing the center is drawn
+        objects = np.flatnonzero(kinds == CIRCLE)
+        radii = np.maximum(params[objects, 2], resolution * np.sqrt(0.5))
+        rows, fixed = rows_of(objects, *cell_range(params[objects, 0] - radii, params[objects, 0] + radii, 0))
+        radii = np.maximum(self.params[ids[rows], 2], resolution * np.sqrt(0.5))
+        offsets = low[0] + (fixed + 0.5) * resolution - self.params[ids[rows], 0]
+        half_chords = np.sqrt(np.maximum(radii * radii - offsets * offsets, 0.0))
+        first, last = cell_range(self.params[ids[rows], 1] - half_chords, self.params[ids[rows], 1] + half_chords, 1)
+        spans.append((rows, fixed, first, last, False, False))
+
+        # Lines: along the dominant axis a, the nearest segment point of any cell within the half width lies in
+        # [a - h, a + h], so the minor-axis run is the segment's extent over that window, widened by h
+        for transposed in (False, True):
+            objects = np.flatnonzero(kinds == LINE)
+            segments = params[objects, :4]
+            delta = segments[:, 2:] - segments[:, :2]
+            along_y = np.abs(delta[:, 1]) > np.abs(delta[:, 0])
+            objects, segments, delta = objects[along_y == transposed], segments[along_y == transposed], delta[along_y == transposed]
+            a, b = (1, 0) if transposed else (0, 1)
+            half_widths = np.maximum(params[objects, 4], resolution / 2)
+            a_min, a_max = np.minimum(segments[:, a], segments[:, a + 2]), np.maximum(segments[:, a], segments[:, a + 2])
+            rows, fixed = rows_of(np.arange(len(objects)), *cell_range(a_min - half_widths, a_max + half_widths, a))
+            centers = low[a] + (fixed + 0.5) * resolution
+            slopes = np.where(delta[rows, a] != 0, delta[rows, b] / np.where(delta[rows, a] != 0, delta[rows, a], 1.0), 0.0)
+            window_low = np.clip(centers - half_widths[rows], a_min[rows], a_max[rows])
+            window_high = np.clip(centers + half_widths[rows], a_min[rows], a_max[rows])
+            b_low = segments[rows, b] + (window_low - segments[rows, a]) * slopes
+            b_high = segments[rows, b] + (window_high - segments[rows, a]) * slopes
+            first, last = cell_range(np.minimum(b_low, b_high) - half_widths[rows], np.maximum(b_low, b_high) + half_widths[rows], b)
+            spans.append((objects[rows], fixed, first, last, transposed, True))
+        return spans
+
+    def rasterize(self, ids: Optional[np.ndarray] = None, gridmap_coordinates: Optional[GridmapCoordinates] = None) -> np.ndarray:
+        """
+        Boolean mask (DenseGridLayer orientation) of the cells whose center lies in any of the objects (all by default),
+        on this layer's gridmap or the given one. Circles and lines are drawn at least one cell wide. Objects are cut
+        into runs of candidate cells (exact for boxes and circles, along the dominant axis for lines) that are expanded
+        and, for lines, distance-tested in batches.
+        """
+        coordinates = gridmap_coordinates or self.gridmap_coordinates
+        ids = np.arange(self.num_objects) if ids is None else np.asarray(ids, dtype=np.int64)
+        shape = tuple(int(size) for size in coordinates.gridmap_shape)
+        resolution = coordinates.grid_resolution
+        low = coordinates.gridmap_bounds[:2].astype(np.float64)
+
+        mask = np.zeros(shape, dtype=bool)
+        cells = mask.reshape(-1)
+        for rows, fixed, first, last, transposed, tested in self._raster_spans(ids, coordinates):
+            counts = np.maximum(last - first + 1, 0)
+            ends = np.cumsum(counts)
+            batch_start = 0
+            while batch_start < len(counts):
+                offset = ends[batch_start - 1] if batch_start > 0 else 0
+                batch_end = max(int(np.searchsorted(ends, offset + _MAX_RASTER_CELLS_PER_BATCH, side="right")), batch_start + 1)
+                batch_counts = counts[batch_start:batch_end]
+                span = np.repeat(np.arange(batch_start, batch_end), batch_counts)
+                run = first[span] + np.arange(len(span)) - np.repeat(np.cumsum(batch_counts) - batch_counts, batch_counts)
+                i, j = (run, fixed[span]) if transposed else (fixed[span], run)
+                if tested:
+                    inside = self._distances(ids[rows[span]], low[0] + (i + 0.5) * resolution, low[1] + (j + 0.5) * resolution, resolution / 2) <= 0
+                    i, j = i[inside], j[inside]
+                cells[i * shape[1] + j] = True
+                batch_start = batch_end
+        return mask[::-1, ::-1]
+
+    def to_dense_layer(self, name: Optional[str] = None, ids: Optional[np.ndarray] = None, dtype: np.dtype = np.uint8) -> DenseGridLayer:
+        """ DenseGridLayer with 1 in the cells covered by the objects (see rasterize). """
+        layer = DenseGridLayer(name or self.name, self.gridmap_coordinates, dtype=dtype)
+        layer.occupancy_data[self.rasterize(ids)] = 1
+        return layer
+
+
 class Gridmap(BaseModel):
     """ Wrapper class for gridmaps.  Contains a dictionary of layers which can be accessed by name or index.
     All gridmaps in a given instance will have the same gridmap coordinates (same bounds and resolution). 
@@ -0,0 +1,137 @@
+from typing import Optional
+import numpy as np
+
+from geometry.gridmap import DenseGridLayer, GridmapCoordinates
+
+# Ray samples generated per batch in trace_rays, bounding temporary memory (~100 MB)
+_MAX_SAMPLES_PER_BATCH = 1 << 22
+
+
+def trace_rays(gridmap_coordinates: GridmapCoordinates, origins: np.ndarray, endpoints: np.ndarray) -> np.ndarray:
+    """
+    Unique row-major cell indices crossed by the segments origins -> endpoints, inside the gridmap.
+    Vectorized DDA: every ray is sampled at unit steps along its dominant axis (in cell units), all rays of a batch
+    at once, so each cell on the line is hit without per-ray Python loops. origins is (2,) for one sensor position
+    or (N, 2) per ray; only x, y of endpoints are used.
+    """
+    shape = gridmap_coordinates.gridmap_shape
+    resolution = gridmap_coordinates.grid_resolution
+    low = gridmap_coordinates.gridmap_bounds[:2]
+    endpoints = np.asarray(endpoints, dtype=np.float64)[:, :2]
+    starts = np.broadcast_to((np.asarray(origins, dtype=np.float64)[..., :2] - low) / resolution, endpoints.shape)
+    deltas = (endpoints - low) / resolution - starts
+    steps = np.maximum(np.ceil(np.abs(deltas).max(axis=1)).astype(np.int64), 1)
+
+    cells = []
+    ends = np.cumsum(steps)
+    batch_start = 0
+    while batch_start < len(steps):
+        offset = ends[batch_start - 1] if batch_start > 0 else 0
+        batch_end = max(int(np.searchsorted(ends, offset + _MAX_SAMPLES_PER_BATCH, side="right")), batch_start + 1)
+        batch_steps = steps[batch_start:batch_end]
+        ray = np.repeat(np.arange(batch_start, batch_end), batch_steps)
+        k = np.arange(len(ray)) - np.repeat(np.cumsum(batch_steps) - batch_steps, batch_steps)
+        t = k / steps[ray]
+        i = np.floor(starts[ray, 0] + t * deltas[ray, 0]).astype(np.int64)
+        j = np.floor(starts[ray, 1] + t * deltas[ray, 1]).astype(np.int64)
+        # Cell (i, j) counted from the min corner -> DenseGridLayer (u, v)
+        u, v = shape[0] - 1 - i, shape[1] - 1 - j
+        inside = (u >= 0) & (u < shape[0]) & (v >= 0) & (v < shape[1])
+        cells.append(np.unique(u[inside] * shape[1] + v[inside]))
+        batch_start = batch_end
+    if not cells:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(cells)) if len(cells) > 1 else cells[0]
+
+
+class OccupancyGridLayer(DenseGridLayer):
+    """ Dense layer of occupancy log-odds with hit/miss updates from ray casting.
+    integrate_scan marks the cells between the sensor and each endpoint as free and the endpoint cells as occupied,
+    so obstacles that move away are carved out again. Each cell changes at most once per scan (hit wins over miss),
+    and values are clamped to [clamp_min, clamp_max] so the map stays responsive.
+    Signed integer dtypes (e.g. int16) store quantized log-odds: a cell holds round(log_odds / log_odds_scale), with
+    log_odds_scale defaulting to 0.01 for integer layers and 1.0 for float layers. Parameters and clamps stay in
+    log-odds units.
+    """
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    log_odds_hit: float = 0.85
+    log_odds_miss: float = -0.4
+    clamp_min: float = -2.0
+    clamp_max: float = 3.5
+    log_odds_scale: float = 1.0
+
+    def __init__(self, name: str, gridmap_coordinates: GridmapCoordinates, dtype: np.dtype = np.float32, storage_path: Optional[str] = None, log_odds_hit: float = 0.85, log_odds_miss: float = -0.4, clamp_min: float = -2.0, clamp_max: float = 3.5, log_odds_scale: Optional[float] = None):
+        dtype = np.dtype(dtype)
+        integer = np.issubdtype(dtype, np.signedinteger)
+        if not (integer or np.issubdtype(dtype, np.floating)):
+            raise ValueError(f"Occupancy log-odds need a float or signed integer dtype, got {dtype}")
+        if log_odds_scale is None:
+            log_odds_scale = 0.01 if integer else 1.0
+        if integer:
+            limits = np.iinfo(dtype)
+            if max(abs(clamp_min), abs(clamp_max)) / log_odds_scale > min(-limits.min, limits.max):
+                raise ValueError(f"Clamps [{clamp_min}, {clamp_max}] do not fit {dtype} at log_odds_scale {log_odds_scale}")
+            if min(abs(log_odds_hit), abs(log_odds_miss)) < log_odds_scale / 2:
+                raise ValueError(f"log_odds_scale {log_odds_scale} is too coarse for the hit / miss updates")
+        super().__init__(name, gridmap_coordinates, dtype=dtype, storage_path=storage_path)
+        self.log_odds_hit = log_odds_hit
+        self.log_odds_miss = log_odds_miss
+        self.clamp_min = clamp_min
+        self.clamp_max = clamp_max
+        self.log_odds_scale = log_odds_scale
+
+    def log_odds(self) -> np.ndarray:
+        """ Cell log-odds as float32 (dequantized for integer layers). """
+        return self.occupancy_data.astype(np.float32) * np.float32(self.log_odds_scale)
+
+    def _update_cells(self, flat_indices: np.ndarray, delta: float):
+        if len(flat_indices) == 0:
+            return
+        cells = self.occupancy_data.reshape(-1)
+        updated = np.clip(cells[flat_indices].astype(np.float64) * self.log_odds_scale + delta, self.clamp_min, self.clamp_max)
+        updated /= self.log_odds_scale
+        if np.issubdtype(cells.dtype, np.integer):
+            updated = np.rint(updated)
+        cells[flat_indices] = updated.astype(cells.dtype)
+
+    def add_points(self, points: np.ndarray, weights: Optional[np.ndarray] = None):
+        """ Hit-only update (no free space): each cell containing points gains log_odds_hit once. """
+        flat_indices, _ = self.gridmap_coordinates.xy_to_flat_indices(points[:, 0], points[:, 1])
+        self._update_cells(np.unique(flat_indices), self.log_odds_hit)
+
+    def integrate_scan(self, origin: np.ndarray, points: np.ndarray, max_range: Optional[float] = None):
+        """
+        Ray-cast one scan: cells from origin to each point become freer, the points' cells more occupied.
+        origin is the sensor position (x, y[, z]) or one per point; points beyond max_range are shortened to
+        max_range and only carve free space.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if len(points) == 0:
+            return
+        origins = np.broadcast_to(np.asarray(origin, dtype=np.float64)[..., :2], (len(points), 2))
+        endpoints = points[:, :2]
+        hits = np.ones(len(points), dtype=bool)
+        if max_range is not None:
+            offsets = endpoints - origins
+            distances = np.linalg.norm(offsets, axis=1)
+            hits = distances <= max_range
+            scale = np.where(hits, 1.0, max_range / np.maximum(distances, 1e-12))
+            endpoints = origins + offsets * scale[:, None]
+
+        hit_cells, _ = self.gridmap_coordinates.xy_to_flat_indices(endpoints[hits, 0], endpoints[hits, 1])
+        hit_cells = np.unique(hit_cells)
+        free_cells = trace_rays(self.gridmap_coordinates, origins, endpoints)
+        free_cells = free_cells[~np.isin(free_cells, hit_cells, assume_unique=True)]
+        self._update_cells(free_cells, self.log_odds_miss)
+        self._update_cells(hit_cells, self.log_odds_hit)
+
+    def probability(self) -> np.ndarray:
+        """ Occupancy probability of every cell (0.5 where unknown). """
+        return 1.0 / (1.0 + np.exp(-self.log_odds()))
+
+    def occupied_mask(self, threshold: float = 0.5) -> np.ndarray:
+        """ Cells with occupancy probability above threshold. """
+        return self.occupancy_data > np.log(threshold / (1.0 - threshold)) / self.log_odds_scale
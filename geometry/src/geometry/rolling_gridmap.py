@@ -0,0 +1,94 @@
+from pydantic import BaseModel
+from typing import Optional, Tuple
+import numpy as np
+
+from geometry.gridmap import DenseGridLayer, GridmapCoordinates, add_to_cells, cell_aligned_coordinates
+
+
+class RollingGridLayer(BaseModel):
+    """ Fixed-size local grid layer that follows the robot.
+    The window covers global cells [origin_cell, origin_cell + shape) (cell (i, j) spans x in [i * resolution,
+    (i + 1) * resolution), y likewise, FLU frame) and is stored as a ring buffer: global cell (i, j) always lives at
+    data[i % shape[0], j % shape[1]]. Moving the window only changes origin_cell and zeroes the strips that scroll in;
+    no cell data is copied.
+    """
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    name: str = "rolling_grid_layer"
+    resolution: float
+    data: np.ndarray
+    origin_cell: Tuple[int, int] = (0, 0)
+
+    def __init__(self, name: str, resolution: float, size: float, dtype: np.dtype = np.float64, center: Optional[np.ndarray] = None):
+        """ size is the side length of the square window in meters; the window starts centred on center (default origin). """
+        num_cells = max(int(round(size / resolution)), 1)
+        super().__init__(name=name, resolution=resolution, data=np.zeros((num_cells, num_cells), dtype=dtype))
+        self.origin_cell = self._origin_for(center if center is not None else np.zeros(2))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.data.shape
+
+    @property
+    def bounds(self) -> np.ndarray:
+        """ [xmin, ymin, xmax, ymax] of the current window. """
+        i0, j0 = self.origin_cell
+        return np.array([i0, j0, i0 + self.shape[0], j0 + self.shape[1]], dtype=np.float64) * self.resolution
+
+    @property
+    def gridmap_coordinates(self) -> GridmapCoordinates:
+        """ Coordinates of the current window, as used by to_dense_layer. """
+        return cell_aligned_coordinates(self.origin_cell[0], self.origin_cell[1], self.shape[0], self.shape[1], self.resolution)
+
+    def _origin_for(self, center: np.ndarray) -> Tuple[int, int]:
+        i = int(np.floor(center[0] / self.resolution)) - self.shape[0] // 2
+        j = int(np.floor(center[1] / self.resolution)) - self.shape[1] // 2
+        return i, j
+
+    def recenter(self, center: np.ndarray):
+        """ Move the window to be centred on center (x, y[, ...]); cells that scroll in are cleared. """
+        new_i0, new_j0 = self._origin_for(center)
+        old_i0, old_j0 = self.origin_cell
+        num_x, num_y = self.shape
+        if abs(new_i0 - old_i0) >= num_x or abs(new_j0 - old_j0) >= num_y:
+            self.data[...] = 0
+        else:
+            # Global rows / columns entering the window map to ring-buffer rows / columns via modulo
+            if new_i0 > old_i0:
+                self.data[np.arange(old_i0 + num_x, new_i0 + num_x) % num_x, :] = 0
+            elif new_i0 < old_i0:
+                self.data[np.arange(new_i0, old_i0) % num_x, :] = 0
+            if new_j0 > old_j0:
+                self.data[:, np.arange(old_j0 + num_y, new_j0 + num_y) % num_y] = 0
+            elif new_j0 < old_j0:
+                self.data[:, np.arange(new_j0, old_j0) % num_y] = 0
+        self.origin_cell = (new_i0, new_j0)
+
+    def xy_to_flat_indices(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Ring-buffer flat indices of the points inside the window, and the boolean mask of those points. """
+        i = np.floor(np.asarray(x) / self.resolution).astype(np.int64) - self.origin_cell[0]
+        j = np.floor(np.asarray(y) / self.resolution).astype(np.int64) - self.origin_cell[1]
+        num_x, num_y = self.shape
+        inside = (i >= 0) & (i < num_x) & (j >= 0) & (j < num_y)
+        rows = (i[inside] + self.origin_cell[0]) % num_x
+        columns = (j[inside] + self.origin_cell[1]) % num_y
+        return rows * num_y + columns, inside
+
+    def add_points(self, points: np.ndarray, weights: Optional[np.ndarray] = None):
+        """ Add one count (or weight) per point inside the window; points outside are ignored. """
+        if len(points) == 0:
+            return
+        flat_indices, inside = self.xy_to_flat_indices(points[:, 0], points[:, 1])
+        add_to_cells(self.data, flat_indices, None if weights is None else np.asarray(weights)[inside])
+
+    def read_window(self) -> np.ndarray:
+        """ Copy of the window in DenseGridLayer orientation (see gridmap_coordinates). """
+        unwrapped = np.roll(self.data, (-self.origin_cell[0] % self.shape[0], -self.origin_cell[1] % self.shape[1]), axis=(0, 1))
+        return unwrapped[::-1, ::-1]
+
+    def to_dense_layer(self, name: Optional[str] = None) -> DenseGridLayer:
+        layer = DenseGridLayer(name or self.name, self.gridmap_coordinates, dtype=self.data.dtype)
+        layer.occupancy_data[...] = self.read_window()
+        return layer
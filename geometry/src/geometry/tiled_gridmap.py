@@ -0,0 +1,127 @@
+from pydantic import BaseModel
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+
+from geometry.gridmap import DenseGridLayer, GridmapCoordinates, add_to_cells, bounds_to_cell_range, cell_aligned_coordinates
+
+# Tile keys are packed into one int64 as (tile_x << 32) + (tile_y + 2**31) for grouping points by tile
+_KEY_SHIFT = 32
+_KEY_OFFSET = 1 << 31
+
+
+class TiledGridLayer(BaseModel):
+    """ Unbounded grid layer stored as square tiles allocated on first write.
+    Cell (i, j) covers x in [i * resolution, (i + 1) * resolution), y likewise (FLU frame); tile (ti, tj) holds cells
+    i // tile_size == ti, j // tile_size == tj in a hash keyed by tile coordinate, so the map grows in any direction and
+    empty space costs nothing. Tiles are indexed [i - ti * tile_size, j - tj * tile_size] (x, y order, not flipped);
+    region reads return DenseGridLayer-oriented arrays.
+    """
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    name: str = "tiled_grid_layer"
+    resolution: float
+    tile_size: int = 256
+    dtype: np.dtype = np.dtype(np.float64)
+    tiles: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def __init__(self, name: str, resolution: float, tile_size: int = 256, dtype: np.dtype = np.float64):
+        super().__init__(name=name, resolution=resolution, tile_size=tile_size, dtype=np.dtype(dtype), tiles={})
+
+    @property
+    def num_tiles(self) -> int:
+        return len(self.tiles)
+
+    @property
+    def nbytes(self) -> int:
+        """ Memory held by allocated tiles. """
+        return sum(tile.nbytes for tile in self.tiles.values())
+
+    @property
+    def bounds(self) -> Optional[np.ndarray]:
+        """ [xmin, ymin, xmax, ymax] covered by allocated tiles, None when empty. """
+        if not self.tiles:
+            return None
+        low, high = self._tile_cell_range()
+        return np.concatenate([low, high]) * self.resolution
+
+    def _tile_cell_range(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ Global cells [first, end) per axis covered by allocated tiles. """
+        keys = np.array(list(self.tiles.keys()), dtype=np.int64)
+        return keys.min(axis=0) * self.tile_size, (keys.max(axis=0) + 1) * self.tile_size
+
+    def xy_to_cells(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Global integer cell coordinates (i, j) of world points; never out of range. """
+        i = np.floor(np.asarray(x) / self.resolution).astype(np.int64)
+        j = np.floor(np.asarray(y) / self.resolution).astype(np.int64)
+        return i, j
+
+    def get_tile(self, tile_x: int, tile_y: int, create: bool = False) -> Optional[np.ndarray]:
+        tile = self.tiles.get((tile_x, tile_y))
+        if tile is None and create:
+            tile = np.zeros((self.tile_size, self.tile_size), dtype=self.dtype)
+            self.tiles[(tile_x, tile_y)] = tile
+        return tile
+
+    def iter_tiles(self) -> Iterator[Tuple[Tuple[int, int], np.ndarray]]:
+        return iter(self.tiles.items())
+
+    def add_points(self, points: np.ndarray, weights: Optional[np.ndarray] = None):
+        """
+        Add one count (or weight) per point to its cell, allocating the tiles that are hit for the first time.
+        Points are grouped by tile with one sort, then each tile is updated with a single scatter-add.
+        """
+        if len(points) == 0:
+            return
+        i, j = self.xy_to_cells(points[:, 0], points[:, 1])
+        tile_x, tile_y = i // self.tile_size, j // self.tile_size
+        keys = (tile_x << _KEY_SHIFT) + (tile_y + _KEY_OFFSET)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        local = (i[order] - tile_x[order] * self.tile_size) * self.tile_size + (j[order] - tile_y[order] * self.tile_size)
+        if weights is not None:
+            weights = np.asarray(weights)[order]
+
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        for start, end in zip(starts, ends):
+            key = int(keys[start])
+            tile = self.get_tile(key >> _KEY_SHIFT, (key & 0xFFFFFFFF) - _KEY_OFFSET, create=True)
+            add_to_cells(tile, local[start:end], None if weights is None else weights[start:end])
+
+    def region_coordinates(self, bounds: np.ndarray) -> GridmapCoordinates:
+        """ GridmapCoordinates of the cell-aligned region enclosing bounds [xmin, ymin, xmax, ymax]. """
+        low, high = bounds_to_cell_range(bounds[:2], bounds[2:4], self.resolution)
+        return cell_aligned_coordinates(int(low[0]), int(low[1]), int(high[0] - low[0]), int(high[1] - low[1]), self.resolution)
+
+    def read_region(self, bounds: np.ndarray) -> np.ndarray:
+        """ Dense copy of the region in DenseGridLayer orientation (see region_coordinates); unallocated cells are 0. """
+        return self.to_dense_layer(bounds).occupancy_data
+
+    def to_dense_layer(self, bounds: Optional[np.ndarray] = None, name: Optional[str] = None) -> DenseGridLayer:
+        """ DenseGridLayer holding the region (all allocated tiles by default). Only allocated tiles overlapping it are read. """
+        if bounds is not None:
+            coordinates = self.region_coordinates(bounds)
+        elif self.tiles:
+            low, high = self._tile_cell_range()
+            coordinates = cell_aligned_coordinates(int(low[0]), int(low[1]), int(high[0] - low[0]), int(high[1] - low[1]), self.resolution)
+        else:
+            coordinates = self.region_coordinates(np.zeros(4))
+        layer = DenseGridLayer(name or self.name, coordinates, dtype=self.dtype)
+        shape = coordinates.gridmap_shape
+        i0 = int(round(coordinates.gridmap_bounds[0] / self.resolution))
+        j0 = int(round(coordinates.gridmap_bounds[1] / self.resolution))
+        i1, j1 = i0 + int(shape[0]), j0 + int(shape[1])
+
+        # Fill in x/y order, then flip both axes into the DenseGridLayer u/v convention (u = shape[0] - 1 - (i - i0))
+        region = np.zeros((int(shape[0]), int(shape[1])), dtype=self.dtype)
+        for (tile_x, tile_y), tile in self.tiles.items():
+            ti0, tj0 = tile_x * self.tile_size, tile_y * self.tile_size
+            ci0, ci1 = max(i0, ti0), min(i1, ti0 + self.tile_size)
+            cj0, cj1 = max(j0, tj0), min(j1, tj0 + self.tile_size)
+            if ci0 >= ci1 or cj0 >= cj1:
+                continue
+            region[ci0 - i0:ci1 - i0, cj0 - j0:cj1 - j0] = tile[ci0 - ti0:ci1 - ti0, cj0 - tj0:cj1 - tj0]
+        layer.occupancy_data[...] = region[::-1, ::-1]
+        return layer
@@ -0,0 +1,193 @@
+from pydantic import BaseModel
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+
+from geometry.gridmap import DenseGridLayer, GridmapCoordinates, add_to_cells, bounds_to_cell_range, cell_aligned_coordinates
+
+# Block keys are packed into one int64, 21 bits per axis (offset so negative block coordinates stay positive)
+_KEY_BITS = 21
+_KEY_MASK = (1 << _KEY_BITS) - 1
+_KEY_OFFSET = 1 << (_KEY_BITS - 1)
+_BAND_REDUCTIONS = ("sum", "max", "count")
+
+
+class VoxelGridLayer(BaseModel):
+    """ Sparse 3D voxel layer stored as cubic blocks allocated on first write.
+    Voxel (i, j, k) covers x in [i * resolution, (i + 1) * resolution), y and z likewise, in the same FLU frame as the
+    2D gridmaps (z up). Block (bi, bj, bk) holds voxels i // block_size == bi etc. in a hash keyed by block coordinate,
+    indexed [i - bi * block_size, j - bj * block_size, k - bk * block_size] (x, y, z order). Height bands are projected
+    to DenseGridLayers (project_to_dense_layer) for use with the 2D tools.
+    """
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    name: str = "voxel_grid_layer"
+    resolution: float
+    block_size: int = 16
+    dtype: np.dtype = np.dtype(np.float32)
+    blocks: Dict[Tuple[int, int, int], np.ndarray] = {}
+
+    def __init__(self, name: str, resolution: float, block_size: int = 16, dtype: np.dtype = np.float32):
+        super().__init__(name=name, resolution=resolution, block_size=block_size, dtype=np.dtype(dtype), blocks={})
+
+    @property
+    def num_blocks(self) -> int:
+        return len(self.blocks)
+
+    @property
+    def nbytes(self) -> int:
+        """ Memory held by allocated blocks. """
+        return sum(block.nbytes for block in self.blocks.values())
+
+    @property
+    def bounds(self) -> Optional[np.ndarray]:
+        """ [xmin, ymin, zmin, xmax, ymax, zmax] covered by allocated blocks, None when empty. """
+        if not self.blocks:
+            return None
+        low, high = self._block_voxel_range()
+        return np.concatenate([low, high]) * self.resolution
+
+    def _block_voxel_range(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ Global voxels [first, end) per axis covered by allocated blocks. """
+        keys = np.array(list(self.blocks.keys()), dtype=np.int64)
+        return keys.min(axis=0) * self.block_size, (keys.max(axis=0) + 1) * self.block_size
+
+    def xyz_to_voxels(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Global integer voxel coordinates (i, j, k) of N x 3 points; never out of range. """
+        voxels = np.floor(np.asarray(points, dtype=np.float64)[:, :3] / self.resolution).astype(np.int64)
+        return voxels[:, 0], voxels[:, 1], voxels[:, 2]
+
+    def get_block(self, block_x: int, block_y: int, block_z: int, create: bool = False) -> Optional[np.ndarray]:
+        block = self.blocks.get((block_x, block_y, block_z))
+        if block is None and create:
+            block = np.zeros((self.block_size,) * 3, dtype=self.dtype)
+            self.blocks[(block_x, block_y, block_z)] = block
+        return block
+
+    def iter_blocks(self) -> Iterator[Tuple[Tuple[int, int, int], np.ndarray]]:
+        return iter(self.blocks.items())
+
+    def _group_by_block(self, points: np.ndarray) -> Iterator[Tuple[Tuple[int, int, int], np.ndarray, np.ndarray]]:
+        """ (block key, point indices, flat voxel indices inside the block) per block hit, from a single sort. """
+        i, j, k = self.xyz_to_voxels(points)
+        size = self.block_size
+        block_x, block_y, block_z = i // size, j // size, k // size
+        keys = (((block_x + _KEY_OFFSET) << (2 * _KEY_BITS)) + ((block_y + _KEY_OFFSET) << _KEY_BITS)
+                + (block_z + _KEY_OFFSET))
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        local = ((i - block_x * size) * size + (j - block_y * size)) * size + (k - block_z * size)
+        local = local[order]
+
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        for start, end in zip(starts, ends):
+            key = int(keys[start])
+            block_key = (
+                (key >> (2 * _KEY_BITS)) - _KEY_OFFSET,
+                ((key >> _KEY_BITS) & _KEY_MASK) - _KEY_OFFSET,
+                (key & _KEY_MASK) - _KEY_OFFSET,
+            )
+            yield block_key, order[start:end], local[start:end]
+
+    def add_points(self, points: np.ndarray, weights: Optional[np.ndarray] = None):
+        """
+        Add one count (or weight) per N x 3 point to its voxel, allocating the blocks that are hit for the first time.
+        Points are grouped by block with one sort, then each block is updated with a single scatter-add.
+        """
+        if len(points) == 0:
+            return
+        if weights is not None:
+            weights = np.asarray(weights)
+        for block_key, point_indices, local in self._group_by_block(points):
+            block = self.get_block(*block_key, create=True)
+            add_to_cells(block, local, None if weights is None else weights[point_indices])
+
+    def values_at(self, points: np.ndarray) -> np.ndarray:
+        """ Voxel values at N x 3 points; 0 in unallocated blocks. """
+        values = np.zeros(len(points), dtype=self.dtype)
+        if len(points) == 0:
+            return values
+        for block_key, point_indices, local in self._group_by_block(points):
+            block = self.blocks.get(block_key)
+            if block is not None:
+                values[point_indices] = block.reshape(-1)[local]
+        return values
+
+    def occupied_voxels(self, min_value: float = 0.0) -> np.ndarray:
+        """ N x 3 centers of the voxels whose value exceeds min_value. """
+        centers = []
+        for (block_x, block_y, block_z), block in self.blocks.items():
+            local = np.argwhere(block > min_value)
+            if len(local) > 0:
+                origin = np.array([block_x, block_y, block_z]) * self.block_size
+                centers.append((local + origin + 0.5) * self.resolution)
+        if not centers:
+            return np.empty((0, 3), dtype=np.float64)
+        return np.concatenate(centers)
+
+    def region_coordinates(self, bounds: np.ndarray) -> GridmapCoordinates:
+        """ GridmapCoordinates of the cell-aligned xy region enclosing bounds [xmin, ymin, xmax, ymax]. """
+        low, high = bounds_to_cell_range(bounds[:2], bounds[2:4], self.resolution)
+        return cell_aligned_coordinates(int(low[0]), int(low[1]), int(high[0] - low[0]), int(high[1] - low[1]), self.resolution)
+
+    def project_to_dense_layer(
+        self,
+        z_min: float,
+        z_max: float,
+        bounds: Optional[np.ndarray] = None,
+        reduction: str = "sum",
+        dtype: Optional[np.dtype] = None,
+        name: Optional[str] = None,
+    ) -> DenseGridLayer:
+        """
+        Collapse the voxels overlapping the height band [z_min, z_max) into a DenseGridLayer, e.g. to drop ground
+        and overhangs before 2D planning. reduction is "sum" (total value per column), "max" or "count" (occupied
+        voxels per column). bounds [xmin, ymin, xmax, ymax] defaults to all allocated blocks; the layer dtype to the
+        voxel dtype for "max" and float64 otherwise. Unallocated voxels count as 0, and only allocated blocks
+        overlapping the band and region are read.
+        """
+        if reduction not in _BAND_REDUCTIONS:
+            raise ValueError(f"reduction must be one of {_BAND_REDUCTIONS}, got {reduction}")
+        if dtype is None:
+            dtype = self.dtype if reduction == "max" else np.float64
+        if bounds is not None:
+            coordinates = self.region_coordinates(bounds)
+        elif self.blocks:
+            low, high = self._block_voxel_range()
+            coordinates = cell_aligned_coordinates(int(low[0]), int(low[1]), int(high[0] - low[0]), int(high[1] - low[1]), self.resolution)
+        else:
+            coordinates = self.region_coordinates(np.zeros(4))
+        layer = DenseGridLayer(name or self.name, coordinates, dtype=dtype)
+        shape = coordinates.gridmap_shape
+        i0 = int(round(coordinates.gridmap_bounds[0] / self.resolution))
+        j0 = int(round(coordinates.gridmap_bounds[1] / self.resolution))
+        i1, j1 = i0 + int(shape[0]), j0 + int(shape[1])
+        k0 = int(np.floor(z_min / self.resolution))
+        k1 = max(int(np.ceil(z_max / self.resolution)), k0 + 1)
+
+        # Accumulate in x/y order, then flip both axes into the DenseGridLayer u/v convention
+        region = np.zeros((int(shape[0]), int(shape[1])), dtype=np.float64)
+        size = self.block_size
+        for (block_x, block_y, block_z), block in self.blocks.items():
+            bi0, bj0, bk0 = block_x * size, block_y * size, block_z * size
+            ci0, ci1 = max(i0, bi0), min(i1, bi0 + size)
+            cj0, cj1 = max(j0, bj0), min(j1, bj0 + size)
+            ck0, ck1 = max(k0, bk0), min(k1, bk0 + size)
+            if ci0 >= ci1 or cj0 >= cj1 or ck0 >= ck1:
+                continue
+            band = block[ci0 - bi0:ci1 - bi0, cj0 - bj0:cj1 - bj0, ck0 - bk0:ck1 - bk0]
+            target = region[ci0 - i0:ci1 - i0, cj0 - j0:cj1 - j0]
+            if reduction == "max":
+                np.maximum(target, band.max(axis=2), out=target)
+            elif reduction == "sum":
+                target += band.sum(axis=2, dtype=np.float64)
+            else:
+                target += np.count_nonzero(band, axis=2)
+        region = region[::-1, ::-1]
+        if np.issubdtype(layer.dtype, np.integer):
+            limits = np.iinfo(layer.dtype)
+            region = np.clip(np.rint(region), limits.min, limits.max)
+        layer.occupancy_data[...] = region
+        return layer
@@ -18,7 +18,7 @@ class TSRBMap(Map):
 
     dense_layer: DenseGridLayer
 
-    def __init__(self, bounds: np.ndarray, padding_x: float = 1.0, padding_y: float = 1.0, resolution: float = 0.1, odometry_data: Optional[List[np.ndarray]] = None):
+    def __init__(self, bounds: np.ndarray, padding_x: float = 1.0, padding_y: float = 1.0, resolution: float = 0.1, odometry_data: Optional[List[np.ndarray]] = None, dtype: np.dtype = np.float64, storage_path: Optional[str] = None):
         if padding_x is not None:
             bounds[0] -= padding_x
             bounds[2] += padding_x
@@ -28,7 +28,8 @@ class TSRBMap(Map):
         
         name = "tsrb_map"
 
-        dense_layer = DenseGridLayer(name, GridmapCoordinates(bounds, resolution))
+        # dtype / storage_path select compact or file-backed cells, see DenseGridLayer
+        dense_layer = DenseGridLayer(name, GridmapCoordinates(bounds, resolution), dtype=dtype, storage_path=storage_path)
 
         BaseModel.__init__(
             self,
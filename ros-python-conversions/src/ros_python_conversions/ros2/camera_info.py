@@ -0,0 +1,206 @@
+"""``sensor_msgs/CameraInfo`` conversion and image rectification with cached remap tables."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+from pydantic import BaseModel
+
+from data_models.core.base_metadata import BaseMetadata
+from data_models.core.construct import construct_unchecked
+from data_models.impl.camera_info_instance import CameraInfoInstance
+from data_models.impl.image_instance import ImageInstance
+
+from ros_python_conversions.ros2.time import time_to_timestamp
+
+# Remap tables per (calibration, output size); a 1080p table pair is ~12 MB
+_MAX_CACHED_MAPS = 8
+_rectify_maps: "OrderedDict[Tuple[Any, ...], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+_rectify_maps_lock = threading.Lock()
+
+_FISHEYE_MODELS = ("equidistant", "fisheye")
+
+
+# CAMERA INFO MESSAGE -> CAMERA INFO INSTANCE
+
+def camera_info_msg_to_camera_info_instance(msg: Any, instance_index: int = -1, timestamp: float = 0.0, use_header: bool = False) -> CameraInfoInstance:
+    """Convert a ``sensor_msgs/msg/CameraInfo`` to a ``CameraInfoInstance``.
+
+    Parameters
+    ----------
+    msg : Any
+        ROS2 CameraInfo message.
+    instance_index : int
+        Index for this instance (default: -1).
+    timestamp : float
+        Timestamp to use if use_header is False.
+    use_header : bool
+        Whether to use header timestamp from message.
+
+    Returns
+    -------
+    CameraInfoInstance
+        Calibration with float64 ``K``, ``D``, ``R`` and ``P``.
+    """
+    if use_header:
+        timestamp = time_to_timestamp(msg.header.stamp)
+    return construct_unchecked(
+        CameraInfoInstance,
+        width=int(msg.width),
+        height=int(msg.height),
+        distortion_model=str(msg.distortion_model),
+        K=np.asarray(msg.k, dtype=np.float64).reshape(3, 3),
+        D=np.asarray(msg.d, dtype=np.float64).reshape(-1),
+        R=np.asarray(msg.r, dtype=np.float64).reshape(3, 3),
+        P=np.asarray(msg.p, dtype=np.float64).reshape(3, 4),
+        metadata=construct_unchecked(BaseMetadata, timestamp=float(timestamp), index=int(instance_index)),
+    )
+
+
+# RECTIFICATION
+
+def get_rectification_maps(camera_info: CameraInfoInstance, width: int, height: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Remap tables from ``width x height`` raw images to rectified images of the same size.
+
+    Parameters
+    ----------
+    camera_info : CameraInfoInstance
+        Calibration; rescaled when ``width`` / ``height`` differ from its size.
+    width : int
+        Image width.
+    height : int
+        Image height.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Fixed-point ``CV_16SC2`` / ``CV_16UC1`` maps for ``cv2.remap``. Built with
+        ``cv2.initUndistortRectifyMap`` (``cv2.fisheye`` for ``equidistant``) once
+        per calibration and size, then shared by all callers and threads.
+
+    Raises
+    ------
+    ValueError
+        If the camera is uncalibrated (``K`` all zeros).
+    """
+    if not camera_info.is_calibrated:
+        raise ValueError("Cannot rectify with an uncalibrated CameraInfo (K is zero)")
+    camera_info = camera_info.scaled(width, height)
+    key = (
+        camera_info.distortion_model,
+        camera_info.K.tobytes(),
+        camera_info.D.tobytes(),
+        camera_info.R.tobytes(),
+        camera_info.P.tobytes(),
+        width,
+        height,
+    )
+    with _rectify_maps_lock:
+        maps = _rectify_maps.get(key)
+        if maps is not None:
+            _rectify_maps.move_to_end(key)
+            return maps
+
+    # Rectified camera matrix from P; falls back to K for monocular calibrations without P
+    new_camera_matrix = camera_info.P[:, :3] if camera_info.P[0, 0] != 0.0 else camera_info.K
+    if camera_info.distortion_model in _FISHEYE_MODELS:
+        maps = cv2.fisheye.initUndistortRectifyMap(
+            camera_info.K, camera_info.D[:4], camera_info.R, new_camera_matrix, (width, height), cv2.CV_16SC2
+        )
+    else:
+        maps = cv2.initUndistortRectifyMap(
+            camera_info.K, camera_info.D, camera_info.R, new_camera_matrix, (width, height), cv2.CV_16SC2
+        )
+
+    with _rectify_maps_lock:
+        _rectify_maps[key] = maps
+        while len(_rectify_maps) > _MAX_CACHED_MAPS:
+            _rectify_maps.popitem(last=False)
+    return maps
+
+
+class ImageRectifier(BaseModel):
+    """Undistort and rectify images with one ``cv2.remap`` per frame.
+
+    Attributes
+    ----------
+    camera_info : CameraInfoInstance
+        Calibration of the raw images; images decoded at reduced size use a
+        rescaled calibration.
+    interpolation : int
+        ``cv2.remap`` interpolation flag.
+    reuse_buffer : bool
+        Write every frame into the same output array. Each returned instance is
+        then only valid until the next frame, and calls must come from one
+        thread; batch reads use ``without_buffer_reuse()`` instead.
+    """
+
+    camera_info : CameraInfoInstance
+    interpolation : int = cv2.INTER_LINEAR
+    reuse_buffer : bool = False
+    buffer : Optional[np.ndarray] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def rectify(self, image: np.ndarray) -> np.ndarray:
+        """Rectify a BGR ``(H, W, 3)`` or gray ``(H, W)`` image.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Raw image (not planar yuv420p, whose rows are not image rows).
+
+        Returns
+        -------
+        np.ndarray
+            Rectified image of the same shape and dtype.
+        """
+        height, width = image.shape[:2]
+        map1, map2 = get_rectification_maps(self.camera_info, width, height)
+        out = None
+        if self.reuse_buffer and self.buffer is not None and self.buffer.shape == image.shape and self.buffer.dtype == image.dtype:
+            out = self.buffer
+        out = cv2.remap(image, map1, map2, self.interpolation, dst=out)
+        if self.reuse_buffer:
+            self.buffer = out
+        return out
+
+    def __call__(self, instance: ImageInstance) -> ImageInstance:
+        return construct_unchecked(ImageInstance, data=self.rectify(instance.data), metadata=instance.metadata)
+
+    def without_buffer_reuse(self) -> "ImageRectifier":
+        """Same rectification into a fresh array per frame, safe for concurrent and batch use."""
+        return ImageRectifier(camera_info=self.camera_info, interpolation=self.interpolation)
+
+
+class RectifyingImageDecoder(BaseModel):
+    """``decode_fn`` that rectifies each decoded image, so batch decode workers also remap.
+
+    Attributes
+    ----------
+    decode_fn : Callable
+        Image ``decode_fn`` (e.g. ``any_image_msg_to_image_instance`` or an ``ImageDecoder``).
+    rectifier : ImageRectifier
+        Calibration, interpolation and output buffer policy. With
+        ``reuse_buffer``, ``Ros2DataStream`` batch reads decode with
+        ``without_buffer_reuse()`` so pool workers never share the output array.
+    """
+
+    decode_fn : Callable[..., ImageInstance]
+    rectifier : ImageRectifier
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def __call__(self, msg: Any, instance_index: int = -1, timestamp: float = 0.0, use_header: bool = False) -> ImageInstance:
+        return self.rectifier(self.decode_fn(msg, instance_index, timestamp, use_header))
+
+    @property
+    def reuse_buffer(self) -> bool:
+        return self.rectifier.reuse_buffer
+
+    def without_buffer_reuse(self) -> "RectifyingImageDecoder":
+        return RectifyingImageDecoder(decode_fn=self.decode_fn, rectifier=self.rectifier.without_buffer_reuse())
@@ -2,55 +2,161 @@
 
 from __future__ import annotations
 
-from typing import Any
+from functools import lru_cache
+from typing import Any, Optional, Tuple
 
 import numpy as np
+from pydantic import BaseModel, validator
 
 from data_models.core.base_metadata import BaseMetadata
-from data_models.impl.image_instance import ImageInstance
+from data_models.core.construct import construct_unchecked
+from data_models.impl.depth_image_instance import DepthImageInstance
 
+from ros_python_conversions.ros2.image_buffer import image_msg_to_ndarray
 from ros_python_conversions.ros2.time import time_to_timestamp
 
-from cv_bridge import CvBridge
+_MM_ENCODINGS = ("16uc1", "mono16")
+_DEPTH_DTYPES = ("float32", "float16", "uint16")
 
-_bridge = None
 
+class DepthConversionOptions(BaseModel):
+    """How raw depth is turned into ``DepthImageInstance.data``.
 
-def _get_bridge() -> CvBridge:
-    """Get or create CvBridge instance (lazy-loaded).
-
-    Returns
-    -------
-    CvBridge
-        Shared bridge instance.
+    Attributes
+    ----------
+    dtype : str
+        ``float32`` / ``float16`` meters, or ``uint16`` kept in millimeters
+        (``depth_scale`` 0.001), which halves memory traffic for ``16UC1``.
+    min_depth : Optional[float]
+        Lower validity bound in meters; enables masking.
+    max_depth : Optional[float]
+        Upper validity bound in meters; enables masking.
+    clamp : bool
+        Clip out-of-range depth to the bounds instead of invalidating it.
+    invalid_value : float
+        Output value (in meters) for zero, non-finite and out-of-range depth
+        when masking; ``nan`` is only representable in float outputs.
     """
-    global _bridge
-    if _bridge is None:
-        _bridge = CvBridge()
-    return _bridge
 
+    dtype : str = "float32"
+    min_depth : Optional[float] = None
+    max_depth : Optional[float] = None
+    clamp : bool = False
+    invalid_value : float = 0.0
+
+    @validator("dtype")
+    def _check_dtype(cls, value: str) -> str:
+        if value not in _DEPTH_DTYPES:
+            raise ValueError(f"dtype must be one of {_DEPTH_DTYPES}, got {value!r}")
+        return value
+
+    @property
+    def masked(self) -> bool:
+        return self.min_depth is not None or self.max_depth is not None
+
+
+def _raw_depth_scale(encoding: str) -> float:
+    """Meters per raw unit: ``16UC1`` / ``mono16`` are millimeters, others meters."""
+    enc = encoding.lower().replace(" ", "")
+    return 0.001 if enc in _MM_ENCODINGS else 1.0
 
-def _depth_to_float32(depth: np.ndarray, encoding: str) -> np.ndarray:
-    """Map raw depth array to float32 (encoding-based scale only).
+
+def _mask_meters(meters: np.ndarray, options: DepthConversionOptions) -> np.ndarray:
+    """Apply validity bounds to float depth in meters, in place."""
+    lo = -np.inf if options.min_depth is None else options.min_depth
+    hi = np.inf if options.max_depth is None else options.max_depth
+    invalid = ~np.isfinite(meters) | (meters <= 0)
+    if options.clamp:
+        np.clip(meters, lo, hi, out=meters)
+    else:
+        invalid |= (meters < lo) | (meters > hi)
+    meters[invalid] = options.invalid_value
+    return meters
+
+
+@lru_cache(maxsize=16)
+def _uint16_lut(raw_scale: float, options_key: str) -> np.ndarray:
+    """Lookup table mapping every uint16 raw value to the masked/scaled output."""
+    options = DepthConversionOptions.parse_raw(options_key)
+    meters = _mask_meters(np.arange(65536, dtype=np.float64) * raw_scale, options)
+    if options.dtype == "uint16":
+        return np.clip(np.rint(meters / 0.001), 0, 65535).astype(np.uint16)
+    return meters.astype(options.dtype)
+
+
+def convert_depth(
+    depth: np.ndarray,
+    encoding: str,
+    options: Optional[DepthConversionOptions] = None,
+    out: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, float]:
+    """Scale, cast and optionally mask raw depth, writing into ``out`` if given.
 
     Parameters
     ----------
     depth : ndarray
-        Raw image from ``imgmsg_to_cv2(..., passthrough)``.
+        Raw ``(H, W)`` depth in the message encoding.
     encoding : str
         ``msg.encoding``.
+    options : DepthConversionOptions, optional
+        Output dtype and masking; defaults to float32 meters, no masking.
+    out : ndarray, optional
+        Reusable output buffer of the target shape and dtype; allocated if None
+        or mismatched.
 
     Returns
     -------
-    ndarray
-        float32, same shape. ``16UC1`` / ``mono16`` scaled by ``0.001`` (mm→m);
-        all other encodings cast only.
+    tuple
+        ``(data, depth_scale)`` with ``depth_scale`` in meters per unit of ``data``.
+
+    Notes
+    -----
+    Every path is a single pass over the frame: ``np.multiply`` with an
+    output dtype for plain scaling, and for 16-bit sources with masking a
+    cached 65536-entry lookup table (``np.take``) that applies scale,
+    bounds and invalid value together. Without ``out`` and without any
+    change needed (``16UC1`` to ``uint16``, ``32FC1`` to ``float32``) the
+    input is returned as is.
     """
-    enc = encoding.lower().replace(" ", "")
-    out = depth.astype(np.float32, copy=False)
-    if enc in ("16uc1", "mono16"):
-        return np.multiply(out, 0.001, dtype=np.float32)
-    return np.asarray(out, dtype=np.float32, order="C")
+    if options is None:
+        options = DepthConversionOptions()
+    raw_scale = _raw_depth_scale(encoding)
+    out_dtype = np.dtype(options.dtype)
+    out_scale = 0.001 if out_dtype.kind == "u" else 1.0
+    if out is not None and (out.shape != depth.shape or out.dtype != out_dtype):
+        out = None
+
+    if depth.dtype == np.uint16 and options.masked:
+        lut = _uint16_lut(raw_scale, options.json())
+        if out is None:
+            out = np.empty(depth.shape, dtype=out_dtype)
+        np.take(lut, depth, out=out)
+        return out, out_scale
+
+    factor = raw_scale / out_scale
+    if factor == 1.0 and depth.dtype == out_dtype and not options.masked:
+        if out is None:
+            return depth, out_scale
+        np.copyto(out, depth)
+        return out, out_scale
+
+    if out_dtype.kind == "u":
+        meters = np.multiply(depth, raw_scale, dtype=np.float32)
+        if options.masked:
+            _mask_meters(meters, options)
+        if out is None:
+            out = np.empty(depth.shape, dtype=out_dtype)
+        np.clip(np.rint(meters / out_scale, out=meters), 0, 65535, out=meters)
+        np.copyto(out, meters, casting="unsafe")
+        return out, out_scale
+
+    if out is None:
+        out = np.empty(depth.shape, dtype=out_dtype)
+    # Computed in float32 and cast on store, so float16 output needs no temporary
+    np.multiply(depth, factor, out=out, dtype=np.float32, casting="unsafe")
+    if options.masked:
+        _mask_meters(out, options)
+    return out, out_scale
 
 
 def depth_image_msg_to_image_instance(
@@ -58,12 +164,15 @@ def depth_image_msg_to_image_instance(
     instance_index: int = -1,
     timestamp: float = 0.0,
     use_header: bool = False,
-) -> ImageInstance:
-    """Convert a depth ``sensor_msgs/msg/Image`` to a 2D float depth grid.
+    options: Optional[DepthConversionOptions] = None,
+    out: Optional[np.ndarray] = None,
+    writable: bool = False,
+) -> DepthImageInstance:
+    """Convert a depth ``sensor_msgs/msg/Image`` to a 2D depth grid.
 
-    No validity masking: values are whatever the message contains. Only
-    ``16UC1`` / ``mono16`` get a fixed mm→m scale; other encodings are cast to
-    float32 as-is.
+    By default there is no validity masking: values are whatever the message
+    contains. Only ``16UC1`` / ``mono16`` get a fixed mm→m scale; other
+    encodings are cast to float32 as-is.
 
     Parameters
     ----------
@@ -75,21 +184,36 @@ def depth_image_msg_to_image_instance(
         Timestamp in seconds if ``use_header`` is False, by default 0.0.
     use_header : bool, optional
         If True, use ``msg.header.stamp`` for metadata timestamp, by default False.
+    options : DepthConversionOptions, optional
+        Output dtype (float32 / float16 / uint16 mm) and validity masking.
+    out : ndarray, optional
+        Reusable output buffer, see ``convert_depth``.
+    writable : bool, optional
+        Copy ``data`` when it would be a read-only view of ``msg.data``, by
+        default False.
 
     Returns
     -------
-    ImageInstance
-        ``data`` is float32, shape ``(H, W)``.
+    DepthImageInstance
+        ``data`` is ``(H, W)`` in ``options.dtype`` (float32 by default);
+        ``depth_scale`` gives meters per unit. ``32FC1`` (or ``16UC1`` to
+        uint16) input that needs no conversion is a view of ``msg.data``,
+        read-only for rosbags messages unless ``writable``.
     """
     if use_header:
         timestamp = time_to_timestamp(msg.header.stamp)
-    bridge = _get_bridge()
-    depth = bridge.imgmsg_to_cv2(msg, desired_encoding="passthrough")
+    depth = image_msg_to_ndarray(msg)
     enc = getattr(msg, "encoding", "") or ""
-    out = _depth_to_float32(depth, enc)
-    return ImageInstance(
-        data=out,
-        metadata=BaseMetadata(timestamp=timestamp, index=instance_index),
+    data, depth_scale = convert_depth(depth, enc, options=options, out=out)
+    if writable and not data.flags.writeable:
+        data = data.copy()
+    return construct_unchecked(
+        DepthImageInstance,
+        data=data,
+        depth_scale=depth_scale,
+        metadata=construct_unchecked(
+            BaseMetadata, timestamp=float(timestamp), index=int(instance_index)
+        ),
     )
 
 
@@ -98,8 +222,11 @@ def any_depth_image_msg_to_image_instance(
     instance_index: int = -1,
     timestamp: float = 0.0,
     use_header: bool = False,
-) -> ImageInstance:
-    """Decode a depth image message to a float32 ``ImageInstance``.
+    options: Optional[DepthConversionOptions] = None,
+    out: Optional[np.ndarray] = None,
+    writable: bool = False,
+) -> DepthImageInstance:
+    """Decode a depth image message to a ``DepthImageInstance``.
 
     Parameters
     ----------
@@ -111,11 +238,17 @@ def any_depth_image_msg_to_image_instance(
         Timestamp when not using header, by default 0.0.
     use_header : bool, optional
         Use message header stamp when True, by default False.
+    options : DepthConversionOptions, optional
+        Output dtype and masking, by default float32 meters, unmasked.
+    out : ndarray, optional
+        Reusable output buffer.
+    writable : bool, optional
+        Never return a read-only view of ``msg.data``, by default False.
 
     Returns
     -------
-    ImageInstance
-        Float32 ``(H, W)``; see ``depth_image_msg_to_image_instance``.
+    DepthImageInstance
+        ``(H, W)`` depth; see ``depth_image_msg_to_image_instance``.
 
     Raises
     ------
@@ -129,5 +262,58 @@ def any_depth_image_msg_to_image_instance(
             instance_index=instance_index,
             timestamp=timestamp,
             use_header=use_header,
+            options=options,
+            out=out,
+            writable=writable,
         )
     raise ValueError(f"Unsupported depth image message type: {mt}")
+
+
+class DepthImageDecoder(BaseModel):
+    """``decode_fn`` for depth streams with fixed options and an optional reused buffer.
+
+    Attributes
+    ----------
+    options : DepthConversionOptions
+        Output dtype and masking applied to every frame.
+    reuse_buffer : bool
+        Write every frame into the same output array. Each returned instance is
+        then only valid until the next decode, and calls must come from one
+        thread; batch reads (``Ros2DataStream.get_instances`` /
+        ``iterate_chunks``) decode with ``without_buffer_reuse()`` instead.
+    writable : bool
+        Copy frames that would be read-only views of ``msg.data`` (passthrough
+        ``32FC1`` / ``16UC1``), for callers that modify depth in place.
+    """
+
+    options : DepthConversionOptions = DepthConversionOptions()
+    reuse_buffer : bool = False
+    writable : bool = False
+    buffer : Optional[np.ndarray] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def __call__(
+        self,
+        msg: Any,
+        instance_index: int = -1,
+        timestamp: float = 0.0,
+        use_header: bool = False,
+    ) -> DepthImageInstance:
+        instance = any_depth_image_msg_to_image_instance(
+            msg,
+            instance_index=instance_index,
+            timestamp=timestamp,
+            use_header=use_header,
+            options=self.options,
+            out=self.buffer,
+            writable=self.writable,
+        )
+        if self.reuse_buffer and instance.data.base is None:
+            self.buffer = instance.data
+        return instance
+
+    def without_buffer_reuse(self) -> "DepthImageDecoder":
+        """Same conversion into a fresh array per frame, safe for concurrent and batch decoding."""
+        return DepthImageDecoder(options=self.options, writable=self.writable)
@@ -3,12 +3,17 @@
 from __future__ import annotations
 
 import io
+import os
 import re
 import subprocess
-from typing import Any, List, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 import numpy as np
 
+from ros_python_conversions.ros2.image_buffer import ImageDecodeOptions, convert_bgr
+
 _FFMPEG_MSG = "ffmpeg_image_transport_msgs/msg/FFMPEGPacket"
 
 
@@ -153,6 +158,137 @@ def _encoding_to_codec_name(encoding: str) -> str:
     return "h264"
 
 
+# ImageDecodeOptions.pixel_format -> libswscale output format
+_SWS_PIXEL_FORMATS = {"bgr": "bgr24", "gray": "gray", "yuv420p": "yuv420p"}
+
+# Maximum frame reordering (decoded picture buffer size) of H.264 / HEVC
+_MAX_REORDER = 16
+
+# NAL unit types: H.264 IDR / SPS, PPS; HEVC BLA + IDR / VPS, SPS, PPS
+_H264_KEYFRAME_NALS = frozenset((5,))
+_H264_PARAM_SET_NALS = frozenset((7, 8))
+_HEVC_KEYFRAME_NALS = frozenset(range(16, 21))
+_HEVC_PARAM_SET_NALS = frozenset((32, 33, 34))
+
+
+def _split_annex_b_nals(data: bytes) -> List[bytes]:
+    """Split an Annex B chunk into NAL units (start codes removed).
+
+    Parameters
+    ----------
+    data : bytes
+        Annex B bytes (3- or 4-byte start codes).
+
+    Returns
+    -------
+    list of bytes
+        NAL units in order, each starting with its NAL header.
+    """
+    nals: List[bytes] = []
+    start = data.find(b"\x00\x00\x01")
+    while start >= 0:
+        begin = start + 3
+        nxt = data.find(b"\x00\x00\x01", begin)
+        end = len(data) if nxt < 0 else nxt
+        # A 4-byte start code leaves its leading zero on the previous NAL
+        while nxt >= 0 and end > begin and data[end - 1] == 0:
+            end -= 1
+        if end > begin:
+            nals.append(data[begin:end])
+        start = nxt
+    return nals
+
+
+def _nal_unit_type(nal: bytes, codec_name: str) -> int:
+    if codec_name == "hevc":
+        return (nal[0] >> 1) & 0x3F
+    return nal[0] & 0x1F
+
+
+def parse_keyframe(data: Any, codec_name: str) -> Tuple[bool, bytes]:
+    """Inspect one ``FFMPEGPacket.data`` for a random-access point.
+
+    Parameters
+    ----------
+    data : Any
+        Packet payload (Annex B or length-prefixed).
+    codec_name : str
+        ``h264`` or ``hevc``.
+
+    Returns
+    -------
+    tuple
+        ``(is_keyframe, parameter_sets)``: whether the packet holds an IDR
+        (H.264) / IDR or BLA (HEVC) picture, and its SPS/PPS (and VPS) NAL
+        units as Annex B bytes (empty if it carries none).
+    """
+    payload = _ensure_annex_b_fragment(_msg_data_bytes(data))
+    if codec_name == "hevc":
+        keyframe_nals, param_set_nals = _HEVC_KEYFRAME_NALS, _HEVC_PARAM_SET_NALS
+    else:
+        keyframe_nals, param_set_nals = _H264_KEYFRAME_NALS, _H264_PARAM_SET_NALS
+    is_keyframe = False
+    param_sets = bytearray()
+    for nal in _split_annex_b_nals(payload):
+        nal_type = _nal_unit_type(nal, codec_name)
+        if nal_type in keyframe_nals:
+            is_keyframe = True
+        elif nal_type in param_set_nals:
+            param_sets.extend(b"\x00\x00\x00\x01")
+            param_sets.extend(nal)
+    return is_keyframe, bytes(param_sets)
+
+
+class KeyframeIndex(NamedTuple):
+    """Random-access points of an ``FFMPEGPacket`` stream.
+
+    Attributes
+    ----------
+    codec_name : str
+        ``h264`` or ``hevc``.
+    keyframes : ndarray
+        Sorted message indices of keyframes, always starting with 0.
+    headers : dict
+        Annex B parameter sets to prepend when decoding starts at a keyframe
+        whose packet does not carry its own.
+    """
+
+    codec_name: str
+    keyframes: np.ndarray
+    headers: Dict[int, bytes]
+
+
+def index_keyframes(msgs: Iterable[Any], codec_name: Optional[str] = None) -> KeyframeIndex:
+    """Scan ``FFMPEGPacket`` messages once for keyframes and parameter sets.
+
+    Parameters
+    ----------
+    msgs : iterable of Any
+        Deserialized ``FFMPEGPacket`` messages in bag order; consumed lazily.
+    codec_name : str, optional
+        ``h264`` or ``hevc``; taken from the first message's encoding if None.
+
+    Returns
+    -------
+    KeyframeIndex
+        Keyframe message indices and the parameter sets in force at each.
+    """
+    keyframes: List[int] = [0]
+    headers: Dict[int, bytes] = {}
+    param_sets = b""
+    for i, msg in enumerate(msgs):
+        if codec_name is None:
+            codec_name = _encoding_to_codec_name(_as_str(msg.encoding))
+        is_keyframe, packet_param_sets = parse_keyframe(msg.data, codec_name)
+        if is_keyframe and i > 0:
+            keyframes.append(i)
+            if not packet_param_sets:
+                headers[i] = param_sets
+        if packet_param_sets:
+            param_sets = packet_param_sets
+    return KeyframeIndex(codec_name or "h264", np.asarray(keyframes, dtype=np.int64), headers)
+
+
 def _demux_all_bgr(raw: bytes, codec_name: str) -> List[np.ndarray]:
     """Decode concatenated elementary stream to BGR frames.
 
@@ -178,6 +314,7 @@ def _demux_all_bgr(raw: bytes, codec_name: str) -> List[np.ndarray]:
     fmt = "h264" if codec_name == "h264" else "hevc"
     container = av.open(io.BytesIO(raw), format=fmt, mode="r")
     try:
+        container.streams.video[0].thread_type = "AUTO"
         out: List[np.ndarray] = []
         for packet in container.demux(video=0):
             for frame in packet.decode():
@@ -187,9 +324,170 @@ def _demux_all_bgr(raw: bytes, codec_name: str) -> List[np.ndarray]:
         container.close()
 
 
+def _require_av() -> Any:
+    try:
+        import av
+    except ImportError as err:
+        raise ImportError(
+            "Decoding FFMPEGPacket requires PyAV. Install with: pip install av"
+        ) from err
+    return av
+
+
+class FfmpegPacketDecoder:
+    """Incremental ``FFMPEGPacket`` decoder around one persistent PyAV codec context.
+
+    Each bag message is one encoded access unit; ``decode`` feeds it to the
+    codec and returns whatever frames the codec emits (possibly none while it
+    buffers reordered frames), ``flush`` drains the remainder at end of stream.
+    Only frames handed out by these calls are ever held in memory.
+
+    Packets are tagged with their message index as PTS, which the codec
+    carries through reordering, so every frame is returned together with the
+    index of the message it was coded in.
+
+    Parameters
+    ----------
+    codec_name : str
+        ``h264`` or ``hevc``.
+    thread_type : str
+        libavcodec threading: ``AUTO`` (frame and slice), ``FRAME``, ``SLICE``
+        or ``NONE``. Frame threading delays output by up to one frame per thread.
+    thread_count : int
+        Decoder threads; 0 lets libavcodec pick one per core.
+    options : ImageDecodeOptions, optional
+        Output scale and pixel format, applied in the single ``sws_scale``
+        pass that converts the decoded picture; full-size BGR if None.
+    """
+
+    def __init__(
+        self,
+        codec_name: str,
+        thread_type: str = "AUTO",
+        thread_count: int = 0,
+        options: Optional[ImageDecodeOptions] = None,
+    ) -> None:
+        av = _require_av()
+        self._av = av
+        self.codec_name = codec_name
+        self.options = options
+        self._ctx = av.CodecContext.create(codec_name, "r")
+        if thread_type != "NONE":
+            self._ctx.thread_type = thread_type
+            self._ctx.thread_count = thread_count
+        else:
+            self._ctx.thread_count = 1
+        if options is not None and options.keyframes_only:
+            self._ctx.skip_frame = "NONKEY"
+
+    @property
+    def max_delay(self) -> int:
+        """Packets that may be fed after a message before its frame comes out."""
+        if self._ctx.thread_count == 1 or self._ctx.thread_type.name == "SLICE":
+            return _MAX_REORDER
+        # thread_count is 0 until the codec opens; libavcodec caps automatic threads at 16
+        return _MAX_REORDER + (self._ctx.thread_count or 16)
+
+    def _to_arrays(self, frames: Any) -> List[Tuple[Optional[int], np.ndarray]]:
+        if self.options is None:
+            return [(frame.pts, frame.to_ndarray(format="bgr24")) for frame in frames]
+        out = []
+        for frame in frames:
+            width, height = self.options.output_size(frame.width, frame.height)
+            array = frame.to_ndarray(
+                width=width,
+                height=height,
+                format=_SWS_PIXEL_FORMATS[self.options.pixel_format],
+                interpolation="AREA",
+            )
+            out.append((frame.pts, array))
+        return out
+
+    def decode(
+        self, msg: Any, index: Optional[int] = None, header: bytes = b""
+    ) -> List[Tuple[Optional[int], np.ndarray]]:
+        """Feed one ``FFMPEGPacket`` and return the BGR frames it completes.
+
+        Parameters
+        ----------
+        msg : Any
+            Deserialized ``FFMPEGPacket``.
+        index : int, optional
+            Message index of ``msg``, passed through the codec as PTS.
+        header : bytes, optional
+            Annex B parameter sets to prepend, e.g. when starting at a
+            keyframe whose SPS/PPS were sent earlier in the stream.
+
+        Returns
+        -------
+        list of tuple
+            Zero or more ``(index, frame)`` pairs in output order: the message
+            index each BGR uint8 frame was coded in (None if no index was
+            given). Corrupt packets yield no frames instead of raising, as the
+            ``ffmpeg`` CLI does.
+        """
+        payload = _ensure_annex_b_fragment(_msg_data_bytes(msg.data))
+        if not payload:
+            return []
+        payload = header + payload
+        # Copy into a libavcodec-owned buffer: frame threads must be able to
+        # release packets without the GIL (a bytes-backed packet can deadlock
+        # avcodec_free_context).
+        packet = self._av.Packet(len(payload))
+        memoryview(packet)[:] = payload
+        packet.pts = index
+        try:
+            return self._to_arrays(self._ctx.decode(packet))
+        except self._av.error.FFmpegError:
+            return []
+
+    def flush(self) -> List[Tuple[Optional[int], np.ndarray]]:
+        """Drain frames still buffered in the codec (call once at end of stream)."""
+        try:
+            return self._to_arrays(self._ctx.decode(None))
+        except self._av.error.FFmpegError:
+            return []
+
+
+def _frames_by_message(indexed: List[Tuple[Optional[int], np.ndarray]], n: int) -> Optional[List[np.ndarray]]:
+    """Place frames at the message they were decoded from.
+
+    Parameters
+    ----------
+    indexed : list of tuple
+        ``(message_index, frame)`` pairs from ``FfmpegPacketDecoder``.
+    n : int
+        Number of bag messages.
+
+    Returns
+    -------
+    list of ndarray or None
+        Length ``n``. Messages without a frame (dropped or corrupt packets)
+        reference the previous message's frame, or the first decoded frame
+        before any was decoded. None if no frame carries a valid index.
+    """
+    by_index: List[Optional[np.ndarray]] = [None] * n
+    for index, frame in indexed:
+        if index is not None and 0 <= index < n:
+            by_index[index] = frame
+    first = next((frame for frame in by_index if frame is not None), None)
+    if first is None:
+        return None
+    previous = first
+    for i, frame in enumerate(by_index):
+        if frame is None:
+            by_index[i] = previous
+        else:
+            previous = frame
+    return by_index
+
+
 def _align_frame_list_to_msg_count(frames: List[np.ndarray], n: int) -> List[np.ndarray]:
     """Stretch or shrink decoded frame list to match message count.
 
+    Used when frames cannot be traced to their messages (container demux,
+    ``ffmpeg`` CLI).
+
     Parameters
     ----------
     frames : list of ndarray
@@ -200,7 +498,7 @@ def _align_frame_list_to_msg_count(frames: List[np.ndarray], n: int) -> List[np.
     Returns
     -------
     list of ndarray
-        Length ``n``.
+        Length ``n``; missing trailing frames reference the last frame.
     """
     if not frames:
         raise ValueError("Demux produced no frames")
@@ -208,8 +506,78 @@ def _align_frame_list_to_msg_count(frames: List[np.ndarray], n: int) -> List[np.
         return frames
     if len(frames) > n:
         return list(frames[:n])
-    pad = frames[-1]
-    return list(frames) + [pad.copy() for _ in range(n - len(frames))]
+    return list(frames) + [frames[-1]] * (n - len(frames))
+
+
+def _decode_segment(
+    msgs: List[Any],
+    start: int,
+    stop: int,
+    codec_name: str,
+    header: bytes,
+    thread_count: int,
+    options: Optional[ImageDecodeOptions],
+) -> List[Tuple[Optional[int], np.ndarray]]:
+    decoder = FfmpegPacketDecoder(codec_name, thread_count=thread_count, options=options)
+    indexed: List[Tuple[Optional[int], np.ndarray]] = []
+    for i in range(start, stop):
+        indexed.extend(decoder.decode(msgs[i], index=i, header=header if i == start else b""))
+    indexed.extend(decoder.flush())
+    return indexed
+
+
+def decode_segments_parallel(
+    msgs: List[Any],
+    index: Optional[KeyframeIndex] = None,
+    max_workers: Optional[int] = None,
+    options: Optional[ImageDecodeOptions] = None,
+) -> Optional[List[np.ndarray]]:
+    """Decode the GOPs of an ``FFMPEGPacket`` stream concurrently.
+
+    Each keyframe-to-keyframe segment is decoded by its own codec context in a
+    thread pool (PyAV releases the GIL while decoding) and the frames are put
+    back at the messages they were coded in.
+
+    Parameters
+    ----------
+    msgs : list of Any
+        Deserialized ``FFMPEGPacket`` messages in bag order, each one access unit.
+    index : KeyframeIndex, optional
+        Keyframe index of ``msgs``; built with ``index_keyframes`` if None.
+    max_workers : int, optional
+        Worker threads; defaults to one per CPU. With a single worker or a
+        single segment, the codec's own frame/slice threading is used instead.
+    options : ImageDecodeOptions, optional
+        Output scale and pixel format; full-size BGR if None.
+
+    Returns
+    -------
+    list of ndarray or None
+        uint8 frames, length ``len(msgs)`` (messages without a frame
+        reference the previous one), or None if nothing decoded.
+    """
+    if index is None:
+        index = index_keyframes(msgs)
+    bounds = [int(k) for k in index.keyframes if 0 <= k < len(msgs)] + [len(msgs)]
+    segments = list(zip(bounds[:-1], bounds[1:]))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    workers = min(max_workers, len(segments))
+
+    def run(segment: Tuple[int, int]) -> List[Tuple[Optional[int], np.ndarray]]:
+        start, stop = segment
+        # Leave the cores to the pool rather than oversubscribing with codec threads
+        return _decode_segment(
+            msgs, start, stop, index.codec_name, index.headers.get(start, b""),
+            thread_count=1 if workers > 1 else 0, options=options,
+        )
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run, segments))
+    else:
+        results = [run(segment) for segment in segments]
+    return _frames_by_message([pair for result in results for pair in result], len(msgs))
 
 
 def _try_demux(raw: bytes, codec_name: str) -> Optional[List[np.ndarray]]:
@@ -222,61 +590,145 @@ def _try_demux(raw: bytes, codec_name: str) -> Optional[List[np.ndarray]]:
         return None
 
 
-def _stream_candidates(msgs: List[Any]) -> List[Tuple[str, bytes]]:
-    """Build raw bytestream variants to try with demuxers.
+# Ways of joining packet payloads into one elementary stream, most common first
+_STREAM_LAYOUTS = ("plain_concat", "per_msg_annex", "whole_avcc_be", "whole_avcc_le")
+# Layouts where each message is a whole access unit, decodable with per-message PTS
+_PER_MESSAGE_LAYOUTS = ("plain_concat", "per_msg_annex")
+
+# Packets decoded when probing the layout of a stream
+_PROBE_PACKETS = 16
+
+# (codec_name, layout) found by probing, per caller-supplied connection key
+_layout_cache: Dict[Hashable, Tuple[str, str]] = {}
+
+
+def _build_stream(chunks: List[bytes], layout: str) -> bytes:
+    """Join packet payloads into one elementary stream using ``layout``.
 
     Parameters
     ----------
-    msgs : list
-        FFMPEGPacket messages in order.
+    chunks : list of bytes
+        ``FFMPEGPacket.data`` payloads in order.
+    layout : str
+        One of ``_STREAM_LAYOUTS``.
 
     Returns
     -------
-    list of tuple
-        (label, bytes) for decoding attempts.
+    bytes
+        Concatenated stream to demux.
     """
-    chunks = [_msg_data_bytes(m.data) for m in msgs]
+    if layout == "per_msg_annex":
+        return b"".join(_ensure_annex_b_fragment(c) for c in chunks if c)
     plain = b"".join(chunks)
-    per_annex = b"".join(_ensure_annex_b_fragment(c) for c in chunks if c)
-    whole_be = _length_prefixed_to_annex_b(plain, True)
-    whole_le = _length_prefixed_to_annex_b(plain, False)
-    out: List[Tuple[str, bytes]] = []
-    for label, buf in (
-        ("plain_concat", plain),
-        ("per_msg_annex", per_annex),
-        ("whole_avcc_be", whole_be),
-        ("whole_avcc_le", whole_le),
-    ):
-        if len(buf) >= 8:
-            out.append((label, buf))
-    return out
+    if layout == "whole_avcc_be":
+        return _length_prefixed_to_annex_b(plain, True)
+    if layout == "whole_avcc_le":
+        return _length_prefixed_to_annex_b(plain, False)
+    return plain
+
+
+def _has_parameter_sets(raw: bytes, codec_name: str) -> bool:
+    """Return True if ``raw`` parses as Annex B NAL units carrying SPS and PPS of ``codec_name``."""
+    param_set_nals = _HEVC_PARAM_SET_NALS if codec_name == "hevc" else _H264_PARAM_SET_NALS
+    found = set()
+    for nal in _split_annex_b_nals(raw):
+        # forbidden_zero_bit must be clear; HEVC also needs nuh_temporal_id_plus1 > 0
+        if nal[0] & 0x80 or (codec_name == "hevc" and (len(nal) < 2 or nal[1] & 0x07 == 0)):
+            return False
+        nal_type = _nal_unit_type(nal, codec_name)
+        if nal_type in param_set_nals:
+            found.add(nal_type)
+    return len(found) >= 2
+
+
+def probe_stream_layout(msgs: List[Any], num_packets: int = _PROBE_PACKETS) -> Optional[Tuple[str, str]]:
+    """Find the codec and payload layout of an ``FFMPEGPacket`` stream from its first packets.
+
+    Candidates whose first packets carry SPS/PPS (and VPS) NAL units for the
+    codec are tried first; each candidate is confirmed by decoding only the
+    first ``num_packets`` packets.
 
+    Parameters
+    ----------
+    msgs : list of Any
+        Deserialized ``FFMPEGPacket`` messages in bag order.
+    num_packets : int
+        Number of leading packets to probe.
 
-def _decode_ffmpeg_cli(
-    raw: bytes, width: int, height: int, codec_fmt: str
-) -> Optional[List[np.ndarray]]:
-    """Decode via ``ffmpeg`` CLI (tolerates some bitstreams PyAV rejects).
+    Returns
+    -------
+    tuple or None
+        ``(codec_name, layout)``, or None if no candidate decodes.
+    """
+    if not msgs:
+        return None
+    chunks = [_msg_data_bytes(m.data) for m in msgs[:num_packets]]
+    enc_codec = _encoding_to_codec_name(_as_str(msgs[0].encoding))
+    alt = "hevc" if enc_codec == "h264" else "h264"
+
+    prefixes = {layout: _build_stream(chunks, layout) for layout in _STREAM_LAYOUTS}
+    candidates = [(codec, layout) for codec in (enc_codec, alt) for layout in _STREAM_LAYOUTS]
+    # Stable sort: parameter-set matches first, otherwise encoding and layout order
+    candidates.sort(key=lambda c: not _has_parameter_sets(prefixes[c[1]], c[0]))
+    for codec, layout in candidates:
+        if _try_demux(prefixes[layout], codec):
+            return codec, layout
+    return None
+
+
+# Bytes written to ffmpeg's stdin per call when feeding one large buffer
+_PIPE_CHUNK_BYTES = 1 << 20
+
+
+class FfmpegPipeDecoder:
+    """Stream an elementary stream through one ``ffmpeg`` CLI process.
+
+    A feeder thread writes the chunks to ``ffmpeg``'s stdin while iterating
+    reads fixed-size BGR frames from its stdout, so neither the whole input
+    nor the whole output is ever buffered.
 
     Parameters
     ----------
-    raw : bytes
-        Elementary stream.
+    chunks : iterable of bytes
+        Elementary stream pieces (e.g. Annex B packets), consumed by the feeder thread.
     width : int
-        Frame width from message (must be > 0).
+        Frame width (must be > 0).
     height : int
-        Frame height from message (must be > 0).
+        Frame height (must be > 0).
     codec_fmt : str
         ``h264`` or ``hevc`` for ``-f``.
+    pool_size : int, optional
+        Number of output buffers reused round-robin. A yielded frame is then
+        only valid until ``pool_size`` more frames have been read; copy it to
+        keep it. None allocates a fresh array per frame.
 
-    Returns
-    -------
-    list of ndarray or None
-        BGR frames if successful.
+    Raises
+    ------
+    FileNotFoundError
+        If the ``ffmpeg`` executable is not on ``PATH``.
+
+    Examples
+    --------
+    >>> with FfmpegPipeDecoder(packets, 1280, 720, "h264", pool_size=4) as decoder:
+    ...     for frame in decoder:
+    ...         process(frame)
     """
-    if width <= 0 or height <= 0 or not raw:
-        return None
-    try:
-        proc = subprocess.run(
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        width: int,
+        height: int,
+        codec_fmt: str,
+        pool_size: Optional[int] = 4,
+    ) -> None:
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Invalid frame size {width}x{height}")
+        self.shape = (height, width, 3)
+        self.frame_nbytes = width * height * 3
+        self._pool = [np.empty(self.shape, dtype=np.uint8) for _ in range(pool_size or 0)]
+        self._eof = False
+        self._proc = subprocess.Popen(
             [
                 "ffmpeg",
                 "-hide_banner",
@@ -292,43 +744,186 @@ def _decode_ffmpeg_cli(
                 "rawvideo",
                 "pipe:1",
             ],
-            input=raw,
-            capture_output=True,
-            timeout=600,
-            check=False,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
         )
-    except (FileNotFoundError, subprocess.TimeoutExpired):
+        self._feeder = threading.Thread(target=self._feed, args=(chunks,), daemon=True)
+        self._feeder.start()
+
+    def _feed(self, chunks: Iterable[bytes]) -> None:
+        stdin = self._proc.stdin
+        try:
+            for chunk in chunks:
+                view = memoryview(chunk)
+                for i in range(0, len(view), _PIPE_CHUNK_BYTES):
+                    stdin.write(view[i : i + _PIPE_CHUNK_BYTES])
+        except (BrokenPipeError, ValueError):
+            # ffmpeg exited early, or the decoder was closed
+            pass
+        finally:
+            try:
+                stdin.close()
+            except BrokenPipeError:
+                pass
+
+    def _read_into(self, buffer: np.ndarray) -> bool:
+        view = memoryview(buffer).cast("B")
+        filled = 0
+        while filled < self.frame_nbytes:
+            n = self._proc.stdout.readinto(view[filled:])
+            if not n:
+                self._eof = True
+                return False
+            filled += n
+        return True
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        i = 0
+        while True:
+            if self._pool:
+                frame = self._pool[i % len(self._pool)]
+            else:
+                frame = np.empty(self.shape, dtype=np.uint8)
+            # A truncated trailing frame is dropped
+            if not self._read_into(frame):
+                return
+            i += 1
+            yield frame
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """``ffmpeg`` exit status once it has finished, else None."""
+        return self._proc.poll()
+
+    def close(self) -> int:
+        """Stop ``ffmpeg`` and the feeder; return the exit status.
+
+        Closing before all frames were read kills ``ffmpeg``.
+        """
+        if not self._eof and self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.stdout.close()
+        self._feeder.join()
+        return self._proc.wait()
+
+    def __enter__(self) -> "FfmpegPipeDecoder":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _decode_ffmpeg_cli(
+    raw: bytes, width: int, height: int, codec_fmt: str
+) -> Optional[List[np.ndarray]]:
+    """Decode via ``ffmpeg`` CLI (tolerates some bitstreams PyAV rejects).
+
+    Parameters
+    ----------
+    raw : bytes
+        Elementary stream.
+    width : int
+        Frame width from message (must be > 0).
+    height : int
+        Frame height from message (must be > 0).
+    codec_fmt : str
+        ``h264`` or ``hevc`` for ``-f``.
+
+    Returns
+    -------
+    list of ndarray or None
+        BGR frames if successful, each read straight into its own array.
+    """
+    if width <= 0 or height <= 0 or not raw:
         return None
-    if proc.returncode != 0 or not proc.stdout:
+    try:
+        with FfmpegPipeDecoder([raw], width, height, codec_fmt, pool_size=None) as decoder:
+            frames = list(decoder)
+    except FileNotFoundError:
+        return None
+    if decoder.returncode != 0:
         return None
-    fs = width * height * 3
-    data = proc.stdout
-    frames: List[np.ndarray] = []
-    for i in range(0, len(data) // fs * fs, fs):
-        frames.append(
-            np.frombuffer(data[i : i + fs], dtype=np.uint8)
-            .reshape((height, width, 3))
-            .copy()
-        )
     return frames if frames else None
 
 
-def ffmpeg_packets_to_bgr_frames(msgs: List[Any]) -> List[np.ndarray]:
+def _decode_stream(
+    msgs: List[Any],
+    chunks: List[bytes],
+    codec: str,
+    layout: str,
+    options: Optional[ImageDecodeOptions],
+    use_cli: bool,
+) -> Optional[List[np.ndarray]]:
+    """Decode the whole stream once as ``(codec, layout)``.
+
+    Per-message layouts are decoded packet by packet (``decode_segments_parallel``);
+    ``FfmpegPacketDecoder`` converts every payload to Annex B itself, so
+    ``plain_concat`` and ``per_msg_annex`` decode identically. If that yields
+    nothing (e.g. messages holding partial access units), the joined stream is
+    demuxed with the parser, as ``probe_stream_layout`` does; other layouts are
+    only demuxed. With ``use_cli``, the ``ffmpeg`` CLI is tried on the joined
+    stream when PyAV yields nothing and width and height are set.
+
+    Returns
+    -------
+    list of ndarray or None
+        Frames aligned to ``msgs``, or None if nothing decoded.
+    """
+    n = len(msgs)
+    if layout in _PER_MESSAGE_LAYOUTS:
+        got = decode_segments_parallel(msgs, index_keyframes(msgs, codec), options=options)
+        if got:
+            return got
+    buf = _build_stream(chunks, layout)
+    got = _try_demux(buf, codec)
+    w, h = int(msgs[0].width), int(msgs[0].height)
+    if not got and use_cli and len(buf) >= 8 and w > 0 and h > 0:
+        got = _decode_ffmpeg_cli(buf, w, h, codec)
+    if not got:
+        return None
+    if options is not None:
+        got = [convert_bgr(frame, options) for frame in got]
+    return _align_frame_list_to_msg_count(got, n)
+
+
+def ffmpeg_packets_to_bgr_frames(
+    msgs: List[Any],
+    cache_key: Optional[Hashable] = None,
+    options: Optional[ImageDecodeOptions] = None,
+) -> List[np.ndarray]:
     """Decode a chronological list of ``FFMPEGPacket`` messages to BGR images.
 
-    Tries concatenated elementary streams (plain, Annex B per message, AVCC
-    converted), both H.264 and HEVC, then optional ``ffmpeg`` CLI if width and
-    height are set on the first message.
+    The codec (H.264 / HEVC) and payload layout (plain, Annex B per message,
+    AVCC converted) are probed on the first packets (``probe_stream_layout``)
+    and the whole stream is then decoded exactly once with that layout. When
+    each message holds whole access units, packets are decoded one by one with
+    their message index as PTS, GOPs in parallel (``decode_segments_parallel``),
+    so every frame lands on the message it was coded in; AVCC-converted streams,
+    and per-message streams that yield nothing packet by packet, are demuxed
+    with PyAV and frames are assigned in output order. Only if
+    probing finds no layout is each remaining candidate (per codec: per-message
+    decode and the two AVCC layouts, each falling back to the ``ffmpeg`` CLI when
+    width and height are set on the first message) decoded in full until one
+    succeeds.
 
     Parameters
     ----------
     msgs : list of Any
         Deserialized ``FFMPEGPacket`` messages in bag order.
+    cache_key : Hashable, optional
+        Identifies the connection (e.g. bag path and topic); the probed layout
+        is remembered under it and reused by later calls.
+    options : ImageDecodeOptions, optional
+        Output scale and pixel format (applied after decoding on the demux /
+        CLI paths); full-size BGR if None.
 
     Returns
     -------
     list of ndarray
-        uint8 arrays shaped ``(H, W, 3)`` BGR, length ``len(msgs)``.
+        uint8 arrays shaped ``(H, W, 3)`` BGR (or as ``options`` select),
+        length ``len(msgs)``. Messages
+        without a frame of their own reference a neighbouring frame (no copy).
 
     Raises
     ------
@@ -337,47 +932,40 @@ def ffmpeg_packets_to_bgr_frames(msgs: List[Any]) -> List[np.ndarray]:
     ValueError
         If ``msgs`` is empty or decoding fails.
     """
-    try:
-        import av  # noqa: F401
-    except ImportError as err:
-        raise ImportError(
-            "Decoding FFMPEGPacket requires PyAV. Install with: pip install av"
-        ) from err
+    _require_av()
 
     if not msgs:
         raise ValueError("No FFMPEGPacket messages to decode")
 
     enc_codec = _encoding_to_codec_name(_as_str(msgs[0].encoding))
     alt = "hevc" if enc_codec == "h264" else "h264"
-    w, h = int(msgs[0].width), int(msgs[0].height)
-    n = len(msgs)
+    chunks = [_msg_data_bytes(m.data) for m in msgs]
+
+    layout = _layout_cache.get(cache_key) if cache_key is not None else None
+    if layout is None:
+        layout = probe_stream_layout(msgs)
+        if layout is not None and cache_key is not None:
+            _layout_cache[cache_key] = layout
+
+    if layout is not None:
+        got = _decode_stream(msgs, chunks, layout[0], layout[1], options, use_cli=False)
+        if got:
+            return got
+        if cache_key is not None:
+            _layout_cache.pop(cache_key, None)
+        raise ValueError(
+            f"FFMPEGPacket stream probed as {layout[0]} / {layout[1]} failed to decode. "
+            f"First message encoding={_as_str(msgs[0].encoding)!r}."
+        )
 
-    last_err: Optional[BaseException] = None
     for codec in (enc_codec, alt):
-        for _label, buf in _stream_candidates(msgs):
-            got = _try_demux(buf, codec)
+        for label in ("per_msg_annex", "whole_avcc_be", "whole_avcc_le"):
+            got = _decode_stream(msgs, chunks, codec, label, options, use_cli=True)
             if got:
-                try:
-                    return _align_frame_list_to_msg_count(got, n)
-                except ValueError:
-                    pass
-            if w > 0 and h > 0:
-                cli = _decode_ffmpeg_cli(buf, w, h, codec)
-                if cli:
-                    try:
-                        return _align_frame_list_to_msg_count(cli, n)
-                    except ValueError:
-                        pass
-
-    try:
-        plain = b"".join(_msg_data_bytes(m.data) for m in msgs)
-        _demux_all_bgr(plain, enc_codec)
-    except Exception as e:
-        last_err = e
+                return got
 
     raise ValueError(
         "Could not decode FFMPEGPacket stream (tried h264/hevc, Annex B / "
         "length-prefixed layouts, and ffmpeg CLI when W/H are set). "
-        f"First message encoding={_as_str(msgs[0].encoding)!r}. "
-        f"Last error: {last_err!r}"
+        f"First message encoding={_as_str(msgs[0].encoding)!r}."
     )
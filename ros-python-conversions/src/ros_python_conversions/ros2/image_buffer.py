@@ -0,0 +1,375 @@
+"""Native ``sensor_msgs/Image`` buffer access (no ``cv_bridge``).
+
+The rosbags ``data`` array is viewed in place with the message's ``step``
+(row stride); a copy is only made when a colour or byte-order conversion is
+actually needed. ``ImageDecodeOptions`` selects reduced-resolution and
+gray / YUV 4:2:0 output for the raw, compressed and video decoders.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from pydantic import BaseModel, validator
+
+# encoding -> (dtype, channels)
+_ENCODING_LAYOUTS: Dict[str, Tuple[np.dtype, int]] = {
+    "bgr8": (np.dtype(np.uint8), 3),
+    "rgb8": (np.dtype(np.uint8), 3),
+    "bgra8": (np.dtype(np.uint8), 4),
+    "rgba8": (np.dtype(np.uint8), 4),
+    "mono8": (np.dtype(np.uint8), 1),
+    "bgr16": (np.dtype(np.uint16), 3),
+    "rgb16": (np.dtype(np.uint16), 3),
+    "bgra16": (np.dtype(np.uint16), 4),
+    "rgba16": (np.dtype(np.uint16), 4),
+    "mono16": (np.dtype(np.uint16), 1),
+    "bayer_rggb8": (np.dtype(np.uint8), 1),
+    "bayer_bggr8": (np.dtype(np.uint8), 1),
+    "bayer_gbrg8": (np.dtype(np.uint8), 1),
+    "bayer_grbg8": (np.dtype(np.uint8), 1),
+    "bayer_rggb16": (np.dtype(np.uint16), 1),
+    "bayer_bggr16": (np.dtype(np.uint16), 1),
+    "bayer_gbrg16": (np.dtype(np.uint16), 1),
+    "bayer_grbg16": (np.dtype(np.uint16), 1),
+    "yuv422": (np.dtype(np.uint8), 2),
+    "uyvy": (np.dtype(np.uint8), 2),
+    "yuv422_yuy2": (np.dtype(np.uint8), 2),
+    "yuyv": (np.dtype(np.uint8), 2),
+}
+
+_CV_TYPE_DTYPES: Dict[str, np.dtype] = {
+    "8U": np.dtype(np.uint8),
+    "8S": np.dtype(np.int8),
+    "16U": np.dtype(np.uint16),
+    "16S": np.dtype(np.int16),
+    "32S": np.dtype(np.int32),
+    "32F": np.dtype(np.float32),
+    "64F": np.dtype(np.float64),
+}
+_CV_TYPE_RE = re.compile(r"^(8U|8S|16U|16S|32S|32F|64F)C([1-4])$")
+
+# ROS names the Bayer pattern from the top-left pixel, OpenCV from the second row.
+_TO_BGR_CODES: Dict[str, int] = {
+    "rgb8": cv2.COLOR_RGB2BGR,
+    "rgb16": cv2.COLOR_RGB2BGR,
+    "bgra8": cv2.COLOR_BGRA2BGR,
+    "bgra16": cv2.COLOR_BGRA2BGR,
+    "rgba8": cv2.COLOR_RGBA2BGR,
+    "rgba16": cv2.COLOR_RGBA2BGR,
+    "mono8": cv2.COLOR_GRAY2BGR,
+    "mono16": cv2.COLOR_GRAY2BGR,
+    "bayer_rggb8": cv2.COLOR_BayerBG2BGR,
+    "bayer_bggr8": cv2.COLOR_BayerRG2BGR,
+    "bayer_gbrg8": cv2.COLOR_BayerGR2BGR,
+    "bayer_grbg8": cv2.COLOR_BayerGB2BGR,
+    "bayer_rggb16": cv2.COLOR_BayerBG2BGR,
+    "bayer_bggr16": cv2.COLOR_BayerRG2BGR,
+    "bayer_gbrg16": cv2.COLOR_BayerGR2BGR,
+    "bayer_grbg16": cv2.COLOR_BayerGB2BGR,
+    "yuv422": cv2.COLOR_YUV2BGR_UYVY,
+    "uyvy": cv2.COLOR_YUV2BGR_UYVY,
+    "yuv422_yuy2": cv2.COLOR_YUV2BGR_YUY2,
+    "yuyv": cv2.COLOR_YUV2BGR_YUY2,
+}
+
+
+def _as_str(encoding: Any) -> str:
+    if isinstance(encoding, bytes):
+        encoding = encoding.decode("utf-8", errors="replace")
+    return str(encoding or "").strip("\x00").strip()
+
+
+def encoding_layout(encoding: str) -> Tuple[np.dtype, int]:
+    """Element dtype and channel count for a ``sensor_msgs/Image`` encoding.
+
+    Parameters
+    ----------
+    encoding : str
+        ``msg.encoding``, e.g. ``bgr8``, ``mono16``, ``16UC1``, ``bayer_rggb8``.
+
+    Returns
+    -------
+    tuple
+        ``(dtype, channels)``.
+
+    Raises
+    ------
+    ValueError
+        If the encoding is not recognised.
+    """
+    enc = _as_str(encoding)
+    layout = _ENCODING_LAYOUTS.get(enc.lower())
+    if layout is not None:
+        return layout
+    m = _CV_TYPE_RE.match(enc.upper())
+    if m:
+        return _CV_TYPE_DTYPES[m.group(1)], int(m.group(2))
+    raise ValueError(f"Unsupported image encoding: {enc!r}")
+
+
+def _ensure_writable(array: np.ndarray, writable: bool) -> np.ndarray:
+    return array.copy() if writable and not array.flags.writeable else array
+
+
+def image_msg_to_ndarray(msg: Any, writable: bool = False) -> np.ndarray:
+    """View ``sensor_msgs/msg/Image`` pixels as an ndarray in the message encoding.
+
+    Parameters
+    ----------
+    msg : Any
+        ``sensor_msgs/msg/Image`` (rosbags: ``data`` is a uint8 ndarray).
+    writable : bool, optional
+        Copy the view when it is read-only, so the caller can modify the
+        result in place, by default False.
+
+    Returns
+    -------
+    ndarray
+        Shape ``(H, W)`` for single-channel encodings, else ``(H, W, C)``.
+        Shares memory with ``msg.data`` (rows padded per ``msg.step`` are
+        skipped by striding); only big-endian multi-byte data is copied, to
+        native byte order. The view is read-only when ``msg.data`` is (as
+        for rosbags messages deserialized from bytes) unless ``writable``.
+
+    Raises
+    ------
+    ValueError
+        If the encoding is unknown or ``data`` is shorter than ``height * step``.
+    """
+    dtype, channels = encoding_layout(msg.encoding)
+    height, width = int(msg.height), int(msg.width)
+    row_nbytes = width * channels * dtype.itemsize
+    step = int(msg.step) or row_nbytes
+
+    buffer = msg.data
+    if not isinstance(buffer, np.ndarray):
+        buffer = np.frombuffer(buffer, dtype=np.uint8)
+    if step < row_nbytes or buffer.nbytes < (height - 1) * step + row_nbytes:
+        raise ValueError(
+            f"Image data of {buffer.nbytes} bytes too small for {height}x{width} "
+            f"{_as_str(msg.encoding)} with step {step}"
+        )
+
+    big_endian = bool(getattr(msg, "is_bigendian", False)) and dtype.itemsize > 1
+    view_dtype = dtype.newbyteorder(">") if big_endian else dtype
+
+    if channels == 1:
+        shape: Tuple[int, ...] = (height, width)
+        strides: Tuple[int, ...] = (step, dtype.itemsize)
+    else:
+        shape = (height, width, channels)
+        strides = (step, channels * dtype.itemsize, dtype.itemsize)
+
+    array = np.ndarray(shape, dtype=view_dtype, buffer=np.ascontiguousarray(buffer), strides=strides)
+    if view_dtype != dtype:
+        return array.astype(dtype)
+    return _ensure_writable(array, writable)
+
+
+def image_msg_to_bgr(msg: Any, writable: bool = False) -> np.ndarray:
+    """Decode ``sensor_msgs/msg/Image`` to BGR, copying only when converting.
+
+    Parameters
+    ----------
+    msg : Any
+        ``sensor_msgs/msg/Image``.
+    writable : bool, optional
+        Copy a read-only ``msg.data`` view, see ``image_msg_to_ndarray``,
+        by default False.
+
+    Returns
+    -------
+    ndarray
+        uint8 ``(H, W, 3)`` (``bgr8``). ``bgr8`` / ``8UC3`` messages are
+        returned as a view of ``msg.data`` (read-only unless ``writable``);
+        other colour, mono, Bayer and YUV 4:2:2 encodings are converted with
+        a single ``cv2.cvtColor``. 16-bit encodings keep their high byte, as
+        ``cv_bridge`` does.
+
+    Raises
+    ------
+    ValueError
+        If the encoding has no BGR conversion.
+    """
+    enc = _as_str(msg.encoding).lower()
+    image = image_msg_to_ndarray(msg)
+    if image.dtype == np.uint16:
+        image = np.right_shift(image, 8).astype(np.uint8)
+    elif image.dtype != np.uint8:
+        raise ValueError(f"Cannot convert image encoding {enc!r} to BGR")
+    if enc in ("bgr8", "bgr16", "8uc3", "16uc3"):
+        return _ensure_writable(image, writable)
+    code = _TO_BGR_CODES.get(enc)
+    if code is None:
+        if enc in ("8uc1", "16uc1"):
+            code = cv2.COLOR_GRAY2BGR
+        else:
+            raise ValueError(f"Cannot convert image encoding {enc!r} to BGR")
+    return cv2.cvtColor(image, code)
+
+
+########################################################
+# DECODE OPTIONS
+########################################################
+
+_PIXEL_FORMATS = ("bgr", "gray", "yuv420p")
+
+# (downscale factor, gray) -> imdecode flag that decodes straight at reduced size
+_REDUCED_IMREAD_FLAGS: Dict[Tuple[int, bool], int] = {
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+_MONO_ENCODINGS = ("mono8", "mono16", "8uc1", "16uc1")
+
+
+class ImageDecodeOptions(BaseModel):
+    """Output size and pixel format for colour image decoding.
+
+    Attributes
+    ----------
+    scale : float
+        Output size relative to the source, in ``(0, 1]``. JPEG (and other
+        ``imdecode`` formats) decode directly at 1/2, 1/4 and 1/8; video
+        frames are scaled in the same ``sws_scale`` pass as the colour
+        conversion.
+    pixel_format : str
+        ``bgr`` (``(H, W, 3)``), ``gray`` (``(H, W)``) or ``yuv420p``
+        (planar I420, ``(H * 3 / 2, W)``; width and height rounded down to even).
+    keyframes_only : bool
+        Video only: skip decoding non-key frames; their messages reference
+        the previous keyframe's image.
+    """
+
+    scale : float = 1.0
+    pixel_format : str = "bgr"
+    keyframes_only : bool = False
+
+    @validator("scale")
+    def _check_scale(cls, value: float) -> float:
+        if not 0.0 < value <= 1.0:
+            raise ValueError(f"scale must be in (0, 1], got {value}")
+        return value
+
+    @validator("pixel_format")
+    def _check_pixel_format(cls, value: str) -> str:
+        if value not in _PIXEL_FORMATS:
+            raise ValueError(f"pixel_format must be one of {_PIXEL_FORMATS}, got {value!r}")
+        return value
+
+    @property
+    def reduction(self) -> Optional[int]:
+        """Integer downscale factor (2, 4 or 8) when ``scale`` matches one exactly."""
+        factor = round(1.0 / self.scale)
+        return factor if factor in (2, 4, 8) and abs(factor * self.scale - 1.0) < 1e-9 else None
+
+    def output_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Output ``(width, height)`` for a ``width`` x ``height`` source."""
+        out_w = max(1, int(round(width * self.scale)))
+        out_h = max(1, int(round(height * self.scale)))
+        if self.pixel_format == "yuv420p":
+            out_w, out_h = max(2, out_w & ~1), max(2, out_h & ~1)
+        return out_w, out_h
+
+
+def convert_bgr(bgr: np.ndarray, options: ImageDecodeOptions) -> np.ndarray:
+    """Scale and convert a BGR (or, for ``gray`` output, single-channel) image.
+
+    Parameters
+    ----------
+    bgr : ndarray
+        ``(H, W, 3)`` BGR, or ``(H, W)`` gray, uint8.
+    options : ImageDecodeOptions
+        Target scale and pixel format.
+
+    Returns
+    -------
+    ndarray
+        Resized (``INTER_AREA``) before the colour conversion, so the
+        conversion runs at output resolution. ``bgr`` itself if nothing changes.
+    """
+    height, width = bgr.shape[:2]
+    out_w, out_h = options.output_size(width, height)
+    if (out_w, out_h) != (width, height):
+        bgr = cv2.resize(bgr, (out_w, out_h), interpolation=cv2.INTER_AREA)
+    gray_input = bgr.ndim == 2
+    if options.pixel_format == "gray":
+        return bgr if gray_input else cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    if gray_input:
+        bgr = cv2.cvtColor(bgr, cv2.COLOR_GRAY2BGR)
+    if options.pixel_format == "yuv420p":
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420)
+    return bgr
+
+
+def image_msg_to_array(msg: Any, options: ImageDecodeOptions, writable: bool = False) -> np.ndarray:
+    """Decode ``sensor_msgs/msg/Image`` at reduced size and/or another pixel format.
+
+    Parameters
+    ----------
+    msg : Any
+        ``sensor_msgs/msg/Image``.
+    options : ImageDecodeOptions
+        Target scale and pixel format.
+    writable : bool, optional
+        Copy a read-only ``msg.data`` view, see ``image_msg_to_ndarray``,
+        by default False.
+
+    Returns
+    -------
+    ndarray
+        See ``ImageDecodeOptions.pixel_format``. Mono sources with ``gray``
+        output are resized straight from the message buffer, without a BGR
+        intermediate. Without scaling or conversion this is the read-only
+        ``msg.data`` view unless ``writable``.
+    """
+    enc = _as_str(msg.encoding).lower()
+    if options.pixel_format == "gray" and enc in _MONO_ENCODINGS:
+        image = image_msg_to_ndarray(msg)
+        if image.dtype == np.uint16:
+            image = np.right_shift(image, 8).astype(np.uint8)
+        return _ensure_writable(convert_bgr(image, options), writable)
+    return _ensure_writable(convert_bgr(image_msg_to_bgr(msg), options), writable)
+
+
+def decode_compressed_image(data: Any, options: ImageDecodeOptions) -> np.ndarray:
+    """Decode ``CompressedImage.data`` (JPEG, PNG, ...) with ``cv2.imdecode``.
+
+    Parameters
+    ----------
+    data : Any
+        Encoded bytes (rosbags: uint8 ndarray).
+    options : ImageDecodeOptions
+        Target scale and pixel format.
+
+    Returns
+    -------
+    ndarray
+        For 1/2, 1/4 and 1/8 scales the codec decodes at reduced size
+        (``IMREAD_REDUCED_*``; for JPEG the full-size image is never
+        allocated); gray output is decoded directly as grayscale.
+
+    Raises
+    ------
+    ValueError
+        If the data cannot be decoded.
+    """
+    buffer = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.uint8)
+    gray = options.pixel_format == "gray"
+    flag = _REDUCED_IMREAD_FLAGS.get((options.reduction, gray))
+    if flag is None:
+        flag = cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR
+    image = cv2.imdecode(buffer, flag)
+    if image is None:
+        raise ValueError("Could not decode compressed image")
+    if options.reduction is not None:
+        options = options.copy(update={"scale": 1.0})
+    return convert_bgr(image, options)
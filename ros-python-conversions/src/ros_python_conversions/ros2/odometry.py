@@ -1,6 +1,7 @@
 from data_models.impl.pose_instance import PoseInstance
 from data_models.impl.transforms import Transform3D
 from data_models.core.base_metadata import BaseMetadata
+from data_models.core.construct import construct_unchecked
 
 from rclpy.time import Time
 
@@ -63,14 +64,16 @@ def odometry_msg_to_pose_instance(msg: Any, instance_index: int = -1, timestamp:
     ]
     rotation = Rotation.from_quat(quaternion)
     
-    pose_data = Transform3D(
+    pose_data = construct_unchecked(
+        Transform3D,
         translation=translation,
         rotation=rotation
     )
     
-    return PoseInstance(
+    return construct_unchecked(
+        PoseInstance,
         pose=pose_data,
-        metadata=BaseMetadata(timestamp=timestamp_val, index=instance_index)
+        metadata=construct_unchecked(BaseMetadata, timestamp=float(timestamp_val), index=int(instance_index))
     )
 
 ### POSE INSTANCE -> ODOMETRY MESSAGE ###
@@ -1,22 +1,21 @@
 from data_models.impl.image_instance import ImageInstance
 from data_models.core.base_metadata import BaseMetadata
+from data_models.core.construct import construct_unchecked
 
-from cv_bridge import CvBridge
-
+from pydantic import BaseModel
 from rclpy.time import Time
 
+from ros_python_conversions.ros2.image_buffer import (
+    ImageDecodeOptions,
+    decode_compressed_image,
+    image_msg_to_array,
+    image_msg_to_bgr,
+)
 from ros_python_conversions.ros2.time import time_to_timestamp
-from typing import Any
-
-# Lazy-load CvBridge to avoid import-time errors
-_bridge = None
+from typing import Any, Optional
 
-def _get_bridge():
-    """Get or create CvBridge instance (lazy-loaded)."""
-    global _bridge
-    if _bridge is None:
-        _bridge = CvBridge()
-    return _bridge
+# Full-size BGR output, as cv_bridge's desired_encoding="bgr8"
+_BGR_OPTIONS = ImageDecodeOptions()
 
 ########################################################
 # RGB IMAGE CONVERSIONS
@@ -24,29 +23,51 @@ def _get_bridge():
 
 # IMAGE MESSAGE -> IMAGE INSTANCE
 
-def any_image_msg_to_image_instance(msg : Any, instance_index : int = -1, timestamp : Time = Time(seconds=0, nanoseconds=0), use_header : bool = False) -> ImageInstance:
+def any_image_msg_to_image_instance(msg : Any, instance_index : int = -1, timestamp : Time = Time(seconds=0, nanoseconds=0), use_header : bool = False, options : Optional[ImageDecodeOptions] = None, writable : bool = False) -> ImageInstance:
     if msg.__msgtype__ == "sensor_msgs/msg/CompressedImage":
-        return compressed_image_msg_to_image_instance(msg, instance_index=instance_index, timestamp=timestamp, use_header=use_header)
+        return compressed_image_msg_to_image_instance(msg, instance_index=instance_index, timestamp=timestamp, use_header=use_header, options=options)
     elif msg.__msgtype__ == "sensor_msgs/msg/Image":
-        return image_msg_to_image_instance(msg, instance_index=instance_index, timestamp=timestamp, use_header=use_header)
+        return image_msg_to_image_instance(msg, instance_index=instance_index, timestamp=timestamp, use_header=use_header, options=options, writable=writable)
     else:
         raise ValueError(f"Unsupported image message type: {msg.__msg_type__}")
 
-def compressed_image_msg_to_image_instance(msg : Any, instance_index : int = -1, timestamp : Time = Time(seconds=0, nanoseconds=0), use_header : bool = False) -> ImageInstance:
+def compressed_image_msg_to_image_instance(msg : Any, instance_index : int = -1, timestamp : Time = Time(seconds=0, nanoseconds=0), use_header : bool = False, options : Optional[ImageDecodeOptions] = None) -> ImageInstance:
     if use_header:
         timestamp = time_to_timestamp(msg.header.stamp)
     else:
         timestamp = timestamp
-    bridge = _get_bridge()
-    return ImageInstance(data=bridge.compressed_imgmsg_to_cv2(msg, desired_encoding="bgr8"), metadata=BaseMetadata(timestamp=timestamp, index=instance_index))
+    # cv2.imdecode releases the GIL, so batch reads decode on a thread pool (see Ros2DataStream.get_instances);
+    # reduced-size / grayscale decode happens inside the codec (see image_buffer.py)
+    data = decode_compressed_image(msg.data, options or _BGR_OPTIONS)
+    return construct_unchecked(ImageInstance, data=data, metadata=construct_unchecked(BaseMetadata, timestamp=float(timestamp), index=int(instance_index)))
 
-def image_msg_to_image_instance(msg : Any, instance_index : int = -1, timestamp : Time = Time(seconds=0, nanoseconds=0), use_header=False) -> ImageInstance:
+def image_msg_to_image_instance(msg : Any, instance_index : int = -1, timestamp : Time = Time(seconds=0, nanoseconds=0), use_header=False, options : Optional[ImageDecodeOptions] = None, writable : bool = False) -> ImageInstance:
     if use_header:
         timestamp = time_to_timestamp(msg.header.stamp)
     else:
         timestamp = timestamp
-    bridge = _get_bridge()
-    return ImageInstance(data=bridge.imgmsg_to_cv2(msg, desired_encoding="bgr8"), metadata=BaseMetadata(timestamp=timestamp, index=instance_index))
+    # Zero-copy (read-only) view for bgr8, single cvtColor for other encodings (see image_buffer.py);
+    # writable copies the view so callers can draw in place, as with cv_bridge
+    data = image_msg_to_bgr(msg, writable=writable) if options is None else image_msg_to_array(msg, options, writable=writable)
+    return construct_unchecked(ImageInstance, data=data, metadata=construct_unchecked(BaseMetadata, timestamp=float(timestamp), index=int(instance_index)))
+
+class ImageDecoder(BaseModel):
+    """``decode_fn`` for raw / compressed image streams with fixed decode options.
+
+    Attributes
+    ----------
+    options : ImageDecodeOptions
+        Output scale and pixel format applied to every frame.
+    writable : bool
+        Copy raw frames that would be read-only views of ``msg.data`` (bgr8,
+        mono8), for callers that modify frames in place.
+    """
+
+    options : ImageDecodeOptions = ImageDecodeOptions()
+    writable : bool = False
+
+    def __call__(self, msg : Any, instance_index : int = -1, timestamp : float = 0.0, use_header : bool = False) -> ImageInstance:
+        return any_image_msg_to_image_instance(msg, instance_index=instance_index, timestamp=timestamp, use_header=use_header, options=self.options, writable=self.writable)
 
 ### IMAGE INSTANCE -> IMAGE MESSAGE ###
 
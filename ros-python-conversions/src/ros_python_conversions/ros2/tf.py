@@ -1,6 +1,7 @@
 from data_models.impl.tf_instance import TFInstance
 from data_models.impl.transforms import Transform3D
 from data_models.core.base_metadata import BaseMetadata
+from data_models.core.construct import construct_unchecked
 
 from rclpy.time import Time
 
@@ -73,14 +74,16 @@ def tf_message_to_tf_instance(msg: Any, instance_index: int = -1, timestamp: Uni
         ]
         rotation = Rotation.from_quat(quaternion)
         
-        transforms[parent_frame_id + "->" + child_frame_id] = Transform3D(
+        transforms[parent_frame_id + "->" + child_frame_id] = construct_unchecked(
+            Transform3D,
             translation=translation,
             rotation=rotation
         )
     
-    return TFInstance(
+    return construct_unchecked(
+        TFInstance,
         transforms=transforms,
-        metadata=BaseMetadata(timestamp=timestamp_val, index=instance_index)
+        metadata=construct_unchecked(BaseMetadata, timestamp=float(timestamp_val), index=int(instance_index))
     )
 
 def transform_stamped_to_tf_instance(msg: Any, instance_index: int = -1, timestamp: Union[Time, float] = 0.0, use_header: bool = False) -> TFInstance:
@@ -132,14 +135,16 @@ def transform_stamped_to_tf_instance(msg: Any, instance_index: int = -1, timesta
     ]
     rotation = Rotation.from_quat(quaternion)
     
-    transforms[msg.child_frame_id] = Transform3D(
+    transforms[msg.child_frame_id] = construct_unchecked(
+        Transform3D,
         translation=translation,
         rotation=rotation
     )
     
-    return TFInstance(
+    return construct_unchecked(
+        TFInstance,
         transforms=transforms,
-        metadata=BaseMetadata(timestamp=timestamp_val, index=instance_index)
+        metadata=construct_unchecked(BaseMetadata, timestamp=float(timestamp_val), index=int(instance_index))
     )
 
 ### TF INSTANCE -> TF MESSAGE ###
@@ -27,14 +27,26 @@ def visualize_stacked_dense_layers(Gridmap: Gridmap, binary: bool = False, expon
     return visualize_dense_grid_layer(summed_occupancy_data, binary=binary, exponential_scaling=exponential_scaling)
 
 def visualize_stacked_sparse_layers(Gridmap: Gridmap, gridlines: float = 0.0):
-    raise NotImplementedError("Visualization of stacked sparse layers is not implemented yet")
+    """ Draws every sparse layer's objects on the gridmap, one JET color per layer (later layers on top). """
+    sparse_layers = Gridmap.get_sparse_layers()
+    shape = tuple(int(size) for size in Gridmap.gridmap_coordinates.gridmap_shape)
+    sparse_vis = np.zeros(shape + (3,), dtype=np.uint8)
+    colors = cv2.applyColorMap(np.linspace(0, 255, len(sparse_layers)).astype(np.uint8).reshape(-1, 1), cv2.COLORMAP_JET)
+    for layer, color in zip(sparse_layers, colors[:, 0]):
+        sparse_vis[layer.rasterize(gridmap_coordinates=Gridmap.gridmap_coordinates)] = color
+
+    if gridlines > 0.0:
+        sparse_vis = draw_gridlines(sparse_vis, Gridmap.gridmap_coordinates, gridlines)
+
+    return sparse_vis
 
 def visualize_dense_grid_layer(dense_grid_layer: DenseGridLayer, binary: bool = False, exponential_scaling: bool = False, gridlines: float = 0.0):
 
     if binary:
         occupancy_data = (dense_grid_layer.occupancy_data > 0).astype(np.uint8)
     else:
-        occupancy_data = dense_grid_layer.occupancy_data
+        # Integer / float16 layers would overflow in exp and wrap in the normalization below
+        occupancy_data = np.asarray(dense_grid_layer.occupancy_data, dtype=np.float64)
 
     if exponential_scaling:
         occupancy_data = np.exp(occupancy_data)
@@ -51,8 +63,16 @@ def visualize_dense_grid_layer(dense_grid_layer: DenseGridLayer, binary: bool =
 
     return occupancy_vis
 
-def visualize_sparse_grid_layer(sparse_grid_layer: SparseGridLayer, gridlines: float = 0.0):
-    raise NotImplementedError("Visualization of sparse grid layers is not implemented yet")
+def visualize_sparse_grid_layer(sparse_grid_layer: SparseGridLayer, gridlines: float = 0.0, color: tuple = (255, 255, 255)):
+    """ Draws the layer's objects (cells whose center they cover) in color on black. """
+    mask = sparse_grid_layer.rasterize()
+    occupancy_vis = np.zeros(mask.shape + (3,), dtype=np.uint8)
+    occupancy_vis[mask] = color
+
+    if gridlines > 0.0:
+        occupancy_vis = draw_gridlines(occupancy_vis, sparse_grid_layer.gridmap_coordinates, gridlines)
+
+    return occupancy_vis
 
 def draw_gridlines(image: np.ndarray, gridmap_coordinates: GridmapCoordinates, distance: float = 5.0):
 